@@ -0,0 +1,213 @@
+"""
+Scores a directory (or glob) of resumes against a job description without going through HTTP, with the
+same JobDescriptionEnhancer / ResumeScoringService pipeline as the API.
+
+Results are appended to a JSONL file as they complete, one line per resume:
+    {"path", "filename", "status": "ok", "jd", "jd_identity", "user_input_hash", "resume_hash", "result"}
+    {"path", "filename", "status": "error", "jd", "jd_identity", "user_input_hash", "detail", ...}
+The run is resumable: the enhanced JD is saved next to the output (<output>.enhancement.json) and reused
+while the JD file is unchanged, and resumes that already have an "ok" line for that JD and user input are
+skipped. An interrupted run is continued by running the same command again (failed resumes are retried).
+
+    python -m app.cli --jd jd.pdf --resumes ./resumes --output scores.jsonl --concurrency 8
+    python -m app.cli --jd jd.pdf --resumes "archive/2025-*/**/*.pdf" --output scores.jsonl --user-input "Remote, Python"
+"""
+import argparse
+import asyncio
+import glob
+import json
+import os
+import sys
+import time
+from io import BytesIO
+from typing import Any, Dict, List, Set, Tuple
+from app.services.service_container import ServiceContainer
+from app.services.scoring_cache import content_hash
+from app.utils.admission import PRIORITY_BULK, priority_class
+from app.utils.deadline import DeadlineExceeded, request_deadline
+from app.utils.file_parser import SUPPORTED_EXTENSIONS, configure_parsing
+from app.utils.parse_sandbox import DocumentLimitExceeded
+from app.utils.serialization import ndjson_line
+
+
+def find_resumes(pattern: str) -> List[str]:
+    """
+    Supported documents under a directory (recursively) or matching a glob, in a stable order.
+    """
+    if os.path.isdir(pattern):
+        paths = [os.path.join(root, name) for root, _, files in os.walk(pattern) for name in files]
+    else:
+        paths = glob.glob(pattern, recursive=True)
+    return sorted(path for path in paths if os.path.isfile(path) and path.lower().endswith(SUPPORTED_EXTENSIONS))
+
+
+def completed_rows(output_path: str, run_key: Tuple[str, str]) -> Set[str]:
+    """
+    Paths already scored for this run key in an existing output file. A line cut off by an interrupted run
+    is ignored.
+    """
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, encoding="utf-8") as handle:
+        for line in handle:
+            try:
+                row = json.loads(line)
+            except ValueError:
+                continue
+            if row.get("status") == "ok" and (row.get("jd_identity"), row.get("user_input_hash")) == run_key:
+                done.add(row["path"])
+    return done
+
+
+def _open_output(output_path: str):
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    handle = open(output_path, "ab")
+    # Finish a line cut off by an interrupted run, so the next row starts on its own line
+    if handle.tell() > 0:
+        with open(output_path, "rb") as existing:
+            existing.seek(-1, os.SEEK_END)
+            if existing.read(1) != b"\n":
+                handle.write(b"\n")
+    return handle
+
+
+async def load_or_build_enhancement(container: ServiceContainer, jd_path: str, enhancement_path: str) -> Dict[str, Any]:
+    """
+    Enhances the JD, or reuses the enhancement saved by an earlier run on the same JD file. Enhancement is
+    not deterministic, so reusing it is what keeps a resumed run scoring against the same enhanced JD.
+    """
+    jd_content = _read_file(jd_path)
+    jd_file_hash = content_hash(jd_content)
+    if os.path.exists(enhancement_path):
+        with open(enhancement_path, encoding="utf-8") as handle:
+            saved = json.load(handle)
+        if saved.get("jd_file_hash") == jd_file_hash:
+            print(f"Reusing the enhanced JD from '{enhancement_path}'.", file=sys.stderr)
+            return saved["enhancement"]
+    enhancement = await container.job_description_enhancer.build_enhancement(BytesIO(jd_content), os.path.basename(jd_path))
+    os.makedirs(os.path.dirname(os.path.abspath(enhancement_path)), exist_ok=True)
+    with open(enhancement_path, "w", encoding="utf-8") as handle:
+        json.dump({"jd": jd_path, "jd_file_hash": jd_file_hash, "enhancement": enhancement}, handle)
+    return enhancement
+
+
+class _Progress:
+    def __init__(self, total: int, skipped: int):
+        self.total = total
+        self.skipped = skipped
+        self.done = 0
+        self.errors = 0
+        self.started = time.monotonic()
+
+    def update(self, path: str, ok: bool) -> None:
+        self.done += 1
+        self.errors += 0 if ok else 1
+        elapsed = time.monotonic() - self.started
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        eta = (self.total - self.done) / rate if rate > 0 else 0.0
+        print(
+            f"[{self.done}/{self.total}] {'ok   ' if ok else 'error'} {path} "
+            f"({rate:.2f} resumes/s, {self.errors} errors, eta {eta / 60:.1f} min)",
+            file=sys.stderr, flush=True
+        )
+
+
+async def score_directory(
+    container: ServiceContainer,
+    jd_path: str,
+    resume_pattern: str,
+    output_path: str,
+    user_input: str = "",
+    concurrency: int = 4
+) -> Dict[str, Any]:
+    """
+    Enhances the JD once, then scores every resume not yet in the output file with `concurrency` resumes
+    in flight, appending each result to the output as soon as it is done. Returns the run summary.
+    The enhanced JD is not made the server's current JD.
+    """
+    config = container.config
+    scoring_service = container.resume_scoring_service
+
+    enhancement = await load_or_build_enhancement(container, jd_path, f"{output_path}.enhancement.json")
+    batch = await scoring_service.prepare_scoring_batch(user_input, enhancement)
+    run_key = (batch["jd_identity"], batch["user_input_hash"])
+
+    paths = find_resumes(resume_pattern)
+    done = completed_rows(output_path, run_key)
+    pending = [path for path in paths if path not in done]
+    print(f"{len(paths)} resumes found, {len(paths) - len(pending)} already scored, {len(pending)} to score.", file=sys.stderr)
+
+    progress = _Progress(len(pending), len(paths) - len(pending))
+    queue: "asyncio.Queue[str]" = asyncio.Queue()
+    for path in pending:
+        queue.put_nowait(path)
+
+    with _open_output(output_path) as output:
+        async def score_one(path: str) -> Dict[str, Any]:
+            row = {"path": path, "filename": os.path.basename(path), "jd": jd_path,
+                   "jd_identity": run_key[0], "user_input_hash": run_key[1]}
+            try:
+                content = await asyncio.to_thread(_read_file, path)
+                # Each resume gets the API's request deadline, so one stuck document can't stall the run
+                with request_deadline(config.request_deadline_seconds):
+                    result = await scoring_service.score_resume_file(BytesIO(content), row["filename"], batch)
+                return dict(row, status="ok", resume_hash=content_hash(content), result=result)
+            except DocumentLimitExceeded as e:
+                return dict(row, status="error", **e.to_dict())
+            except DeadlineExceeded as e:
+                return dict(row, status="error", detail=f"Timed out: {str(e)}")
+            except Exception as e:
+                return dict(row, status="error", detail=str(e))
+
+        async def worker():
+            while not queue.empty():
+                path = queue.get_nowait()
+                row = await score_one(path)
+                # Written and flushed one line at a time from the event loop, so lines never interleave
+                output.write(ndjson_line(row))
+                output.flush()
+                progress.update(path, row["status"] == "ok")
+
+        await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+
+    return {
+        "found": len(paths),
+        "skipped": progress.skipped,
+        "scored": progress.done - progress.errors,
+        "errors": progress.errors,
+        "seconds": round(time.monotonic() - progress.started, 1),
+    }
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as handle:
+        return handle.read()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a directory of resumes against a job description")
+    parser.add_argument("--jd", required=True, help="Job description file (PDF, DOCX, ...)")
+    parser.add_argument("--resumes", required=True, help="Directory (searched recursively) or glob of resume files")
+    parser.add_argument("--output", required=True, help="JSONL file results are appended to; rerun to resume")
+    parser.add_argument("--user-input", default="", help="Recruiter criteria, as the API's user_input")
+    parser.add_argument("--concurrency", type=int, default=4, help="Resumes scored in parallel")
+    args = parser.parse_args()
+
+    container = ServiceContainer()
+    configure_parsing(container.parse_limits, container.parse_sandbox)
+    try:
+        # Batch work: GPT calls compete for slots as bulk, like the bulk API endpoints
+        with priority_class(PRIORITY_BULK):
+            summary = asyncio.run(score_directory(
+                container, args.jd, args.resumes, args.output, args.user_input, args.concurrency
+            ))
+    finally:
+        if container.parse_sandbox is not None:
+            container.parse_sandbox.close()
+    print(json.dumps(summary), file=sys.stderr)
+    sys.exit(1 if summary["errors"] else 0)
+
+
+if __name__ == "__main__":
+    main()
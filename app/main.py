@@ -1,13 +1,27 @@
-from fastapi import FastAPI, HTTPException, File, UploadFile, Form
+from fastapi import FastAPI, HTTPException, File, UploadFile, Form, Request, Query, Header, Depends
 from io import BytesIO
-from typing import List
+from typing import List, Optional
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, ORJSONResponse, StreamingResponse, PlainTextResponse
+from starlette.concurrency import run_in_threadpool
+from collections import OrderedDict
+from fastapi.middleware.gzip import GZipMiddleware
 import os
-from app.services.resume_extraction import ResumeParser
-from app.services.jd_extraction_helper import JobDescriptionParser
-from app.services.job_description_enhance import JobDescriptionEnhancer
-from app.services.resume_scoring import ResumeScoringService
+import hmac
+import threading
+import time
+import uuid
+from app.services.service_container import ServiceContainer
+from app.services.prompt_registry import list_prompts
+from app.models.schemas import ResumeSchema, JobDescriptionSchema, parse_field_selection
+from app.utils.serialization import validate_embedding_format, apply_embedding_format, ndjson_line
+from app.utils.archive import ArchiveError, ArchiveLimits, open_zip, iter_archive_documents
+from app.utils.file_parser import SUPPORTED_EXTENSIONS, configure_parsing, extract_normalized_text_async
+from app.utils.parse_sandbox import DocumentLimitExceeded
+from app.utils.admission import AdmissionController, AdmissionMiddleware, PRIORITY_BULK, PRIORITY_INTERACTIVE
+from app.utils.deadline import request_deadline, cancel_on_disconnect, DeadlineExceeded, ClientDisconnected
+from app.utils.profiling import RequestProfiler, sample_thread, stage_memory, top_allocations
+from app.utils.loop_monitor import EventLoopLagMonitor
 from app.utils.logger import Logger
 
 # Initialize Logger
@@ -17,7 +31,9 @@ logger = Logger(__name__).get_logger()
 app = FastAPI(
     title="Resume and Job Description Processing API",
     description="API for extracting, enhancing, and scoring resumes and job descriptions",
-    version="1.0.0"
+    version="1.0.0",
+    # orjson serializes the large float lists and nested scoring results several times faster
+    default_response_class=ORJSONResponse
 )
 
 # CORS Configuration - Allow requests from React frontend running on localhost:3000
@@ -32,11 +48,122 @@ app.mount("/static", StaticFiles(directory="app"), name="static")
 async def serve_ui():
     return FileResponse(os.path.join("app", "index.html"))
 
-# Initialize Services
-resume_parser = ResumeParser()
-jd_parser = JobDescriptionParser()
-job_description_enhancer = JobDescriptionEnhancer()
-resume_scoring_service = ResumeScoringService(job_description_enhancer)
+# Initialize Services (one shared config and GPT client for all of them)
+container = ServiceContainer()
+
+# Compress responses above the size threshold: brotli when the client accepts it and brotli-asgi
+# is installed (it falls back to gzip for other clients), gzip otherwise
+try:
+    from brotli_asgi import BrotliMiddleware
+    app.add_middleware(BrotliMiddleware, minimum_size=container.config.compression_min_bytes, gzip_fallback=True)
+except ImportError:
+    logger.info("brotli-asgi not installed, compressing responses with gzip only.")
+    app.add_middleware(GZipMiddleware, minimum_size=container.config.compression_min_bytes)
+resume_parser = container.resume_parser
+jd_parser = container.jd_parser
+job_description_enhancer = container.job_description_enhancer
+resume_scoring_service = container.resume_scoring_service
+
+# Event loop stall detection, started with the server
+loop_monitor = EventLoopLagMonitor(threshold=container.config.loop_lag_threshold_ms / 1000)
+
+@app.on_event("startup")
+async def start_loop_monitor():
+    if container.config.loop_lag_threshold_ms > 0:
+        loop_monitor.start()
+
+@app.on_event("shutdown")
+async def stop_loop_monitor():
+    await loop_monitor.stop()
+
+# Documents are parsed within the configured budgets, in isolated worker processes unless PARSE_WORKERS=0
+@app.on_event("startup")
+async def start_parse_sandbox():
+    configure_parsing(container.parse_limits, container.parse_sandbox)
+
+@app.on_event("shutdown")
+async def stop_parse_sandbox():
+    if container.parse_sandbox is not None:
+        container.parse_sandbox.close()
+
+def is_admin(token: Optional[str]) -> bool:
+    expected = container.config.admin_token
+    return bool(expected and token and hmac.compare_digest(token, expected))
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """
+    Admin endpoints need the X-Admin-Token header; they don't exist when ADMIN_TOKEN is unset.
+    """
+    if not container.config.admin_token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not is_admin(x_admin_token):
+        raise HTTPException(status_code=403, detail="Invalid admin token.")
+
+# Most recent per-request CPU profiles, by id
+request_profiles: "OrderedDict[str, str]" = OrderedDict()
+MAX_STORED_PROFILES = 20
+
+@app.middleware("http")
+async def profile_request(request: Request, call_next):
+    """
+    Admins can profile a single request with `X-Profile: 1`; the report is stored under the
+    X-Profile-Id response header and served by /api/admin/profiles/{id}.
+    """
+    if request.headers.get("X-Profile") != "1" or not is_admin(request.headers.get("X-Admin-Token")):
+        return await call_next(request)
+    profiler = RequestProfiler()
+    if not profiler.start():
+        response = await call_next(request)
+        response.headers["X-Profile"] = "busy"
+        return response
+    try:
+        response = await call_next(request)
+    finally:
+        report = profiler.stop()
+    profile_id = uuid.uuid4().hex[:12]
+    request_profiles[profile_id] = f"{request.method} {request.url.path}\n\n{report}"
+    while len(request_profiles) > MAX_STORED_PROFILES:
+        request_profiles.popitem(last=False)
+    response.headers["X-Profile-Id"] = profile_id
+    return response
+
+# Priority class per endpoint: single documents a recruiter is waiting on vs batch work.
+# Other routes (UI, stats, admin) are not admission controlled.
+ROUTE_PRIORITIES = {
+    "/api/parse-resume/": PRIORITY_INTERACTIVE,
+    "/api/parse-resume-stream/": PRIORITY_INTERACTIVE,
+    "/api/parse-job-description/": PRIORITY_INTERACTIVE,
+    "/api/job-description-enhance/": PRIORITY_INTERACTIVE,
+    "/api/score-resumes/": PRIORITY_BULK,
+    "/api/score-matrix/": PRIORITY_BULK,
+    "/api/parse-resumes-zip/": PRIORITY_BULK,
+    "/api/score-resumes-zip/": PRIORITY_BULK,
+}
+
+admission_controller = AdmissionController(container.config.admission_limits, container.config.admission_max_wait_seconds)
+
+# Added last, so it is the outermost middleware and rejects before any other work is done
+app.add_middleware(AdmissionMiddleware, controller=admission_controller, route_priorities=ROUTE_PRIORITIES)
+
+def resolve_request_timeout(request: Request) -> float:
+    """
+    Request deadline in seconds: the configured default, or the client's X-Request-Timeout
+    header when given, never above the configured maximum.
+    """
+    config = container.config
+    header = request.headers.get("X-Request-Timeout")
+    try:
+        requested = float(header) if header else config.request_deadline_seconds
+    except ValueError:
+        requested = config.request_deadline_seconds
+    return max(0.1, min(requested, config.max_request_deadline_seconds))
+
+async def run_request_work(request: Request, work):
+    """
+    Runs an endpoint's work under the request deadline and cancels it if the client disconnects.
+    """
+    with request_deadline(resolve_request_timeout(request)):
+        return await cancel_on_disconnect(request, work)
 
 @app.get("/")
 async def root():
@@ -44,46 +171,134 @@ async def root():
 
 ### **Resume Parsing Endpoint**
 @app.post("/api/parse-resume/")
-async def parse_resume(file: UploadFile = File(...)):
+async def parse_resume(
+    request: Request,
+    file: UploadFile = File(...),
+    fields: Optional[str] = Form(None)  # Comma-separated ResumeSchema fields, all when empty
+):
     """
     Endpoint to parse a resume file (PDF, DOCX, DOC, image) and return structured JSON output.
+    Pass `fields` (e.g. "candidate_name,email_address,skills") to extract only those fields.
     """
+    try:
+        selected_fields = parse_field_selection(fields, ResumeSchema)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     try:
         file_buffer = BytesIO(await file.read())  
         filename = file.filename
-        result = await resume_parser.parse_resume(file_buffer, filename)
+        result = await run_request_work(request, resume_parser.parse_resume(file_buffer, filename, selected_fields))
         return result
+    except DocumentLimitExceeded as e:
+        raise HTTPException(status_code=422, detail=e.to_dict())
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=f"Resume parsing timed out: {str(e)}")
+    except ClientDisconnected as e:
+        raise HTTPException(status_code=499, detail=str(e))
     except Exception as e:
         logger.error(f"Error parsing resume file '{file.filename}': {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Error parsing resume: {str(e)}")
 
+### **Streamed Resume Parsing Endpoint**
+@app.post("/api/parse-resume-stream/")
+async def parse_resume_stream(
+    request: Request,
+    file: UploadFile = File(...),
+    fields: Optional[str] = Form(None)  # Comma-separated ResumeSchema fields, all when empty
+):
+    """
+    Same as /api/parse-resume/, but streams NDJSON: one {"field", "value"} line per field as soon as GPT
+    has generated it, then {"result"} with the full parse (identical to /api/parse-resume/), or a final
+    {"error", "detail"} line when the extraction fails after streaming started.
+    """
+    try:
+        selected_fields = parse_field_selection(fields, ResumeSchema)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Document errors are still reported with a status code: the text is extracted before streaming
+    try:
+        file_buffer = BytesIO(await file.read())
+        text = await extract_normalized_text_async(file_buffer, file.filename, container.config.max_document_chars)
+    except DocumentLimitExceeded as e:
+        raise HTTPException(status_code=422, detail=e.to_dict())
+    except Exception as e:
+        logger.error(f"Error reading resume file '{file.filename}': {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Error parsing resume: {str(e)}")
+
+    async def stream_fields():
+        try:
+            with request_deadline(resolve_request_timeout(request)):
+                async for event in resume_parser.stream_resume(text, selected_fields):
+                    yield ndjson_line(event)
+        except DeadlineExceeded as e:
+            yield ndjson_line({"error": "timeout", "detail": f"Resume parsing timed out: {str(e)}"})
+        except Exception as e:
+            logger.error(f"Error streaming resume file '{file.filename}': {str(e)}", exc_info=True)
+            yield ndjson_line({"error": "failed", "detail": f"Error parsing resume: {str(e)}"})
+
+    return StreamingResponse(stream_fields(), media_type="application/x-ndjson")
+
 ### **Job Description Parsing Endpoint**
 @app.post("/api/parse-job-description/")
-async def parse_job_description(file: UploadFile = File(...)):
+async def parse_job_description(
+    request: Request,
+    file: UploadFile = File(...),
+    fields: Optional[str] = Form(None)  # Comma-separated JobDescriptionSchema fields, all when empty
+):
     """
     Endpoint to parse a job description file (PDF or DOCX) and return structured JSON output.
+    Pass `fields` (e.g. "job_title,required_skills") to extract only those fields.
     """
+    try:
+        selected_fields = parse_field_selection(fields, JobDescriptionSchema)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     try:
         file_buffer = BytesIO(await file.read())
         filename = file.filename
-        result = await jd_parser.parse_job_description(file_buffer, filename)
+        result = await run_request_work(request, jd_parser.parse_job_description(file_buffer, filename, selected_fields))
         return result
+    except DocumentLimitExceeded as e:
+        raise HTTPException(status_code=422, detail=e.to_dict())
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=f"Job description parsing timed out: {str(e)}")
+    except ClientDisconnected as e:
+        raise HTTPException(status_code=499, detail=str(e))
     except Exception as e:
         logger.error(f"Error parsing job description file '{file.filename}': {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Error parsing job description: {str(e)}")
 
 ### **Job Description Enhancement Endpoint**
 @app.post("/api/job-description-enhance/")
-async def job_description_enhance(file: UploadFile = File(...)):
+async def job_description_enhance(
+    request: Request,
+    file: UploadFile = File(...),
+    embedding_format: str = Query("list")  # "list", "base64" (float32) or "omit" for vectorized_jd
+):
     """
     Endpoint to enhance a job description by extracting and structuring details, 
     improving clarity, and generating sample candidate profiles.
+    Pass `embedding_format=base64` or `embedding_format=omit` to shrink the `vectorized_jd` payload.
     """
+    try:
+        embedding_format = validate_embedding_format(embedding_format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     try:
         file_buffer = BytesIO(await file.read())
         filename = file.filename
-        result = await job_description_enhancer.enhance_job_description(file_buffer, filename)
-        return result
+        result = await run_request_work(request, job_description_enhancer.enhance_job_description(file_buffer, filename))
+        return apply_embedding_format(result, "vectorized_jd", embedding_format)
+    except DocumentLimitExceeded as e:
+        raise HTTPException(status_code=422, detail=e.to_dict())
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=f"Job description enhancement timed out: {str(e)}")
+    except ClientDisconnected as e:
+        raise HTTPException(status_code=499, detail=str(e))
     except Exception as e:
         logger.error(f"Error enhancing job description '{file.filename}': {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Error enhancing job description: {str(e)}")
@@ -91,6 +306,7 @@ async def job_description_enhance(file: UploadFile = File(...)):
 ### **Resume Scoring Endpoint**
 @app.post("/api/score-resumes/")
 async def score_resumes(
+    request: Request,
     files: List[UploadFile] = File(...),
     user_input: str = Form("")  # Capture additional user input from frontend
 ):
@@ -104,12 +320,207 @@ async def score_resumes(
 
         resume_files = [BytesIO(await file.read()) for file in files]
         filenames = [file.filename for file in files]
-        result = await resume_scoring_service.process_bulk_resumes(resume_files, filenames, user_input)
+        result = await run_request_work(request, resume_scoring_service.process_bulk_resumes(resume_files, filenames, user_input))
         return result
+    except DocumentLimitExceeded as e:
+        raise HTTPException(status_code=422, detail=e.to_dict())
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=f"Resume scoring timed out: {str(e)}")
+    except ClientDisconnected as e:
+        raise HTTPException(status_code=499, detail=str(e))
     except Exception as e:
         logger.error(f"Error scoring resumes: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Error scoring resumes: {str(e)}")
 
+### **Matrix Scoring Endpoint**
+@app.post("/api/score-matrix/")
+async def score_matrix(
+    request: Request,
+    jd_files: List[UploadFile] = File(...),
+    resume_files: List[UploadFile] = File(...),
+    user_input: str = Form(""),
+    top_k: Optional[int] = Form(None)  # Resumes GPT-scored per JD, MATRIX_TOP_K when empty
+):
+    """
+    Endpoint to match a pool of resumes against several job descriptions in one request.
+    Each JD is enhanced and each resume extracted once; only each JD's top_k resumes by embedding
+    similarity are GPT-scored. The uploaded JDs do not replace the current enhanced JD.
+    """
+    top_k = container.config.matrix_top_k if top_k is None else top_k
+    if top_k < 0:
+        raise HTTPException(status_code=400, detail="top_k must not be negative.")
+
+    try:
+        jd_buffers = [BytesIO(await file.read()) for file in jd_files]
+        resume_buffers = [BytesIO(await file.read()) for file in resume_files]
+        return await run_request_work(request, resume_scoring_service.process_resume_matrix(
+            jd_buffers, [file.filename for file in jd_files],
+            resume_buffers, [file.filename for file in resume_files],
+            user_input, top_k
+        ))
+    except DocumentLimitExceeded as e:
+        raise HTTPException(status_code=422, detail=e.to_dict())
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=f"Matrix scoring timed out: {str(e)}")
+    except ClientDisconnected as e:
+        raise HTTPException(status_code=499, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error in matrix scoring: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Error in matrix scoring: {str(e)}")
+
+def archive_limits() -> ArchiveLimits:
+    config = container.config
+    return ArchiveLimits(
+        max_entries=config.zip_max_entries,
+        max_entry_bytes=config.zip_max_entry_bytes,
+        max_total_bytes=config.zip_max_total_bytes,
+        max_compression_ratio=config.zip_max_compression_ratio,
+    )
+
+async def stream_archive_results(request: Request, archive, process_entry):
+    """
+    Feeds the archive's documents one at a time to process_entry and streams one NDJSON line per entry:
+    {"filename", "status": "ok", "result"}, {"filename", "status": "skipped"|"error", "detail"}.
+    Stops with a final {"status": "aborted"} line when the deadline passes or an archive limit is hit.
+    """
+    deadline = time.monotonic() + resolve_request_timeout(request)
+    try:
+        for entry in iter_archive_documents(archive, SUPPORTED_EXTENSIONS, archive_limits()):
+            if entry.skipped_reason:
+                yield ndjson_line({"filename": entry.filename, "status": "skipped", "detail": entry.skipped_reason})
+                continue
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                yield ndjson_line({"status": "aborted", "detail": "Request deadline exceeded."})
+                return
+            if await request.is_disconnected():
+                logger.warning(f"Client disconnected from {request.url.path}, stopped reading the archive.")
+                return
+            try:
+                with request_deadline(remaining):
+                    result = await process_entry(entry)
+                yield ndjson_line({"filename": entry.filename, "status": "ok", "result": result})
+            except DocumentLimitExceeded as e:
+                yield ndjson_line({"filename": entry.filename, "status": "error", **e.to_dict()})
+            except DeadlineExceeded as e:
+                yield ndjson_line({"filename": entry.filename, "status": "error", "detail": f"Timed out: {str(e)}"})
+            except Exception as e:
+                logger.error(f"Error processing archive entry '{entry.filename}': {str(e)}", exc_info=True)
+                yield ndjson_line({"filename": entry.filename, "status": "error", "detail": str(e)})
+    except ArchiveError as e:
+        yield ndjson_line({"status": "aborted", "detail": str(e)})
+    finally:
+        archive.close()
+
+### **Bulk Resume Parsing Endpoint (ZIP)**
+@app.post("/api/parse-resumes-zip/")
+async def parse_resumes_zip(
+    request: Request,
+    file: UploadFile = File(...),
+    fields: Optional[str] = Form(None)  # Comma-separated ResumeSchema fields, all when empty
+):
+    """
+    Endpoint to parse every resume in a ZIP archive. Results are streamed as NDJSON, one line per entry,
+    while the archive is decompressed one member at a time.
+    """
+    try:
+        selected_fields = parse_field_selection(fields, ResumeSchema)
+        # The upload is spooled by Starlette; the archive is read from it in place, never extracted
+        archive = open_zip(file.file)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async def process_entry(entry):
+        return await resume_parser.parse_resume(entry.content, entry.filename, selected_fields)
+
+    return StreamingResponse(stream_archive_results(request, archive, process_entry), media_type="application/x-ndjson")
+
+### **Bulk Resume Scoring Endpoint (ZIP)**
+@app.post("/api/score-resumes-zip/")
+async def score_resumes_zip(
+    request: Request,
+    file: UploadFile = File(...),
+    user_input: str = Form("")
+):
+    """
+    Endpoint to score every resume in a ZIP archive against the enhanced job description.
+    Results are streamed as NDJSON, one line per entry.
+    """
+    try:
+        batch = await resume_scoring_service.prepare_scoring_batch(user_input)
+        archive = open_zip(file.file)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async def process_entry(entry):
+        return await resume_scoring_service.score_resume_file(entry.content, entry.filename, batch)
+
+    return StreamingResponse(stream_archive_results(request, archive, process_entry), media_type="application/x-ndjson")
+
+### **Prompt Cache Statistics Endpoint**
+@app.get("/api/prompt-cache-stats/")
+async def prompt_cache_stats():
+    """
+    Returns the provider prompt-cache hit rate per pipeline stage and the active prompt template versions.
+    """
+    return {
+        "prompt_cache": container.gpt_service.get_prompt_cache_stats(),
+        "prompt_templates": list_prompts()
+    }
+
+### **Admission Statistics Endpoint**
+@app.get("/api/admission-stats/")
+async def admission_stats():
+    """
+    Returns in-flight, queued and rejected requests per priority class, and how the GPT call slots are shared.
+    """
+    return {
+        "requests": admission_controller.stats(),
+        "gpt": container.gpt_service.concurrency.stats()
+    }
+
+### **Admin: Profiling Endpoints**
+@app.get("/api/admin/profiles/", dependencies=[Depends(require_admin)])
+async def list_request_profiles():
+    return {"profiles": list(request_profiles)}
+
+@app.get("/api/admin/profiles/{profile_id}", dependencies=[Depends(require_admin)], response_class=PlainTextResponse)
+async def get_request_profile(profile_id: str):
+    if profile_id not in request_profiles:
+        raise HTTPException(status_code=404, detail="Profile not found.")
+    return request_profiles[profile_id]
+
+@app.post("/api/admin/profile/sample", dependencies=[Depends(require_admin)])
+async def sample_profile(seconds: float = Query(10.0, gt=0, le=120), interval_ms: float = Query(5.0, ge=1, le=1000)):
+    """
+    Samples the event loop thread's stack for `seconds` while the worker keeps serving traffic.
+    """
+    loop_thread_id = threading.get_ident()
+    return await run_in_threadpool(sample_thread, loop_thread_id, seconds, interval_ms / 1000)
+
+@app.post("/api/admin/tracemalloc/start", dependencies=[Depends(require_admin)])
+async def start_tracemalloc(frames: int = Query(10, ge=1, le=50)):
+    """
+    Starts tracemalloc and per-stage allocation tracking (adds noticeable overhead while on).
+    """
+    stage_memory.reset()
+    stage_memory.start(frames)
+    return stage_memory.report()
+
+@app.post("/api/admin/tracemalloc/stop", dependencies=[Depends(require_admin)])
+async def stop_tracemalloc():
+    report = stage_memory.report()
+    stage_memory.stop()
+    return report
+
+@app.get("/api/admin/tracemalloc/", dependencies=[Depends(require_admin)])
+async def tracemalloc_report(limit: int = Query(25, ge=1, le=200)):
+    return dict(stage_memory.report(), top_allocations=top_allocations(limit))
+
+@app.get("/api/admin/loop-lag/", dependencies=[Depends(require_admin)])
+async def loop_lag():
+    return loop_monitor.stats()
+
 if __name__ == "__main__":
     import uvicorn
     logger.info("Starting Resume and JD Processing API")
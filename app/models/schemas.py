@@ -1,5 +1,7 @@
-from pydantic import BaseModel, Field
-from typing import List, Dict, Any, Optional
+import hashlib
+from functools import lru_cache
+from pydantic import BaseModel, Field, create_model
+from typing import List, Dict, Any, Optional, Tuple, Type
 
 
 # 📌 **Duration Schema (for Work & Education Duration)**
@@ -109,6 +111,13 @@ class ResumeScoringSchema(BaseModel):
     recommendations: str = Field(..., description="Improvement recommendations for the candidate")
 
 
+# 📌 **Packed Resume Scoring Schema (several resumes scored in one call)**
+class PackedResumeScoringItem(ResumeScoringSchema):
+    resume_id: str = Field(..., description="Id of the scored resume, exactly as given in the prompt")
+
+class PackedResumeScoringSchema(BaseModel):
+    scored_resumes: List[PackedResumeScoringItem] = Field(..., description="One scoring per resume, in the order the resumes were given")
+
 # 📌 **Resume Scoring Response (for Bulk Processing)**
 class ResumeScoringResponse(BaseModel):
     scored_resumes: List[ResumeScoringSchema] = Field(..., description="List of scored resumes with comparison results")
@@ -120,3 +129,39 @@ class ResumeIndustrySchema(BaseModel):
 # 📌 **Industry Classification Schema for Job Description**
 class JobDescriptionIndustrySchema(BaseModel):
     industry: str = Field(..., description="The classified industry of the job description")
+
+
+# 📌 **Field Selection (Partial Extraction)**
+def parse_field_selection(raw_fields: Optional[str], base_schema: Type[BaseModel]) -> Optional[Tuple[str, ...]]:
+    """
+    Parses a comma-separated field list into a normalized tuple of top-level schema fields.
+    Returns None when no selection is given, meaning the full schema is requested.
+    Raises ValueError for fields the schema does not define.
+    """
+    if not raw_fields or not raw_fields.strip():
+        return None
+    requested = {f.strip() for f in raw_fields.split(",") if f.strip()}
+    unknown = requested - set(base_schema.model_fields)
+    if unknown:
+        raise ValueError(
+            f"Unknown field(s) for {base_schema.__name__}: {', '.join(sorted(unknown))}. "
+            f"Allowed: {', '.join(base_schema.model_fields)}"
+        )
+    # Keep the schema's declaration order so equal selections share one cached model
+    return tuple(name for name in base_schema.model_fields if name in requested)
+
+
+@lru_cache(maxsize=128)
+def build_partial_schema(base_schema: Type[BaseModel], fields: Tuple[str, ...]) -> Type[BaseModel]:
+    """
+    Builds (and caches per field set) a reduced response model that only contains the given
+    top-level fields of base_schema, so GPT generates only what the caller asked for.
+    """
+    definitions = {
+        name: (base_schema.model_fields[name].annotation, base_schema.model_fields[name])
+        for name in fields
+    }
+    # Structured-output schema names are limited to 64 characters, so use a short digest
+    digest = hashlib.md5(",".join(fields).encode("utf-8")).hexdigest()[:8]
+    model_name = f"{base_schema.__name__}Partial_{digest}"
+    return create_model(model_name, **definitions)
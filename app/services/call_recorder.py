@@ -0,0 +1,157 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from datetime import date
+from typing import Any, Dict, List, Optional
+import numpy as np
+import orjson
+from app.utils.logger import Logger
+
+logger = Logger(__name__).get_logger()
+
+RECORD_MODE_OFF = "off"
+RECORD_MODE_RECORD = "record"                  # every call goes to OpenAI and is stored
+RECORD_MODE_REPLAY = "replay"                  # calls are answered from the store only, a miss is an error
+RECORD_MODE_RECORD_MISSING = "record_missing"  # stored calls are replayed, the others recorded
+RECORD_MODES = (RECORD_MODE_OFF, RECORD_MODE_RECORD, RECORD_MODE_REPLAY, RECORD_MODE_RECORD_MISSING)
+
+# How a recording's payload is stored
+_ENCODING_JSON = "json"
+_ENCODING_FLOAT32 = "<f4"
+_ENCODING_FLOAT64 = "<f8"
+
+
+class RecordingNotFound(LookupError):
+    """
+    Raised in replay mode for a call that was never recorded (different prompt, model or schema).
+    """
+
+
+class CallRecorder:
+    """
+    On-disk store of GPT and embedding calls for deterministic, offline runs of the real pipeline.
+    Each call is keyed by a fingerprint of everything that determines its answer (kind, model,
+    messages and the response schema, or the embedded text). A recording holds the outcome (the
+    parsed payload, a refusal or a schema failure), the token usage and the measured latency.
+    Payloads are zlib-compressed JSON; embeddings are stored as raw float32 (float64 when float32
+    would change the values) in one SQLite file.
+    On replay, latency_scale > 0 sleeps for that fraction of the recorded latency.
+    The store also keeps the date of its first recording: prompts that mention today's date use it
+    (see today), so a recording still replays on a later day. `today` overrides it.
+    """
+    def __init__(self, path: str, mode: str = RECORD_MODE_REPLAY, latency_scale: float = 0.0, busy_timeout: float = 10.0,
+                 today: Optional[str] = None):
+        if mode not in RECORD_MODES or mode == RECORD_MODE_OFF:
+            raise ValueError(f"Unknown record mode '{mode}', expected one of: {', '.join(RECORD_MODES[1:])}.")
+        if mode == RECORD_MODE_REPLAY and not os.path.exists(path):
+            raise ValueError(f"Recording store '{path}' not found, record it first (GPT_RECORD_MODE=record).")
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self.stats = {"replayed": 0, "recorded": 0, "missing": 0}
+        self._schema_hashes: Dict[Any, str] = {}
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._connection = sqlite3.connect(path, timeout=busy_timeout, isolation_level=None, check_same_thread=False)
+        with self._lock:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS recordings (
+                    fingerprint TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    stage TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    latency_ms REAL NOT NULL,
+                    usage TEXT,
+                    encoding TEXT NOT NULL,
+                    payload BLOB NOT NULL,
+                    recorded_at REAL NOT NULL
+                )
+                """
+            )
+            self._connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            # The first run to open the store fixes its date, later runs read it back
+            self._connection.execute(
+                "INSERT OR IGNORE INTO meta (key, value) VALUES ('today', ?)", (today or date.today().isoformat(),)
+            )
+            stored = self._connection.execute("SELECT value FROM meta WHERE key = 'today'").fetchone()[0]
+        self.today = today or stored
+        logger.info(f"Recording GPT calls in '{path}' ({mode}, prompts dated {self.today}).")
+
+    @property
+    def replays(self) -> bool:
+        return self.mode in (RECORD_MODE_REPLAY, RECORD_MODE_RECORD_MISSING)
+
+    @property
+    def records(self) -> bool:
+        return self.mode in (RECORD_MODE_RECORD, RECORD_MODE_RECORD_MISSING)
+
+    def _schema_hash(self, response_schema: Any) -> str:
+        # A changed schema must not replay answers shaped for the old one
+        if response_schema not in self._schema_hashes:
+            schema = orjson.dumps(response_schema.model_json_schema(), option=orjson.OPT_SORT_KEYS)
+            self._schema_hashes[response_schema] = f"{response_schema.__name__}:{hashlib.sha256(schema).hexdigest()[:16]}"
+        return self._schema_hashes[response_schema]
+
+    def completion_fingerprint(self, model: str, messages: List[Dict[str, str]], response_schema: Any) -> str:
+        request = {"kind": "completion", "model": model, "messages": messages, "schema": self._schema_hash(response_schema)}
+        return hashlib.sha256(orjson.dumps(request, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+    @staticmethod
+    def embedding_fingerprint(model: str, text: str) -> str:
+        request = {"kind": "embedding", "model": model, "input": text}
+        return hashlib.sha256(orjson.dumps(request, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+    def load(self, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns the recording ({"outcome", "usage", "latency_ms"}) for a fingerprint, or None.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT latency_ms, usage, encoding, payload FROM recordings WHERE fingerprint = ?", (fingerprint,)
+            ).fetchone()
+        if row is None:
+            self.stats["missing"] += 1
+            return None
+        latency_ms, usage, encoding, payload = row
+        payload = zlib.decompress(payload)
+        if encoding == _ENCODING_JSON:
+            outcome = orjson.loads(payload)
+        else:
+            outcome = {"embedding": np.frombuffer(payload, dtype=encoding).astype(float).tolist()}
+        self.stats["replayed"] += 1
+        return {"outcome": outcome, "usage": orjson.loads(usage) if usage else None, "latency_ms": latency_ms}
+
+    def save(self, fingerprint: str, kind: str, stage: str, model: str, outcome: Dict[str, Any], usage: Optional[Dict[str, int]], latency_ms: float) -> None:
+        """
+        Stores (or replaces) the recording for a fingerprint.
+        """
+        if "embedding" in outcome:
+            vector = np.asarray(outcome["embedding"], dtype=np.float64)
+            # OpenAI returns float32 values, which store exactly in half the space
+            encoding = _ENCODING_FLOAT32 if np.array_equal(vector.astype(np.float32), vector) else _ENCODING_FLOAT64
+            payload = vector.astype(encoding).tobytes()
+        else:
+            encoding, payload = _ENCODING_JSON, orjson.dumps(outcome)
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO recordings (fingerprint, kind, stage, model, latency_ms, usage, encoding, payload, recorded_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (fingerprint, kind, stage, model, round(latency_ms, 1), orjson.dumps(usage).decode() if usage else None,
+                 encoding, zlib.compress(payload, 6), time.time())
+            )
+        self.stats["recorded"] += 1
+
+    def replay_delay(self, recording: Dict[str, Any]) -> float:
+        """
+        Seconds to wait before answering a replayed call.
+        """
+        return recording["latency_ms"] / 1000 * self.latency_scale
+
+    def count(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM recordings").fetchone()[0]
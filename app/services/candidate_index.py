@@ -0,0 +1,177 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+from array import array
+from typing import Any, Dict, Iterable, List, Optional
+import numpy as np
+from app.utils.logger import Logger
+
+logger = Logger(__name__).get_logger()
+
+_EMPTY_POSTING = np.empty(0, dtype=np.uint32)
+_EMPTY_POSTING.setflags(write=False)
+
+class CandidateIndex:
+    """
+    Inverted index of scored candidates, replacing the Neo4j experience/skill/subskill graph lookups.
+    Each candidate gets an integer id; every experience bucket, skill and subskill keeps a posting list
+    of ids (array of uint32, ascending), so "candidates in this bucket with this skill and subskill" is
+    an intersection of sorted integer arrays.
+    With a sqlite_path the candidates are also stored in SQLite: the index is rebuilt from it on startup
+    and picks up candidates added by other worker processes on refresh().
+    Async code uses add_async() and refresh_async(), which run the SQLite statements in a thread: a write
+    lock held by another worker can then delay the caller, never the event loop. SQLite is accessed under
+    its own lock, so lookups only ever wait for in-memory updates.
+    """
+    def __init__(self, sqlite_path: Optional[str] = None, max_matches: int = 5, busy_timeout: float = 10.0):
+        self.max_matches = max_matches
+        self._names: Dict[int, str] = {}
+        self._ids: Dict[str, int] = {}  # resume hash -> candidate id
+        self._postings: Dict[str, array] = {}
+        # Read-only NumPy copies of the postings for lookups, dropped when a posting grows
+        self._snapshots: Dict[str, np.ndarray] = {}
+        self._lock = threading.Lock()     # in-memory index
+        self._db_lock = threading.Lock()  # SQLite connection, and syncs from it
+        self._last_id = 0
+        self._connection = None
+        if sqlite_path:
+            os.makedirs(os.path.dirname(os.path.abspath(sqlite_path)), exist_ok=True)
+            self._connection = sqlite3.connect(sqlite_path, timeout=busy_timeout, isolation_level=None, check_same_thread=False)
+            with self._db_lock:
+                self._connection.execute("PRAGMA journal_mode=WAL")
+                self._connection.execute("PRAGMA synchronous=NORMAL")
+                self._connection.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS candidates (
+                        id INTEGER PRIMARY KEY,
+                        resume_hash TEXT NOT NULL UNIQUE,
+                        name TEXT NOT NULL,
+                        keys TEXT NOT NULL
+                    )
+                    """
+                )
+                self._sync()
+            logger.info(f"Candidate index loaded {len(self._names)} candidates from '{sqlite_path}'.")
+
+    @staticmethod
+    def _keys(experience_bucket: str, skills: Iterable[str], subskills: Iterable[str]) -> List[str]:
+        keys = {f"bucket:{experience_bucket}"}
+        keys.update(f"skill:{skill.lower()}" for skill in skills)
+        keys.update(f"subskill:{subskill.lower()}" for subskill in subskills)
+        return sorted(keys)
+
+    def _index(self, candidate_id: int, resume_hash: str, name: str, keys: List[str]) -> None:
+        # Ids only ever grow, so appending keeps every posting list sorted
+        self._names[candidate_id] = name
+        self._ids[resume_hash] = candidate_id
+        for key in keys:
+            self._postings.setdefault(key, array("I")).append(candidate_id)
+            self._snapshots.pop(key, None)
+        self._last_id = max(self._last_id, candidate_id)
+
+    def _sync(self) -> None:
+        # Loads candidates written by any process since the last sync, in id order (called under _db_lock)
+        rows = self._connection.execute(
+            "SELECT id, resume_hash, name, keys FROM candidates WHERE id > ? ORDER BY id", (self._last_id,)
+        ).fetchall()
+        with self._lock:
+            for candidate_id, resume_hash, name, keys in rows:
+                self._index(candidate_id, resume_hash, name, json.loads(keys))
+
+    def add(self, resume_hash: str, name: str, experience_bucket: str, skills: Iterable[str], subskills: Iterable[str]) -> None:
+        """
+        Indexes a candidate under its experience bucket, skills and subskills. A resume already indexed is left as is.
+        """
+        keys = self._keys(experience_bucket, skills, subskills)
+        with self._lock:
+            if resume_hash in self._ids:
+                return
+            if self._connection is None:
+                self._index(self._last_id + 1, resume_hash, name, keys)
+                return
+        with self._db_lock:
+            self._connection.execute(
+                "INSERT OR IGNORE INTO candidates (resume_hash, name, keys) VALUES (?, ?, ?)",
+                (resume_hash, name, json.dumps(keys))
+            )
+            self._sync()
+
+    def refresh(self) -> None:
+        """
+        Picks up candidates added by other worker processes (SQLite only). Call once before a series of lookups.
+        """
+        if self._connection is None:
+            return
+        with self._db_lock:
+            self._sync()
+
+    async def add_async(self, resume_hash: str, name: str, experience_bucket: str, skills: Iterable[str], subskills: Iterable[str]) -> None:
+        if self._connection is None:
+            self.add(resume_hash, name, experience_bucket, skills, subskills)
+            return
+        await asyncio.to_thread(self.add, resume_hash, name, experience_bucket, skills, subskills)
+
+    async def refresh_async(self) -> None:
+        if self._connection is not None:
+            await asyncio.to_thread(self.refresh)
+
+    def _posting(self, key: str) -> np.ndarray:
+        # Called under _lock. A posting is copied once per change, not once per lookup: an array can't be
+        # appended to while a NumPy view of its buffer is alive
+        snapshot = self._snapshots.get(key)
+        if snapshot is None:
+            posting = self._postings.get(key)
+            if not posting:
+                return _EMPTY_POSTING
+            snapshot = np.frombuffer(posting, dtype=np.uint32).copy()
+            snapshot.setflags(write=False)
+            self._snapshots[key] = snapshot
+        return snapshot
+
+    def _names_for(self, ids: np.ndarray, exclude_hash: Optional[str]) -> List[str]:
+        excluded = self._ids.get(exclude_hash) if exclude_hash else None
+        # Most recently indexed first
+        names = [self._names[int(candidate_id)] for candidate_id in ids[::-1] if candidate_id != excluded]
+        return names[:self.max_matches]
+
+    def similar_candidates(self, experience_bucket: str, skill: Optional[str], subskill: Optional[str] = None, exclude_hash: Optional[str] = None) -> List[str]:
+        """
+        Names of candidates in the same experience bucket with the skill and the subskill (each when given).
+        """
+        with self._lock:
+            ids = self._posting(f"bucket:{experience_bucket}")
+            if skill is not None:
+                ids = np.intersect1d(ids, self._posting(f"skill:{skill.lower()}"), assume_unique=True)
+            if subskill is not None:
+                ids = np.intersect1d(ids, self._posting(f"subskill:{subskill.lower()}"), assume_unique=True)
+            return self._names_for(ids, exclude_hash)
+
+    def stored_candidates(self, experience_bucket: str, skills: Iterable[str], exclude_hash: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Candidates in the same experience bucket sharing the most of the given skills, with the shared count.
+        """
+        with self._lock:
+            bucket = self._posting(f"bucket:{experience_bucket}")
+            postings = [self._posting(f"skill:{skill.lower()}") for skill in set(skills)]
+            if not bucket.size or not postings:
+                return []
+            ids, counts = np.unique(np.concatenate(postings), return_counts=True)
+            in_bucket = np.isin(ids, bucket, assume_unique=True)
+            ids, counts = ids[in_bucket], counts[in_bucket]
+            excluded = self._ids.get(exclude_hash) if exclude_hash else None
+            # Most shared skills first, most recent first among equals
+            order = np.lexsort((-ids.astype(np.int64), -counts))
+            matches = []
+            for position in order:
+                if ids[position] == excluded:
+                    continue
+                matches.append({"candidate_name": self._names[int(ids[position])], "shared_skills": int(counts[position])})
+                if len(matches) == self.max_matches:
+                    break
+            return matches
+
+    def count(self) -> int:
+        with self._lock:
+            return len(self._names)
@@ -0,0 +1,126 @@
+import asyncio
+import re
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+from pydantic import BaseModel
+from app.utils.section_chunker import OVERVIEW, chunk_sections, split_sections
+from app.utils.logger import Logger
+
+logger = Logger(__name__).get_logger()
+
+_CONTACT_LINE_RE = re.compile(r"(https?://|www\.|mailto:|\S+@\S+\.\w+)", re.IGNORECASE)
+
+# One extraction call: the chunk text and the schema fields to extract from it
+ChunkPlan = List[Tuple[str, Tuple[str, ...]]]
+
+
+def plan_chunks(
+    text: str,
+    headings: Dict[str, List[str]],
+    section_fields: Dict[str, Tuple[str, ...]],
+    overview_fields: Tuple[str, ...],
+    selected: Tuple[str, ...],
+    schema: Type[BaseModel],
+    max_chunk_chars: int
+) -> Optional[ChunkPlan]:
+    """
+    Splits a long document at its section headings and assigns each chunk the selected fields its
+    section kind provides (e.g. experience chunks -> "experiences"). The overview chunk (text before the
+    first heading, plus every contact/link line of the document) gets overview_fields and any selected field
+    no section provides. Returns None when fewer than two sections are recognized, i.e. chunking would not help.
+    """
+    sections = split_sections(text, headings)
+    if sum(1 for section in sections if section.kind != OVERVIEW) < 2:
+        return None
+
+    covered = {field for section in sections for field in section_fields.get(section.kind, ())}
+    order = list(schema.model_fields)
+    plan: ChunkPlan = []
+
+    overview_text = "\n\n".join(section.text for section in sections if section.kind == OVERVIEW)
+    contact_lines = [line for line in text.split("\n") if _CONTACT_LINE_RE.search(line) and line not in overview_text]
+    overview_text = "\n".join(filter(None, [overview_text[:max_chunk_chars], *contact_lines]))
+    overview_selected = tuple(
+        field for field in order
+        if field in selected and (field in overview_fields or field not in covered)
+    )
+    if overview_selected:
+        plan.append((overview_text, overview_selected))
+
+    for chunk in chunk_sections([section for section in sections if section.kind != OVERVIEW], max_chunk_chars):
+        fields = tuple(field for field in order if field in selected and field in section_fields.get(chunk.kind, ()))
+        if fields:
+            plan.append((chunk.text, fields))
+    return plan
+
+
+async def extract_chunks(
+    plan: ChunkPlan,
+    extract: Callable[[str, Tuple[str, ...]], Any]
+) -> List[Dict[str, Any]]:
+    """
+    Runs one extraction per chunk concurrently, so latency follows the slowest chunk rather than
+    the document length. extract(text, fields) must return the partial result dict.
+    """
+    logger.info(f"Extracting {len(plan)} chunks in parallel (largest {max(len(text) for text, _ in plan)} chars).")
+    return list(await asyncio.gather(*[extract(text, fields) for text, fields in plan]))
+
+
+def _identity(item: Any, keys: Tuple[str, ...]) -> Any:
+    if not isinstance(item, dict):
+        return " ".join(str(item).lower().split())
+    return tuple(" ".join(str(item.get(key) or "").lower().split()) for key in keys)
+
+
+def merge_unique(items: List[Any], keys: Tuple[str, ...]) -> List[Any]:
+    """
+    Concatenates list entries from several chunks, keeping the first of entries with the same identity.
+    """
+    seen, merged = set(), []
+    for item in items:
+        identity = _identity(item, keys)
+        if identity in seen:
+            continue
+        seen.add(identity)
+        merged.append(item)
+    return merged
+
+
+def merge_partials(
+    partials: List[Dict[str, Any]],
+    list_identities: Dict[str, Tuple[str, ...]],
+    merge_custom: Optional[Dict[str, Callable[[List[Any]], Any]]] = None
+) -> Dict[str, Any]:
+    """
+    Reduces per-chunk results into one: list fields are concatenated and de-duplicated by the
+    identity keys in list_identities, fields in merge_custom use their own reducer, and every other
+    field takes the first non-empty value (chunks are in document order, overview first).
+    """
+    merge_custom = merge_custom or {}
+    values: Dict[str, List[Any]] = {}
+    for partial in partials:
+        for field, value in partial.items():
+            values.setdefault(field, []).append(value)
+
+    merged = {}
+    for field, candidates in values.items():
+        present = [value for value in candidates if value not in (None, "", [], {})]
+        if field in merge_custom:
+            merged[field] = merge_custom[field](present)
+        elif field in list_identities:
+            merged[field] = merge_unique([item for value in present for item in value], list_identities[field])
+        else:
+            merged[field] = present[0] if present else candidates[0]
+    return merged
+
+
+def merge_skill_sets(values: List[Dict[str, Any]]) -> Dict[str, List[str]]:
+    """
+    Unions primary and secondary skills across chunks; a skill primary anywhere is not repeated as secondary.
+    """
+    primary = merge_unique([skill for value in values for skill in value.get("primary_skills") or []], ())
+    primary_keys = {_identity(skill, ()) for skill in primary}
+    secondary = merge_unique(
+        [skill for value in values for skill in value.get("secondary_skills") or [] if _identity(skill, ()) not in primary_keys],
+        ()
+    )
+    return {"primary_skills": primary, "secondary_skills": secondary}
@@ -1,10 +1,58 @@
 import os
 from dotenv import load_dotenv
 from app.utils.logger import Logger
+from app.utils.admission import PRIORITY_INTERACTIVE, PRIORITY_BULK
 
 # Initialize Logger
 logger = Logger(__name__).get_logger()
 
+# .env only needs to be read once per process
+_dotenv_loaded = False
+
+# Pipeline stages that can be routed to their own model
+STAGE_RESUME_EXTRACTION = "resume_extraction"
+STAGE_JD_EXTRACTION = "jd_extraction"
+STAGE_JD_ENHANCEMENT = "jd_enhancement"
+STAGE_CANDIDATE_GENERATION = "candidate_generation"
+STAGE_RESUME_SCORING = "resume_scoring"
+STAGE_EMBEDDING = "embedding"
+
+# What embeddings are used for; each purpose can use its own backend (EMBEDDING_BACKEND_<PURPOSE>)
+EMBEDDING_PURPOSE_SIMILARITY = "similarity"
+EMBEDDING_PURPOSES = (EMBEDDING_PURPOSE_SIMILARITY,)
+
+# Default per-stage timeout in seconds, overridable with STAGE_TIMEOUT_<STAGE>
+DEFAULT_STAGE_TIMEOUTS = {
+    STAGE_RESUME_EXTRACTION: 60.0,
+    STAGE_JD_EXTRACTION: 60.0,
+    STAGE_JD_ENHANCEMENT: 90.0,
+    STAGE_CANDIDATE_GENERATION: 120.0,
+    STAGE_RESUME_SCORING: 60.0,
+    STAGE_EMBEDDING: 15.0,
+}
+
+# Default model per stage, overridable with MODEL_<STAGE> (e.g. MODEL_RESUME_SCORING=gpt-4o)
+DEFAULT_STAGE_MODELS = {
+    STAGE_RESUME_EXTRACTION: "gpt-4o-mini",
+    STAGE_JD_EXTRACTION: "gpt-4o-mini",
+    STAGE_JD_ENHANCEMENT: "gpt-4o-mini",
+    STAGE_CANDIDATE_GENERATION: "gpt-4o-mini",
+    STAGE_RESUME_SCORING: "gpt-4o-mini",
+    STAGE_EMBEDDING: "text-embedding-ada-002",
+}
+
+# Default request admission per priority class, overridable with ADMISSION_<CLASS>_MAX_CONCURRENT
+# and ADMISSION_<CLASS>_MAX_QUEUE
+DEFAULT_ADMISSION_LIMITS = {
+    PRIORITY_INTERACTIVE: {"max_concurrent": 32, "max_queue": 128},
+    PRIORITY_BULK: {"max_concurrent": 4, "max_queue": 16},
+}
+
+# Share of contended GPT slots per class (GPT_WEIGHT_<CLASS>) and the most of the pool a class may
+# hold at once (GPT_MAX_SHARE_<CLASS>)
+DEFAULT_GPT_WEIGHTS = {PRIORITY_INTERACTIVE: 4.0, PRIORITY_BULK: 1.0}
+DEFAULT_GPT_MAX_SHARES = {PRIORITY_INTERACTIVE: 1.0, PRIORITY_BULK: 0.75}
+
 class ConfigService:
     """
     Configuration service to manage environment variables.
@@ -13,16 +61,148 @@ class ConfigService:
         """
         Loads environment variables from .env file.
         """
-        load_dotenv()  # Load .env variables into the environment
+        global _dotenv_loaded
+        if not _dotenv_loaded:
+            load_dotenv()  # Load .env variables into the environment
+            _dotenv_loaded = True
 
         # Retrieve necessary environment variables
         self.openai_api_key = os.getenv("OPENAI_API_KEY")
 
+        # Record/replay of GPT and embedding calls: "off", "record", "replay" (offline, no API key
+        # needed) or "record_missing". GPT_REPLAY_LATENCY_SCALE replays that fraction of the recorded latency
+        self.gpt_record_mode = os.getenv("GPT_RECORD_MODE", "off").lower()
+        self.gpt_record_path = os.getenv("GPT_RECORD_PATH", os.path.join(".state", "gpt_recordings.db"))
+        self.gpt_replay_latency_scale = float(os.getenv("GPT_REPLAY_LATENCY_SCALE", "0"))
+        # Date (YYYY-MM-DD) used in prompts while recording or replaying, by default the one stored with the recording
+        self.gpt_replay_today = os.getenv("GPT_REPLAY_TODAY") or None
+
         # Validate required configurations
-        if not self.openai_api_key:
+        if not self.openai_api_key and self.gpt_record_mode != "replay":
             logger.error("Missing OpenAI API Key in environment variables.")
             raise ValueError("OPENAI_API_KEY is required in the .env file.")
 
+        # Alternative API endpoint, e.g. the local stub in loadtest/openai_stub.py
+        self.openai_base_url = os.getenv("OPENAI_BASE_URL") or None
+
+        # Model routing: a model per stage, an optional larger-input tier per stage
+        # (MODEL_<STAGE>_LARGE, used above MODEL_LARGE_INPUT_CHARS) and an escalation
+        # model used when a structured response fails schema validation. Embeddings have no larger tier:
+        # vectors from different models can't be compared, and the embedding identity names one model.
+        self.stage_models = {
+            stage: os.getenv(f"MODEL_{stage.upper()}", default)
+            for stage, default in DEFAULT_STAGE_MODELS.items()
+        }
+        self.large_input_stage_models = {
+            stage: os.getenv(f"MODEL_{stage.upper()}_LARGE")
+            for stage in DEFAULT_STAGE_MODELS
+            if stage != STAGE_EMBEDDING and os.getenv(f"MODEL_{stage.upper()}_LARGE")
+        }
+        if os.getenv(f"MODEL_{STAGE_EMBEDDING.upper()}_LARGE"):
+            logger.warning(f"MODEL_{STAGE_EMBEDDING.upper()}_LARGE is ignored: all texts are embedded with MODEL_{STAGE_EMBEDDING.upper()}.")
+        self.large_input_chars = int(os.getenv("MODEL_LARGE_INPUT_CHARS", "24000"))
+        self.escalation_model = os.getenv("MODEL_ESCALATION", "gpt-4o")
+
+        # Deadlines: each stage has its own timeout, every request an overall deadline that
+        # clients can shorten (never extend beyond the maximum) with the X-Request-Timeout header
+        self.stage_timeouts = {
+            stage: float(os.getenv(f"STAGE_TIMEOUT_{stage.upper()}", default))
+            for stage, default in DEFAULT_STAGE_TIMEOUTS.items()
+        }
+        self.request_deadline_seconds = float(os.getenv("REQUEST_DEADLINE_SECONDS", "300"))
+        self.max_request_deadline_seconds = float(os.getenv("MAX_REQUEST_DEADLINE_SECONDS", "900"))
+
+        # Admission control: requests are classed by route (see ROUTE_PRIORITIES in main), each class has its
+        # own concurrency limit and bounded queue (503 + Retry-After when full or after the max wait), and
+        # GPT calls from all requests share GPT_MAX_CONCURRENCY slots by weight
+        self.admission_limits = {
+            priority: {
+                key: int(os.getenv(f"ADMISSION_{priority.upper()}_{key.upper()}", str(default)))
+                for key, default in limits.items()
+            }
+            for priority, limits in DEFAULT_ADMISSION_LIMITS.items()
+        }
+        self.admission_max_wait_seconds = float(os.getenv("ADMISSION_MAX_WAIT_SECONDS", "10"))
+        self.gpt_max_concurrency = int(os.getenv("GPT_MAX_CONCURRENCY", "16"))
+        self.gpt_weights = {
+            priority: float(os.getenv(f"GPT_WEIGHT_{priority.upper()}", str(default)))
+            for priority, default in DEFAULT_GPT_WEIGHTS.items()
+        }
+        self.gpt_max_shares = {
+            priority: float(os.getenv(f"GPT_MAX_SHARE_{priority.upper()}", str(default)))
+            for priority, default in DEFAULT_GPT_MAX_SHARES.items()
+        }
+
+        # Embedding backend per purpose: "openai" (API) or "local" (scikit-learn, in process).
+        # The local backend uses the model fitted with `python -m app.services.embedding_backends`
+        # when LOCAL_EMBEDDING_MODEL_PATH exists, hashing embeddings otherwise.
+        self.default_embedding_backend = os.getenv("EMBEDDING_BACKEND", "openai").lower()
+        self.embedding_backends = {
+            purpose: os.getenv(f"EMBEDDING_BACKEND_{purpose.upper()}", self.default_embedding_backend).lower()
+            for purpose in EMBEDDING_PURPOSES
+        }
+        self.local_embedding_model_path = os.getenv("LOCAL_EMBEDDING_MODEL_PATH") or None
+        self.local_embedding_dimensions = int(os.getenv("LOCAL_EMBEDDING_DIMENSIONS", "1024"))
+
+        # Upper bound on normalized document text sent to GPT
+        self.max_document_chars = int(os.getenv("MAX_DOCUMENT_CHARS", "40000"))
+
+        # Documents at least this long are split at their section headings and extracted chunk by
+        # chunk in parallel, each chunk at most CHUNK_MAX_CHARS
+        self.chunking_min_chars = int(os.getenv("CHUNKING_MIN_CHARS", "12000"))
+        self.chunk_max_chars = int(os.getenv("CHUNK_MAX_CHARS", "6000"))
+
+        # Shared state (enhanced JD, embeddings, cached extractions and scores): "memory" for a
+        # single worker, "sqlite" to share it between all uvicorn workers on the host
+        self.state_backend = os.getenv("STATE_BACKEND", "memory").lower()
+        self.state_sqlite_path = os.getenv("STATE_SQLITE_PATH", os.path.join(".state", "state.db"))
+        self.state_max_entries = int(os.getenv("STATE_MAX_ENTRIES", "2048"))
+
+        # Index of scored candidates by experience bucket and skills, used for the "similar candidates"
+        # scoring context: "memory", "sqlite" (persisted and shared between workers) or "off".
+        # Follows STATE_BACKEND by default
+        self.candidate_index = os.getenv("CANDIDATE_INDEX", self.state_backend).lower()
+        self.candidate_index_path = os.getenv("CANDIDATE_INDEX_PATH", os.path.join(".state", "candidates.db"))
+        self.candidate_index_max_matches = int(os.getenv("CANDIDATE_INDEX_MAX_MATCHES", "5"))
+
+        # Limits for ZIP uploads to the bulk endpoints; entries that exceed the size or compression
+        # ratio limits are skipped, exceeding the entry count or total size aborts the archive
+        self.zip_max_entries = int(os.getenv("ZIP_MAX_ENTRIES", "2000"))
+        self.zip_max_entry_bytes = int(os.getenv("ZIP_MAX_ENTRY_BYTES", str(10 * 1024 * 1024)))
+        self.zip_max_total_bytes = int(os.getenv("ZIP_MAX_TOTAL_BYTES", str(2 * 1024 * 1024 * 1024)))
+        self.zip_max_compression_ratio = float(os.getenv("ZIP_MAX_COMPRESSION_RATIO", "100"))
+
+        # Per-document parsing budgets (0 disables one). With PARSE_WORKERS > 0 documents are parsed in
+        # that many isolated worker processes, killed when they run past PARSE_MAX_SECONDS or PARSE_MAX_RSS_MB;
+        # with 0 they are parsed in-process and only the page, character and image limits apply
+        self.parse_max_pages = int(os.getenv("PARSE_MAX_PAGES", "200"))
+        self.parse_max_chars = int(os.getenv("PARSE_MAX_CHARS", "2000000"))
+        self.parse_max_image_megapixels = float(os.getenv("PARSE_MAX_IMAGE_MEGAPIXELS", "50"))
+        self.parse_max_seconds = float(os.getenv("PARSE_MAX_SECONDS", "30"))
+        self.parse_max_rss_mb = int(os.getenv("PARSE_MAX_RSS_MB", "1024"))
+        self.parse_workers = int(os.getenv("PARSE_WORKERS", "2"))
+
+        # Resumes whose estimated text similarity (MinHash Jaccard) reaches this are scored once; 0 disables
+        self.near_duplicate_threshold = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.85"))
+
+        # Matrix scoring (/api/score-matrix/): resumes GPT-scored per JD, the best by embedding similarity
+        self.matrix_top_k = int(os.getenv("MATRIX_TOP_K", "5"))
+
+        # Packed scoring: up to SCORING_PACK_SIZE resumes per scoring call (1 = one call per resume), so the
+        # shared JD/candidates context is sent once per pack. Packs are also bounded by the prompt size
+        # (SCORING_PACK_MAX_CHARS, by default the large-input routing threshold) and the expected output tokens
+        self.scoring_pack_size = int(os.getenv("SCORING_PACK_SIZE", "1"))
+        self.scoring_pack_max_chars = int(os.getenv("SCORING_PACK_MAX_CHARS", str(self.large_input_chars)))
+        self.scoring_pack_max_output_tokens = int(os.getenv("SCORING_PACK_MAX_OUTPUT_TOKENS", "12000"))
+
+        # Admin endpoints (/api/admin/...) are disabled unless a token is configured
+        self.admin_token = os.getenv("ADMIN_TOKEN") or None
+        # Log the loop thread's stack when the event loop is blocked longer than this; 0 disables the monitor
+        self.loop_lag_threshold_ms = float(os.getenv("LOOP_LAG_THRESHOLD_MS", "200"))
+
+        # Responses smaller than this are sent uncompressed
+        self.compression_min_bytes = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+
         logger.info("Configuration loaded successfully.")
 
     def get_openai_key(self):
@@ -0,0 +1,199 @@
+"""
+Embedding backends used by GPTService.get_text_embedding.
+
+  - openai: the OpenAI embeddings API (network call per text)
+  - local:  scikit-learn, in process. Without a fitted model it uses a signed hashing vectorizer
+            (no training, deterministic); with a model fitted on our own resumes and JDs it uses
+            hashing -> TF-IDF -> truncated SVD (LSA), which captures related terms.
+
+Fit a local model on a folder of resumes/JDs (PDF, DOCX, TXT, ...):
+    python -m app.services.embedding_backends --corpus ./corpus --output models/local_embedding.joblib
+"""
+import argparse
+import asyncio
+import hashlib
+import os
+import time
+from abc import ABC, abstractmethod
+from typing import Any, List, Optional
+from app.services.call_recorder import RecordingNotFound
+from app.services.config_service import STAGE_EMBEDDING
+from app.utils.deadline import run_with_timeout
+from app.utils.logger import Logger
+
+logger = Logger(__name__).get_logger()
+
+BACKEND_OPENAI = "openai"
+BACKEND_LOCAL = "local"
+
+
+class EmbeddingError(Exception):
+    """
+    Raised when a text could not be embedded. Callers must handle it explicitly instead of
+    comparing against an empty vector.
+    """
+
+
+class EmbeddingBackend(ABC):
+    """
+    Turns text into a dense vector. `identity` names the vector space; vectors are only
+    comparable (and cacheable together) when their identities are equal.
+    """
+    identity: str = ""
+
+    @abstractmethod
+    async def embed(self, text: str) -> List[float]:
+        ...
+
+
+class OpenAIEmbeddingBackend(EmbeddingBackend):
+    def __init__(self, openai_client, model_router, config, concurrency, recorder=None):
+        self.openai_client = openai_client
+        self.model_router = model_router
+        self.config = config
+        # GPTService's WeightedConcurrencyLimiter: embedding calls share the API slots by priority class
+        self.concurrency = concurrency
+        # GPTService's CallRecorder, when embeddings are recorded or replayed
+        self.recorder = recorder
+        self.identity = f"{BACKEND_OPENAI}:{config.stage_models[STAGE_EMBEDDING]}"
+
+    async def embed(self, text: str) -> List[float]:
+        # The embedding stage has no size tier, so this is always the model the identity names
+        model = self.model_router.route(STAGE_EMBEDDING, len(text))
+        fingerprint = recording = None
+        if self.recorder is not None:
+            fingerprint = self.recorder.embedding_fingerprint(model, text)
+            if self.recorder.replays:
+                recording = self.recorder.load(fingerprint)
+            if recording is None and not self.recorder.records:
+                raise RecordingNotFound(f"No recorded embedding on '{model}' for this text ({fingerprint[:12]}).")
+
+        async with self.concurrency.slot():
+            if recording is not None:
+                delay = self.recorder.replay_delay(recording)
+                if delay > 0:
+                    await run_with_timeout(asyncio.sleep(delay), STAGE_EMBEDDING, self.config.stage_timeouts.get(STAGE_EMBEDDING))
+                return recording["outcome"]["embedding"]
+            started = time.monotonic()
+            response = await run_with_timeout(
+                self.openai_client.embeddings.create(model=model, input=text),
+                STAGE_EMBEDDING,
+                self.config.stage_timeouts.get(STAGE_EMBEDDING)
+            )
+        vector = response.data[0].embedding
+        if not vector:
+            raise EmbeddingError("OpenAI returned an empty embedding.")
+        if fingerprint and self.recorder.records:
+            self.recorder.save(fingerprint, "embedding", STAGE_EMBEDDING, model, {"embedding": vector}, None, (time.monotonic() - started) * 1000)
+        return vector
+
+
+def _hashing_vectorizer(n_features: int, alternate_sign: bool, norm: Optional[str]):
+    from sklearn.feature_extraction.text import HashingVectorizer
+    return HashingVectorizer(
+        n_features=n_features,
+        alternate_sign=alternate_sign,
+        norm=norm,
+        ngram_range=(1, 2),
+        stop_words="english",
+        lowercase=True,
+    )
+
+
+class LocalEmbeddingBackend(EmbeddingBackend):
+    """
+    In-process embeddings with scikit-learn; no network, sub-millisecond per text.
+    """
+    def __init__(self, model_path: Optional[str] = None, hashing_dimensions: int = 1024):
+        self.model: Optional[Any] = None
+        if model_path and os.path.exists(model_path):
+            import joblib
+            self.model = joblib.load(model_path)
+            with open(model_path, "rb") as handle:
+                digest = hashlib.sha256(handle.read()).hexdigest()[:12]
+            self.identity = f"{BACKEND_LOCAL}:lsa-{digest}"
+            logger.info(f"Loaded local embedding model '{model_path}'.")
+        else:
+            if model_path:
+                logger.warning(f"Local embedding model '{model_path}' not found, using hashing embeddings.")
+            self.model = _hashing_vectorizer(hashing_dimensions, alternate_sign=True, norm="l2")
+            self.identity = f"{BACKEND_LOCAL}:hash-{hashing_dimensions}"
+
+    def embed_sync(self, text: str) -> List[float]:
+        if not text or not text.strip():
+            raise EmbeddingError("Cannot embed empty text.")
+        vector = self.model.transform([text])
+        dense = vector.toarray()[0] if hasattr(vector, "toarray") else vector[0]
+        if not dense.any():
+            raise EmbeddingError("Text has no known terms to embed.")
+        return dense.astype(float).tolist()
+
+    async def embed(self, text: str) -> List[float]:
+        return self.embed_sync(text)
+
+
+def create_embedding_backend(kind: str, gpt_service) -> EmbeddingBackend:
+    config = gpt_service.config
+    if kind == BACKEND_OPENAI:
+        return OpenAIEmbeddingBackend(
+            gpt_service.openai_client, gpt_service.model_router, config, gpt_service.concurrency, gpt_service.recorder
+        )
+    if kind == BACKEND_LOCAL:
+        return LocalEmbeddingBackend(config.local_embedding_model_path, config.local_embedding_dimensions)
+    raise ValueError(f"Unknown embedding backend '{kind}', expected '{BACKEND_OPENAI}' or '{BACKEND_LOCAL}'.")
+
+
+def fit_local_embedding_model(texts: List[str], output_path: str, dimensions: int = 256) -> None:
+    """
+    Fits hashing -> TF-IDF -> truncated SVD -> L2 normalization on a corpus and saves it with joblib.
+    """
+    import joblib
+    from sklearn.decomposition import TruncatedSVD
+    from sklearn.feature_extraction.text import TfidfTransformer
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import Normalizer
+
+    components = min(dimensions, max(1, len(texts) - 1))
+    pipeline = make_pipeline(
+        _hashing_vectorizer(2 ** 18, alternate_sign=False, norm=None),
+        TfidfTransformer(sublinear_tf=True),
+        TruncatedSVD(n_components=components, random_state=0),
+        Normalizer(copy=False),
+    )
+    pipeline.fit(texts)
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    joblib.dump(pipeline, output_path)
+    logger.info(f"Fitted local embedding model on {len(texts)} documents ({components} dimensions) -> '{output_path}'.")
+
+
+def _load_corpus(path: str) -> List[str]:
+    from io import BytesIO
+    from app.utils.file_parser import extract_normalized_text, SUPPORTED_EXTENSIONS
+
+    texts = []
+    for root, _, files in os.walk(path):
+        for name in sorted(files):
+            full_path = os.path.join(root, name)
+            try:
+                if name.lower().endswith(".txt"):
+                    with open(full_path, encoding="utf-8", errors="ignore") as handle:
+                        texts.append(handle.read())
+                elif name.lower().endswith(SUPPORTED_EXTENSIONS):
+                    with open(full_path, "rb") as handle:
+                        texts.append(extract_normalized_text(BytesIO(handle.read()), name))
+            except Exception as e:
+                logger.warning(f"Skipping corpus file '{full_path}': {str(e)}")
+    return [text for text in texts if text.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fit the local embedding model on a document corpus")
+    parser.add_argument("--corpus", required=True, help="Folder of resumes/JDs (searched recursively)")
+    parser.add_argument("--output", required=True, help="Where to write the fitted model (.joblib)")
+    parser.add_argument("--dimensions", type=int, default=256, help="SVD components")
+    args = parser.parse_args()
+    fit_local_embedding_model(_load_corpus(args.corpus), args.output, args.dimensions)
+
+
+if __name__ == "__main__":
+    main()
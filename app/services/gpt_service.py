@@ -1,4 +1,8 @@
-from openai import OpenAI
+import asyncio
+import time
+from datetime import date
+from openai import AsyncOpenAI, LengthFinishReasonError
+from pydantic import ValidationError
 from app.utils.logger import Logger
 from app.models.schemas import (
     ResumeSchema, 
@@ -8,8 +12,15 @@ from app.models.schemas import (
     ResumeScoringSchema,
     CandidateProfileSchemaList
 )
-from app.services.config_service import ConfigService
-from typing import Dict, Any, List
+from app.services.config_service import ConfigService, EMBEDDING_PURPOSE_SIMILARITY
+from app.services.call_recorder import CallRecorder, RecordingNotFound, RECORD_MODE_OFF, RECORD_MODE_REPLAY
+from app.services.embedding_backends import EmbeddingBackend, EmbeddingError, create_embedding_backend
+from app.services.model_router import ModelRouter
+from app.utils.deadline import DeadlineExceeded, run_with_timeout
+from app.utils.json_stream import IncrementalJSONObjectParser
+from app.utils.profiling import profile_stage
+from app.utils.admission import WeightedConcurrencyLimiter
+from typing import AsyncIterator, Dict, Any, List, Optional
 
 # Initialize Logger
 logger = Logger(__name__).get_logger()
@@ -18,23 +29,51 @@ class GPTService:
     """
     Service for interacting with OpenAI's GPT API to process resume and job description text.
     """
-    def __init__(self):
+    def __init__(self, config: Optional[ConfigService] = None):
         """
         Initializes the GPT service with the OpenAI API key.
+
+        Args:
+            config (ConfigService, optional): Shared configuration. A new one is created when omitted.
         """
         try:
-            config = ConfigService()
-            self.openai_client = OpenAI(api_key=config.get_openai_key())
+            config = config or ConfigService()
+            self.config = config
+            # Async client: calls don't block the event loop and cancelling a request aborts its HTTP call
+            # (replay-only runs need no API key, the client is never called)
+            self.openai_client = AsyncOpenAI(api_key=config.get_openai_key() or "replay-only", base_url=config.openai_base_url)
+            self.model_router = ModelRouter(config)
+            # Prompt-prefix cache accounting per stage, from the usage.prompt_tokens_details.cached_tokens field
+            self.prompt_cache_stats: Dict[str, Dict[str, int]] = {}
+            # Embedding backends by kind, created on first use
+            self._embedding_backends: Dict[str, EmbeddingBackend] = {}
+            # GPT call slots shared by all requests, split between priority classes by weight
+            self.concurrency = WeightedConcurrencyLimiter(config.gpt_max_concurrency, config.gpt_weights, config.gpt_max_shares)
+            # Record/replay store for offline, deterministic runs (see GPT_RECORD_MODE)
+            self.recorder: Optional[CallRecorder] = None
+            if config.gpt_record_mode != RECORD_MODE_OFF:
+                self.recorder = CallRecorder(config.gpt_record_path, config.gpt_record_mode, config.gpt_replay_latency_scale,
+                                             config.gpt_replay_today)
             logger.info("GPT service initialized successfully.")
         except Exception as e:
             logger.error(f"Failed to initialize GPT service: {str(e)}", exc_info=True)
             raise
 
+    def today(self) -> str:
+        """
+        Today's date (YYYY-MM-DD) for prompts; pinned to the recording's date while recording or replaying.
+        """
+        if self.recorder is not None:
+            return self.recorder.today
+        return date.today().isoformat()
+
     async def extract_with_prompts(
         self,
         system_prompt: str,
         user_prompt: str,
-        response_schema: Any  # Keep response_schema unchanged
+        response_schema: Any,  # Keep response_schema unchanged
+        stage: str,
+        escalate: bool = True
     ) -> Dict[str, Any]:
         """
         Extract structured information using GPT with custom prompts and schema.
@@ -43,6 +82,9 @@ class GPTService:
             system_prompt (str): System-level instructions for GPT.
             user_prompt (str): User-specific query for GPT processing.
             response_schema (Any): Expected schema for the response.
+            stage (str): Pipeline stage, used to route the call to a model (see STAGE_* in config_service)
+                and to apply the stage timeout, capped by the current request deadline.
+            escalate (bool): Retry once on the escalation model when the response fails schema validation.
 
         Returns:
             Dict containing extracted structured information.
@@ -53,43 +95,261 @@ class GPTService:
                 {"role": "system", "content": f"{system_prompt}\n\nEnsure response follows the schema."},
                 {"role": "user", "content": f"{user_prompt}"}
             ]
+            model = self.model_router.route(stage, len(system_prompt) + len(user_prompt))
 
-            # Make GPT API call
-            response = self.openai_client.beta.chat.completions.parse(
-                model="gpt-4o-mini",
-                messages=messages,
-                response_format=response_schema  # ✅ Keep response_schema unchanged
-            )
-
-            # Parse and return the structured response
-            result = response.choices[0].message.parsed.dict()
-            return result
+            try:
+                return await self._parse_completion(model, messages, response_schema, stage)
+            except (ValidationError, LengthFinishReasonError, ValueError) as e:
+                # The response did not validate against the schema, retry once on a stronger model
+                escalation_model = self.model_router.escalate(stage, model) if escalate else None
+                if not escalation_model:
+                    raise
+                logger.warning(
+                    f"Schema validation failed on '{model}' for stage '{stage}', escalating to '{escalation_model}': {str(e)}"
+                )
+                return await self._parse_completion(escalation_model, messages, response_schema, stage)
 
+        except DeadlineExceeded:
+            logger.warning(f"GPT extraction for stage '{stage}' abandoned: deadline exceeded.")
+            raise
         except Exception as e:
             logger.error(f"GPT extraction failed: {str(e)}", exc_info=True)
             raise Exception(f"GPT extraction failed: {str(e)}")
 
-    async def get_text_embedding(self, text: str) -> List[float]:
+    async def _parse_completion(self, model: str, messages: List[Dict[str, str]], response_schema: Any, stage: str) -> Dict[str, Any]:
+        """
+        Runs one structured-output completion and returns the parsed payload as a dict.
+        Raises ValueError when the model returned no parsable payload (e.g. a refusal).
+        With a recorder, the call is answered from (or saved to) the recording store.
+        """
+        fingerprint = recording = None
+        if self.recorder is not None:
+            fingerprint = self.recorder.completion_fingerprint(model, messages, response_schema)
+            if self.recorder.replays:
+                recording = self.recorder.load(fingerprint)
+            if recording is None and self.recorder.mode == RECORD_MODE_REPLAY:
+                raise RecordingNotFound(f"No recorded '{stage}' completion on '{model}' for this prompt ({fingerprint[:12]}).")
+
+        # Make GPT API call (memory is attributed to the stage when tracemalloc profiling is on),
+        # holding one of the GPT slots of the request's priority class
+        async with self.concurrency.slot():
+            with profile_stage(f"gpt:{stage}"):
+                if recording is not None:
+                    return await self._replay_completion(recording, model, stage)
+                started = time.monotonic()
+                try:
+                    response = await run_with_timeout(
+                        self.openai_client.beta.chat.completions.parse(
+                            model=model,
+                            messages=messages,
+                            response_format=response_schema  # ✅ Keep response_schema unchanged
+                        ),
+                        stage,
+                        self.config.stage_timeouts.get(stage)
+                    )
+                except (ValidationError, LengthFinishReasonError) as e:
+                    # Schema failures are part of the recording, so a replay escalates the same way
+                    if fingerprint and self.recorder.records:
+                        latency_ms = (time.monotonic() - started) * 1000
+                        self.recorder.save(fingerprint, "completion", stage, model, {"error": str(e)}, None, latency_ms)
+                    raise
+
+        usage = self._usage_counts(response.usage)
+        self._record_usage(stage, usage)
+
+        # Parse and return the structured response
+        parsed = response.choices[0].message.parsed
+        if fingerprint and self.recorder.records:
+            latency_ms = (time.monotonic() - started) * 1000
+            outcome = {"parsed": parsed.dict() if parsed is not None else None}
+            self.recorder.save(fingerprint, "completion", stage, model, outcome, usage, latency_ms)
+        if parsed is None:
+            raise ValueError(f"Model '{model}' returned no structured output.")
+        return parsed.dict()
+
+    async def _replay_completion(self, recording: Dict[str, Any], model: str, stage: str) -> Dict[str, Any]:
+        """
+        Answers a completion from its recording, after the (scaled) recorded latency.
+        """
+        delay = self.recorder.replay_delay(recording)
+        if delay > 0:
+            await run_with_timeout(asyncio.sleep(delay), stage, self.config.stage_timeouts.get(stage))
+        self._record_usage(stage, recording["usage"])
+        outcome = recording["outcome"]
+        if "error" in outcome:
+            raise ValueError(outcome["error"])
+        if outcome["parsed"] is None:
+            raise ValueError(f"Model '{model}' returned no structured output.")
+        return outcome["parsed"]
+
+    async def stream_with_prompts(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        response_schema: Any,
+        stage: str
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streamed variant of extract_with_prompts. Yields {"field": name, "value": value} for each top-level
+        field as soon as its value is complete in the model output, then {"result": payload} with the whole
+        payload validated against the schema.
+        When the streamed output fails validation, the payload is extracted again on the escalation model
+        without streaming; fields already sent may then differ from the final result, which is authoritative.
+        """
+        messages = [
+            {"role": "system", "content": f"{system_prompt}\n\nEnsure response follows the schema."},
+            {"role": "user", "content": f"{user_prompt}"}
+        ]
+        model = self.model_router.route(stage, len(system_prompt) + len(user_prompt))
+        try:
+            try:
+                async for event in self._stream_completion(model, messages, response_schema, stage):
+                    yield event
+            except (ValidationError, LengthFinishReasonError, ValueError) as e:
+                escalation_model = self.model_router.escalate(stage, model)
+                if not escalation_model:
+                    raise
+                logger.warning(
+                    f"Streamed output failed validation on '{model}' for stage '{stage}', extracting again on '{escalation_model}': {str(e)}"
+                )
+                yield {"result": await self._parse_completion(escalation_model, messages, response_schema, stage)}
+        except DeadlineExceeded:
+            logger.warning(f"Streamed GPT extraction for stage '{stage}' abandoned: deadline exceeded.")
+            raise
+        except Exception as e:
+            logger.error(f"Streamed GPT extraction failed: {str(e)}", exc_info=True)
+            raise Exception(f"GPT extraction failed: {str(e)}")
+
+    async def _stream_completion(self, model: str, messages: List[Dict[str, str]], response_schema: Any, stage: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Runs one streamed structured-output completion, yielding completed top-level fields and then the result.
+        Uses the same recordings as _parse_completion: a replayed call yields the recorded payload's fields.
+        The stage timeout covers the whole stream.
         """
-        Generates a vectorized numerical representation of the given text using OpenAI embeddings.
+        fingerprint = recording = None
+        if self.recorder is not None:
+            fingerprint = self.recorder.completion_fingerprint(model, messages, response_schema)
+            if self.recorder.replays:
+                recording = self.recorder.load(fingerprint)
+            if recording is None and self.recorder.mode == RECORD_MODE_REPLAY:
+                raise RecordingNotFound(f"No recorded '{stage}' completion on '{model}' for this prompt ({fingerprint[:12]}).")
+        if recording is not None:
+            parsed = await self._replay_completion(recording, model, stage)
+            for field, value in parsed.items():
+                yield {"field": field, "value": value}
+            yield {"result": parsed}
+            return
+
+        stage_seconds = self.config.stage_timeouts.get(stage)
+        started = time.monotonic()
+
+        def time_left() -> Optional[float]:
+            # What is left of the stage timeout (run_with_timeout caps it by the request deadline)
+            return stage_seconds - (time.monotonic() - started) if stage_seconds else None
+
+        parser = IncrementalJSONObjectParser()
+        async with self.concurrency.slot():
+            with profile_stage(f"gpt:{stage}"):
+                manager = self.openai_client.beta.chat.completions.stream(
+                    model=model,
+                    messages=messages,
+                    response_format=response_schema,
+                    stream_options={"include_usage": True}
+                )
+                stream = await run_with_timeout(manager.__aenter__(), stage, time_left())
+                try:
+                    events = stream.__aiter__()
+                    while True:
+                        try:
+                            event = await run_with_timeout(events.__anext__(), stage, time_left())
+                        except StopAsyncIteration:
+                            break
+                        if event.type == "content.delta":
+                            for field, value in parser.feed(event.delta):
+                                yield {"field": field, "value": value}
+                    completion = await stream.get_final_completion()
+                except (ValidationError, LengthFinishReasonError) as e:
+                    if fingerprint and self.recorder.records:
+                        self.recorder.save(fingerprint, "completion", stage, model, {"error": str(e)}, None, (time.monotonic() - started) * 1000)
+                    raise
+                finally:
+                    await manager.__aexit__(None, None, None)
+
+        usage = self._usage_counts(completion.usage)
+        self._record_usage(stage, usage)
+        parsed = completion.choices[0].message.parsed
+        if fingerprint and self.recorder.records:
+            outcome = {"parsed": parsed.dict() if parsed is not None else None}
+            self.recorder.save(fingerprint, "completion", stage, model, outcome, usage, (time.monotonic() - started) * 1000)
+        if parsed is None:
+            raise ValueError(f"Model '{model}' returned no structured output.")
+        yield {"result": parsed.dict()}
+
+    @staticmethod
+    def _usage_counts(usage: Any) -> Optional[Dict[str, int]]:
+        """
+        Prompt, cached prompt and completion tokens of an API usage object.
+        """
+        if usage is None:
+            return None
+        details = getattr(usage, "prompt_tokens_details", None)
+        return {
+            "prompt_tokens": usage.prompt_tokens or 0,
+            "cached_tokens": (getattr(details, "cached_tokens", 0) or 0) if details else 0,
+            "completion_tokens": getattr(usage, "completion_tokens", 0) or 0,
+        }
+
+    def _record_usage(self, stage: str, usage: Optional[Dict[str, int]]) -> None:
+        """
+        Accumulates prompt and cached prompt tokens for a stage.
+        """
+        if usage is None:
+            return
+        stats = self.prompt_cache_stats.setdefault(stage, {"calls": 0, "prompt_tokens": 0, "cached_tokens": 0})
+        stats["calls"] += 1
+        stats["prompt_tokens"] += usage["prompt_tokens"]
+        stats["cached_tokens"] += usage["cached_tokens"]
+
+    def get_prompt_cache_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns calls, prompt tokens, cached prompt tokens and the cache hit rate per stage and in total.
+        """
+        report = {}
+        total = {"calls": 0, "prompt_tokens": 0, "cached_tokens": 0}
+        for stage, stats in self.prompt_cache_stats.items():
+            for key in total:
+                total[key] += stats[key]
+            report[stage] = dict(stats, hit_rate=round(stats["cached_tokens"] / stats["prompt_tokens"], 4) if stats["prompt_tokens"] else 0.0)
+        report["total"] = dict(total, hit_rate=round(total["cached_tokens"] / total["prompt_tokens"], 4) if total["prompt_tokens"] else 0.0)
+        return report
+
+    def embedding_backend(self, purpose: str = EMBEDDING_PURPOSE_SIMILARITY) -> EmbeddingBackend:
+        """
+        Returns the embedding backend configured for a purpose (see EMBEDDING_BACKEND_<PURPOSE>).
+        """
+        kind = self.config.embedding_backends.get(purpose, self.config.default_embedding_backend)
+        if kind not in self._embedding_backends:
+            self._embedding_backends[kind] = create_embedding_backend(kind, self)
+        return self._embedding_backends[kind]
+
+    async def get_text_embedding(self, text: str, purpose: str = EMBEDDING_PURPOSE_SIMILARITY) -> List[float]:
+        """
+        Generates a vectorized numerical representation of the given text with the purpose's backend.
         
         Args:
             text (str): The text to convert into an embedding.
+            purpose (str): What the vector is for, selects the backend.
 
         Returns:
             List[float]: A vector representation of the text.
+
+        Raises:
+            EmbeddingError: When the text could not be embedded.
         """
         try:
-            response = self.openai_client.embeddings.create(
-                model="text-embedding-ada-002",
-                input=text
-            )
-
-            # ✅ FIX: Access response as an object, not a dictionary
-            embedding_vector = response.data[0].embedding  # 🔥 Correct way to extract embeddings
-
-            return embedding_vector
-
+            return await self.embedding_backend(purpose).embed(text)
+        except (DeadlineExceeded, EmbeddingError):
+            raise
         except Exception as e:
             logger.error(f"Failed to generate text embedding: {str(e)}", exc_info=True)
-            return []
\ No newline at end of file
+            raise EmbeddingError(f"Failed to generate text embedding: {str(e)}") from e
@@ -1,86 +1,96 @@
-from app.utils.file_parser import parse_pdf_or_docx
+from app.utils.file_parser import extract_normalized_text_async
 from app.services.gpt_service import GPTService
-from app.services.config_service import ConfigService
+from app.services.config_service import STAGE_JD_EXTRACTION
 from io import BytesIO
+from app.services.prompt_registry import get_prompt
 from app.utils.logger import Logger
-from app.models.schemas import JobDescriptionSchema
-from datetime import datetime
+from app.models.schemas import JobDescriptionSchema, build_partial_schema
+from typing import Optional, Tuple
 
 logger = Logger(__name__).get_logger()
 
+# Prompt lines for each top-level JobDescriptionSchema field; only the requested ones are sent to GPT.
+JD_FIELD_INSTRUCTIONS = {
+    "job_title": "   - job_title: Extract the most relevant job title.",
+    "job_description": "   - job_description: Provide the full job description text.",
+    "required_skills": """   - required_skills:
+     a. Identify explicitly mentioned skills.
+     b. Infer essential skills based on job context.""",
+    "min_work_experience": """   - min_work_experience:
+     a. If a minimum experience requirement is stated, extract it.
+     b. If experience is not explicitly mentioned, infer based on seniority level (e.g., 'entry-level' = 0-2 years, 'mid-level' = 3-5 years, 'senior-level' = 6+ years).""",
+}
+
 class JobDescriptionParser:
     """
     Service for extracting structured information from job descriptions.
     """
-    def __init__(self):
+    def __init__(self, gpt_service: Optional[GPTService] = None):
         """
         Initializes the Job Description Parser with GPT integration.
+
+        Args:
+            gpt_service (GPTService, optional): Shared GPT client. A new one is created when omitted.
         """
         logger.info("JobDescriptionParser initialized successfully.")
-        config = ConfigService()
-        self.gpt_service = GPTService()
+        self.gpt_service = gpt_service or GPTService()
 
-    async def parse_job_description(self, file_buffer: BytesIO, filename: str):
+    async def parse_job_description(self, file_buffer: BytesIO, filename: str, fields: Optional[Tuple[str, ...]] = None):
         """
         Parses a job description file and extracts structured information.
         Args:
             file_buffer (BytesIO): The job description file buffer.
             filename (str): Name of the uploaded job description file.
+            fields (Tuple[str, ...], optional): Top-level JobDescriptionSchema fields to extract. All fields when omitted.
         
         Returns:
             Dict containing structured job description data.
         """
         try:
-            text = parse_pdf_or_docx(file_buffer, filename)
-            today_date = datetime.now().strftime("%Y-%m-%d")
-
-            # System Prompt
-            system_prompt = f"""
-            You are an AI model specialized in extracting structured job descriptions. 
-            Ensure accurate data extraction and return structured JSON output. 
-            Today's date is {today_date}. Follow these rules:
-
-            1. **Extract Fields**:
-               - job_title: Extract the most relevant job title.
-               - job_description: Provide the full job description text.
-               - required_skills:
-                 a. Identify explicitly mentioned skills.
-                 b. Infer essential skills based on job context.
-               - min_work_experience:
-                 a. If a minimum experience requirement is stated, extract it.
-                 b. If experience is not explicitly mentioned, infer based on seniority level (e.g., 'entry-level' = 0-2 years, 'mid-level' = 3-5 years, 'senior-level' = 6+ years).
-
-            2. **Skill Extraction**:
-               - Extract both technical and soft skills.
-               - Include tools, technologies, and methodologies mentioned.
+            text = await extract_normalized_text_async(file_buffer, filename, self.gpt_service.config.max_document_chars)
+            today_date = self.gpt_service.today()
+            selected = fields or tuple(JobDescriptionSchema.model_fields)
+            response_schema = build_partial_schema(JobDescriptionSchema, fields) if fields else JobDescriptionSchema
 
-            3. **Work Experience Calculation**:
-               - Ensure the experience field is formatted in numeric terms (e.g., '2 years' or '5+ years').
-               - Infer experience if not explicitly stated using industry norms.
-
-            4. **Ensure Accuracy**:
-               - Do not leave fields blank. Provide estimates or mark as 'Not mentioned' where needed.
-               - Use contextual inference for missing values.
-
-            5. **Formatting**:
-               - Ensure structured JSON output with no missing fields.
-               - Provide clean, human-readable formatting.
-            """
-
-            # User Prompt
-            user_prompt = f"""
-            Extract structured job description details from the following text:
-
-            {text}
+            field_lines = "\n".join(
+                JD_FIELD_INSTRUCTIONS.get(
+                    name, f"   - {name}: {JobDescriptionSchema.model_fields[name].description}."
+                )
+                for name in selected
+            )
+            sections = [f"""**Extract Fields**:
+{field_lines}"""]
+            if "required_skills" in selected:
+                sections.append("""**Skill Extraction**:
+   - Extract both technical and soft skills.
+   - Include tools, technologies, and methodologies mentioned.""")
+            if "min_work_experience" in selected:
+                sections.append("""**Work Experience Calculation**:
+   - Ensure the experience field is formatted in numeric terms (e.g., '2 years' or '5+ years').
+   - Infer experience if not explicitly stated using industry norms.""")
+            sections += [
+                """**Ensure Accuracy**:
+   - Do not leave fields blank. Provide estimates or mark as 'Not mentioned' where needed.
+   - Use contextual inference for missing values.""",
+                """**Formatting**:
+   - Ensure structured JSON output with no missing fields.
+   - Provide clean, human-readable formatting.""",
+            ]
+            rules = "\n".join(f"{i}. {section}" for i, section in enumerate(sections, start=1))
 
-            Ensure structured formatting, extract all key details, and infer missing information where applicable.
-            """
+            # Static instructions go in the system prompt, the document and date come last
+            system_prompt, user_prompt = get_prompt("jd_extraction").render(
+                system_vars={"rules": rules},
+                text=text,
+                today_date=today_date
+            )
 
             # Call GPT Service
             structured_data = await self.gpt_service.extract_with_prompts(
                 system_prompt=system_prompt,
                 user_prompt=user_prompt,
-                response_schema=JobDescriptionSchema
+                response_schema=response_schema,
+                stage=STAGE_JD_EXTRACTION
             )
 
             return structured_data  
@@ -1,15 +1,49 @@
-from app.utils.file_parser import parse_pdf_or_docx
+from app.utils.file_parser import extract_normalized_text_async
 from app.services.gpt_service import GPTService
-from app.services.config_service import ConfigService
-from typing import List, Dict, Any
+from app.services.embedding_backends import EmbeddingError
+from app.services.config_service import STAGE_JD_EXTRACTION, STAGE_JD_ENHANCEMENT, STAGE_CANDIDATE_GENERATION
+from typing import List, Dict, Any, Optional, Tuple
 from io import BytesIO
+from app.services.scoring_cache import content_hash
+from app.services.state_backend import StateBackend, InMemoryStateBackend
+from app.services.skill_taxonomy import get_skill_taxonomy
+from app.services.prompt_registry import get_prompt
+from app.services.chunked_extraction import plan_chunks, extract_chunks, merge_partials
+from app.utils.section_chunker import JD_SECTION_HEADINGS
+from app.utils.deadline import DeadlineExceeded
+from app.utils.parse_sandbox import DocumentLimitExceeded
 from app.utils.logger import Logger
-from app.models.schemas import EnhancedJobDescriptionSchema, CandidateProfileSchemaList, JobDescriptionSchema
-from datetime import datetime
+from app.models.schemas import EnhancedJobDescriptionSchema, CandidateProfileSchemaList, JobDescriptionSchema, build_partial_schema
 import numpy as np
 
 logger = Logger(__name__).get_logger()
 
+# Chunked extraction of long JDs: requirement sections provide the skills and experience, responsibility
+# sections the description (and the skills they name), the company section the industry, and the text
+# before the first heading (capped) the title, industry and description. Benefits provide nothing.
+JD_SECTION_FIELDS = {
+    "requirements": ("required_skills", "min_work_experience"),
+    "responsibilities": ("job_description", "required_skills"),
+    "company": ("industry_name",),
+    "benefits": (),
+}
+JD_OVERVIEW_FIELDS = ("job_title", "job_description", "industry_name")
+
+
+def merge_jd_partials(partials: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Merges per-chunk JD extractions: skills unioned, descriptions joined in document order, the strictest
+    experience requirement kept, and the first title and industry found.
+    """
+    return merge_partials(
+        partials,
+        {"required_skills": ()},
+        {
+            "job_description": lambda values: "\n\n".join(values) if values else "",
+            "min_work_experience": lambda values: max(values) if values else None,
+        }
+    )
+
 def cosine_similarity(vec1: np.ndarray, vec2: np.ndarray) -> float:
     if not np.any(vec1) or not np.any(vec2):
         return 0.0
@@ -20,11 +54,40 @@ class JobDescriptionEnhancer:
     Service for extracting and enhancing job descriptions, generating sample candidate profiles.
     Neo4j dependencies have been removed.
     """
-    def __init__(self):
+    def __init__(self, gpt_service: Optional[GPTService] = None, state_backend: Optional[StateBackend] = None):
         logger.info("JobDescriptionEnhancer initialized successfully.")
-        config = ConfigService()
-        self.gpt_service = GPTService()
-        self.temp_storage = {}  # Temporary storage for enhanced JD and generated candidates
+        self.gpt_service = gpt_service or GPTService()
+        # Storage for the enhanced JD and generated candidates, shared with the scoring service
+        # (and with other worker processes when the backend is SQLite)
+        self.state_backend = state_backend or InMemoryStateBackend()
+
+    async def get_current_enhancement(self) -> Optional[Dict[str, Any]]:
+        """
+        Returns the last enhanced JD with its candidates, embedding and identity, or None
+        when no job description has been enhanced yet.
+        """
+        return await self.state_backend.get_async("jd", "current")
+
+    def enhancement_record(self, enhanced_jd: Dict[str, Any], candidates: Any, vectorized_jd: Optional[List[float]]) -> Dict[str, Any]:
+        """
+        The enhanced JD with everything scoring needs from it, as one record.
+        """
+        return {
+            "enhanced_job_description": enhanced_jd,
+            "candidates": candidates,
+            "vectorized_jd": vectorized_jd,
+            # Vector space of vectorized_jd; scoring re-embeds the JD when the configured backend differs
+            "embedding_identity": self.gpt_service.embedding_backend().identity if vectorized_jd else None,
+            # Identifies this JD version for scoring caches; changes whenever the JD is re-enhanced
+            "jd_identity": content_hash((enhanced_jd, candidates)),
+        }
+
+    async def save_enhancement(self, record: Dict[str, Any]) -> None:
+        """
+        Makes an enhancement record the current JD. It is stored as a single record, so scoring never sees
+        a JD paired with another JD's candidates.
+        """
+        await self.state_backend.set_async("jd", "current", record)
 
     def map_experience_to_bucket(self, years: int) -> str:
         if years < 1:
@@ -45,137 +108,94 @@ class JobDescriptionEnhancer:
         Combines both primary and secondary skills into two disjoint lists:
           - 'skills': unique primary skills
           - 'subskills': unique secondary skills that do not appear in primary.
+        Skills are mapped to their canonical taxonomy names first, so aliases collapse into one entry.
         Additionally, removes specific duplicate/conflicting entries.
         """
-        primary_skills = primary_skills or []
-        secondary_skills = secondary_skills or []
-        unique_primary = []
-        for s in primary_skills:
-            if s not in unique_primary:
-                unique_primary.append(s)
-        unique_secondary = []
-        for s in secondary_skills:
-            if s not in unique_secondary:
-                unique_secondary.append(s)
+        # Skills are normalized to canonical names ("JS" == "JavaScript") and de-duplicated with sets
+        taxonomy = get_skill_taxonomy()
+        unique_primary = taxonomy.normalize_all(primary_skills)
+        primary_set = set(unique_primary)
         # Exclude any secondary that already appears in primary
-        filtered_secondary = [s for s in unique_secondary if s not in unique_primary]
         # Remove duplicates/conflicts as identified:
         conflicts = {"Problem Solving", "Communication", "Critical Thinking"}
-        filtered_secondary = [s for s in filtered_secondary if s not in conflicts]
+        filtered_secondary = [
+            s for s in taxonomy.normalize_all(secondary_skills)
+            if s not in primary_set and s not in conflicts
+        ]
         return {"skills": unique_primary, "subskills": filtered_secondary}
 
-    def map_skills_to_conditional(self, primary_skills: List[str], secondary_skills: List[str]) -> List[Dict[str, Any]]:
-        """
-        Creates a mapping list where each entry is a dictionary with:
-            'skill': a primary skill,
-            'subskills': a list of secondary skills (filtered so that none appear in primary).
-        """
-        unique = self.map_unique_skills(primary_skills, secondary_skills)
-        mapping = []
-        for main_skill in unique["skills"]:
-            mapping.append({
-                'skill': main_skill,
-                # Always include the filtered secondary skills for conditional linking.
-                'subskills': [{'subskill': s} for s in unique["subskills"]]
-            })
-        return mapping
-
     async def enhance_job_description(self, file_buffer: BytesIO, filename: str):
         """
         Extracts, enhances a job description, generates sample dummy candidate profiles,
-        vectorizes the JD, and stores them in temporary storage.
+        vectorizes the JD, and stores them in the state backend.
         """
         try:
-            structured_data = await self.extract_job_description(file_buffer, filename)
-            enhanced_jd = await self.generate_enhanced_jd(structured_data)
-            candidates = await self.generate_candidate_profiles(enhanced_jd)
-            vectorized_jd = await self.vectorize_job_description(enhanced_jd)
-            self.temp_storage["enhanced_job_description"] = enhanced_jd
-            self.temp_storage["candidates"] = candidates
-            self.temp_storage["vectorized_jd"] = vectorized_jd
+            record = await self.build_enhancement(file_buffer, filename)
+            await self.save_enhancement(record)
             return {
-                "enhanced_job_description": enhanced_jd,
-                "generated_candidates": candidates,
-                "vectorized_jd": vectorized_jd
+                "enhanced_job_description": record["enhanced_job_description"],
+                "generated_candidates": record["candidates"],
+                "vectorized_jd": record["vectorized_jd"]
             }
+        except (DeadlineExceeded, DocumentLimitExceeded):
+            raise
         except Exception as e:
             logger.error(f"Error enhancing job description '{filename}': {str(e)}", exc_info=True)
             raise Exception(f"Error enhancing job description '{filename}': {str(e)}")
 
+    async def build_enhancement(self, file_buffer: BytesIO, filename: str) -> Dict[str, Any]:
+        """
+        Runs the whole enhancement pipeline for one JD file and returns its record (see enhancement_record)
+        without making it the current JD. Used directly when several JDs are scored at once.
+        """
+        structured_data = await self.extract_job_description(file_buffer, filename)
+        enhanced_jd = await self.generate_enhanced_jd(structured_data)
+        candidates = await self.generate_candidate_profiles(enhanced_jd)
+        vectorized_jd = await self.vectorize_job_description(enhanced_jd)
+        return self.enhancement_record(enhanced_jd, candidates, vectorized_jd)
+
     async def extract_job_description(self, file_buffer: BytesIO, filename: str) -> Dict[str, Any]:
         try:
-            text = parse_pdf_or_docx(file_buffer, filename)
-            today_date = datetime.now().strftime("%Y-%m-%d")
-            system_prompt = f"""
-            You are an AI model specialized in extracting structured job descriptions. 
-            Ensure accurate data extraction and return structured JSON output without any contextual loss of information.
-            Today's date is {today_date}. Follow these rules:
-
-            1. **Extract Fields**:
-               - **industry_name**: Extract the industry of the job (e.g., "Technology", "Healthcare", "Finance"). If not mentioned, mark as "Not mentioned". 
-               - job_title: Extract the most relevant job title.
-               - job_description: Provide the full job description text without any contextual loss, with a word limit of 400-500 words.
-               - required_skills:
-                 a. Identify explicitly mentioned skills.
-                 b. Infer essential skills based on job context.
-               - min_work_experience:
-                 a. If a minimum experience requirement is stated, extract it.
-                 b. If experience is not explicitly mentioned, infer based on seniority level.
-            2. **Skill Extraction**:
-               - Extract both technical and soft skills.
-               - Include tools, technologies, and methodologies mentioned.
-            3. **Work Experience Calculation**:
-               - Ensure the experience field is formatted in numeric terms (e.g., '2 years' or '5+ years').
-               - Infer experience if not explicitly stated using industry norms.
-            4. **Ensure Accuracy**:
-               - Do not leave fields blank. Provide estimates or mark as 'Not mentioned' where needed.
-               - Use contextual inference for missing values.
-            5. **Formatting**:
-               - Ensure structured JSON output with no missing fields.
-               - Provide clean, human-readable formatting.
-            """
-            user_prompt = f"""
-            Extract structured job description details from the following text without contextual loss of any information:
-
-            {text}
-
-            Ensure structured formatting, extract all key details, and infer missing information where applicable.
-            """
-            structured_data = await self.gpt_service.extract_with_prompts(
-                system_prompt=system_prompt,
-                user_prompt=user_prompt,
-                response_schema=JobDescriptionSchema
-            )
-            return structured_data
+            config = self.gpt_service.config
+            text = await extract_normalized_text_async(file_buffer, filename, config.max_document_chars)
+            all_fields = tuple(JobDescriptionSchema.model_fields)
+
+            plan = None
+            if len(text) >= config.chunking_min_chars:
+                plan = plan_chunks(
+                    text, JD_SECTION_HEADINGS, JD_SECTION_FIELDS, JD_OVERVIEW_FIELDS,
+                    all_fields, JobDescriptionSchema, config.chunk_max_chars
+                )
+            if plan:
+                # Long JD: sections extracted in parallel, then merged
+                return merge_jd_partials(await extract_chunks(plan, self.extract_jd_fields))
+            return await self.extract_jd_fields(text, all_fields)
         except Exception as e:
             logger.error(f"Error parsing job description '{filename}': {str(e)}", exc_info=True)
             raise
 
+    async def extract_jd_fields(self, text: str, fields: Tuple[str, ...]) -> Dict[str, Any]:
+        """
+        Extracts the given JobDescriptionSchema fields from job description text in one GPT call.
+        """
+        today_date = self.gpt_service.today()
+        system_prompt, user_prompt = get_prompt("jd_enhancer_extraction").render(text=text, today_date=today_date)
+        return await self.gpt_service.extract_with_prompts(
+            system_prompt=system_prompt,
+            user_prompt=user_prompt,
+            response_schema=JobDescriptionSchema if len(fields) == len(JobDescriptionSchema.model_fields)
+            else build_partial_schema(JobDescriptionSchema, fields),
+            stage=STAGE_JD_EXTRACTION
+        )
+
     async def generate_enhanced_jd(self, structured_data: Dict[str, Any]) -> Dict[str, Any]:
         try:
-            system_prompt = f"""
-            You are an AI expert at refining and enhancing job descriptions.
-            Enhance clarity, structure, and detail of job descriptions.
-            ENSURE NO CONTEXTUAL LOSS IS DONE AT ALL.
-
-            **Enhancement Guidelines**:
-            - Responsibilities: Expand to **at least 10** clear, specific duties.
-            - Required Skills: Identify **at least 15** relevant skills (technical & non-technical).
-            - Key Metrics: Define **at least 10** measurable KPIs.
-            - Ensure industry standards and structured formatting.
-
-            Format the output in structured JSON format.
-            """
-            user_prompt = f"""
-            Enhance this job description to be more structured and complete.
-            ENSURE NO CONTEXTUAL LOSS IS DONE AT ALL:
-
-            {structured_data}
-            """
+            system_prompt, user_prompt = get_prompt("jd_enhancement").render(structured_data=structured_data)
             enhanced_jd = await self.gpt_service.extract_with_prompts(
                 system_prompt=system_prompt,
                 user_prompt=user_prompt,
-                response_schema=EnhancedJobDescriptionSchema
+                response_schema=EnhancedJobDescriptionSchema,
+                stage=STAGE_JD_ENHANCEMENT
             )
             return enhanced_jd
         except Exception as e:
@@ -184,44 +204,33 @@ class JobDescriptionEnhancer:
 
     async def generate_candidate_profiles(self, enhanced_jd: Dict[str, Any]) -> CandidateProfileSchemaList:
         try:
-            system_prompt = f"""
-            Generate six candidate profiles with varying qualification levels for the given job description.
-
-            **Candidate Fit Levels**:
-            - 10/10: Perfect match
-            - 8/10: Strong match
-            - 6/10: Moderate match
-            - 4/10: Below average
-            - 2/10: Weak match
-            - 0/10: Not a fit
-
-            Structure output as JSON.
-            """
-            user_prompt = f"""
-            Generate sample candidates for this job description:
-
-            {enhanced_jd}
-            """
+            system_prompt, user_prompt = get_prompt("candidate_generation").render(enhanced_jd=enhanced_jd)
             candidates = await self.gpt_service.extract_with_prompts(
                 system_prompt=system_prompt,
                 user_prompt=user_prompt,
-                response_schema=CandidateProfileSchemaList
+                response_schema=CandidateProfileSchemaList,
+                stage=STAGE_CANDIDATE_GENERATION
             )
             return candidates
         except Exception as e:
             logger.error(f"Error generating candidate profiles: {str(e)}", exc_info=True)
             raise
 
-    async def vectorize_job_description(self, enhanced_jd: Dict[str, Any]) -> List[float]:
+    def job_description_text(self, enhanced_jd: Dict[str, Any]) -> str:
+        return (
+            f"{enhanced_jd.get('job_title', '')} "
+            f"{enhanced_jd.get('role_summary', '')} "
+            f"{' '.join(enhanced_jd.get('responsibilities', []))} "
+            f"{' '.join(enhanced_jd.get('required_skills', []))} "
+        )
+
+    async def vectorize_job_description(self, enhanced_jd: Dict[str, Any]) -> Optional[List[float]]:
+        """
+        Embeds the enhanced JD. Returns None (and logs why) when it can't be embedded, so similarity
+        is reported as unavailable rather than as 0.
+        """
         try:
-            jd_text = (
-                f"{enhanced_jd.get('job_title', '')} "
-                f"{enhanced_jd.get('role_summary', '')} "
-                f"{' '.join(enhanced_jd.get('responsibilities', []))} "
-                f"{' '.join(enhanced_jd.get('required_skills', []))} "
-            )
-            vectorized_jd = await self.gpt_service.get_text_embedding(jd_text)
-            return vectorized_jd
-        except Exception as e:
-            logger.error(f"Error vectorizing JD: {str(e)}", exc_info=True)
-            return []
+            return await self.gpt_service.get_text_embedding(self.job_description_text(enhanced_jd))
+        except EmbeddingError as e:
+            logger.warning(f"JD embedding unavailable, similarity scores will be null: {str(e)}")
+            return None
@@ -0,0 +1,44 @@
+from typing import Optional
+from app.services.config_service import ConfigService, STAGE_EMBEDDING
+from app.utils.logger import Logger
+
+logger = Logger(__name__).get_logger()
+
+class ModelRouter:
+    """
+    Picks the OpenAI model for each pipeline stage based on ConfigService settings.
+    Small inputs go to the stage's default model, inputs above the configured size
+    threshold go to the stage's large-input model when one is set, and failed
+    structured responses can be retried on the escalation model.
+    """
+    def __init__(self, config: ConfigService):
+        self.config = config
+
+    def route(self, stage: str, input_chars: int = 0) -> str:
+        """
+        Returns the model for a stage and input size.
+
+        Args:
+            stage (str): Pipeline stage name (see STAGE_* in config_service).
+            input_chars (int): Total prompt size in characters.
+
+        Returns:
+            str: Model name.
+        """
+        if stage not in self.config.stage_models:
+            raise ValueError(f"Unknown pipeline stage '{stage}'.")
+        if input_chars > self.config.large_input_chars and stage in self.config.large_input_stage_models:
+            return self.config.large_input_stage_models[stage]
+        return self.config.stage_models[stage]
+
+    def escalate(self, stage: str, current_model: str) -> Optional[str]:
+        """
+        Returns the stronger model to retry with after a schema validation failure,
+        or None when there is nothing stronger to try.
+        """
+        if stage == STAGE_EMBEDDING:
+            return None
+        escalation_model = self.config.escalation_model
+        if not escalation_model or escalation_model == current_model:
+            return None
+        return escalation_model
@@ -0,0 +1,90 @@
+import asyncio
+import hashlib
+from typing import Any, Callable, Dict, List, Optional
+from app.services.state_backend import StateBackend, InMemoryStateBackend
+from app.utils.minhash import DEFAULT_NUM_PERM, estimate_similarity, minhash_signature
+from app.utils.logger import Logger
+
+logger = Logger(__name__).get_logger()
+
+class NearDuplicateIndex:
+    """
+    MinHash LSH index of resume texts, kept in the state backend so it spans batches (and workers
+    when the backend is shared).
+    Signatures are split into `bands` bands of `rows` values; resumes sharing any band bucket are
+    candidates and are confirmed when their estimated Jaccard similarity reaches the threshold.
+    With 20 bands x 5 rows, a pair at 0.8 similarity is found with probability > 99.9%.
+    """
+    def __init__(self, state_backend: Optional[StateBackend] = None, threshold: float = 0.85, bands: int = 20, rows: int = 5):
+        if bands * rows != DEFAULT_NUM_PERM:
+            raise ValueError(f"bands * rows must equal the signature length ({DEFAULT_NUM_PERM}).")
+        self.state_backend = state_backend or InMemoryStateBackend()
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = rows
+
+    def _band_keys(self, signature: List[int]) -> List[str]:
+        keys = []
+        for band in range(self.bands):
+            values = signature[band * self.rows:(band + 1) * self.rows]
+            keys.append(hashlib.md5(",".join(map(str, values)).encode("ascii")).hexdigest()[:16])
+        return keys
+
+    async def contains_async(self, document_id: str) -> bool:
+        if self.state_backend.does_io:
+            return await asyncio.to_thread(self.contains, document_id)
+        return self.contains(document_id)
+
+    async def find_or_add_async(self, document_id: str, label: str, load_text: Callable[[], str]) -> Optional[Dict[str, Any]]:
+        """
+        find_or_add for async code: with a backend that does I/O the whole lookup runs in a worker thread.
+        """
+        if self.state_backend.does_io:
+            return await asyncio.to_thread(self.find_or_add, document_id, label, load_text)
+        return self.find_or_add(document_id, label, load_text)
+
+    def contains(self, document_id: str) -> bool:
+        """
+        Whether the document is already indexed, i.e. find_or_add won't need its text.
+        """
+        return self.state_backend.get("near_duplicate:documents", document_id) is not None
+
+    def find_or_add(self, document_id: str, label: str, load_text: Callable[[], str]) -> Optional[Dict[str, Any]]:
+        """
+        Returns the representative ({"document_id", "label", "similarity"}) of the most similar indexed
+        document at or above the threshold; otherwise indexes this document and returns None.
+        A document already in the index is answered from the index without calling load_text.
+        """
+        known = self.state_backend.get("near_duplicate:documents", document_id)
+        if known is not None:
+            return known.get("duplicate_of")
+
+        signature = minhash_signature(load_text())
+        if signature is None:
+            return None
+        band_keys = self._band_keys(signature)
+
+        candidates = set()
+        for band, key in enumerate(band_keys):
+            candidates.update(self.state_backend.get(f"near_duplicate:band{band}", key) or [])
+        best = None
+        for candidate_id in candidates:
+            candidate = self.state_backend.get("near_duplicate:documents", candidate_id)
+            if candidate is None or candidate.get("duplicate_of"):
+                continue
+            similarity = estimate_similarity(signature, candidate["signature"])
+            if similarity >= self.threshold and (best is None or similarity > best["similarity"]):
+                best = {"document_id": candidate_id, "label": candidate["label"], "similarity": round(similarity, 3)}
+
+        if best:
+            logger.info(f"'{label}' is a near-duplicate of '{best['label']}' (similarity {best['similarity']}).")
+            # Remember the link so the next lookup of this exact document is a single read
+            self.state_backend.set("near_duplicate:documents", document_id, {"label": label, "duplicate_of": best})
+            return best
+
+        self.state_backend.set("near_duplicate:documents", document_id, {"label": label, "signature": signature})
+        for band, key in enumerate(band_keys):
+            members = self.state_backend.get(f"near_duplicate:band{band}", key) or []
+            if document_id not in members:
+                self.state_backend.set(f"near_duplicate:band{band}", key, members + [document_id])
+        return None
@@ -0,0 +1,309 @@
+import textwrap
+from typing import Dict, Tuple
+from app.utils.logger import Logger
+
+logger = Logger(__name__).get_logger()
+
+class PromptTemplate:
+    """
+    A versioned system/user prompt pair.
+
+    The system template holds the static instructions and may only use variables that change
+    with the *shape* of a request (e.g. the selected fields), never per document or per day.
+    Everything that varies per call (date, document text, criteria) goes into the user template,
+    placed last. That keeps the longest possible prefix identical across calls so the provider's
+    automatic prompt-prefix cache can serve it.
+    """
+    def __init__(self, name: str, version: int, system: str, user: str):
+        self.name = name
+        self.version = version
+        self.system = textwrap.dedent(system).strip()
+        self.user = textwrap.dedent(user).strip()
+
+    @property
+    def key(self) -> str:
+        """
+        Identifier used in cache keys; changes whenever the template is revised.
+        """
+        return f"{self.name}@v{self.version}"
+
+    def render(self, system_vars: Dict[str, str] = None, **user_vars) -> Tuple[str, str]:
+        """
+        Renders the template and returns (system_prompt, user_prompt).
+        Paragraphs of the user prompt that already appear verbatim in the system prompt are dropped.
+        """
+        system_prompt = self.system.format(**(system_vars or {}))
+        user_prompt = self.user.format(**user_vars)
+        return system_prompt, dedupe_blocks(system_prompt, user_prompt)
+
+
+def dedupe_blocks(reference: str, text: str) -> str:
+    """
+    Removes blank-line separated blocks of text that are already present in reference.
+    """
+    seen = {block.strip() for block in reference.split("\n\n") if block.strip()}
+    kept = [block for block in text.split("\n\n") if block.strip() and block.strip() not in seen]
+    return "\n\n".join(kept)
+
+
+_REGISTRY: Dict[str, PromptTemplate] = {}
+
+def register_prompt(template: PromptTemplate) -> PromptTemplate:
+    if template.name in _REGISTRY:
+        raise ValueError(f"Prompt template '{template.name}' is already registered.")
+    _REGISTRY[template.name] = template
+    return template
+
+def get_prompt(name: str) -> PromptTemplate:
+    """
+    Returns the registered template with the given name.
+    """
+    return _REGISTRY[name]
+
+def list_prompts() -> Dict[str, str]:
+    """
+    Returns template name -> versioned key for every registered template.
+    """
+    return {name: template.key for name, template in _REGISTRY.items()}
+
+
+# 📌 **Resume extraction (/api/parse-resume/)**
+register_prompt(PromptTemplate(
+    name="resume_extraction",
+    version=1,
+    system="""
+        You are an AI model specializing in extracting structured information from resumes.
+        Parse the text and produce a JSON structure with these top-level fields, each of the following keys must be present:
+        {field_lines}
+
+        Follow these instructions:
+        {instruction_lines}
+    """,
+    user="""
+        Extract structured information from this resume text:
+        {text}
+    """,
+))
+
+# 📌 **Resume extraction for scoring (/api/score-resumes/)**
+register_prompt(PromptTemplate(
+    name="scoring_resume_extraction",
+    version=1,
+    system="""
+        You are an AI model specializing in extracting structured information from resumes.
+        Parse the text and produce a JSON structure with these top-level fields, each of the following keys must be present:
+        1) candidate_name (string) — Full name, ensure spaces between first and last names if applicable.
+        2) email_address (string) - The email should be a valid email address with a "@" symbol and a domain name (gmail, outlook, etc..).
+        3) phone_number (string) - should be a valid phone number with country codes (default is +91 if none given) first, followed by a space and then the number.
+        4) experiences (array of objects):
+            Each experience must include:
+            - title (string),
+            - company (string),
+            - description (string),
+            - date_start (string),
+            - date_end (string),
+            - skills (array of strings),
+            - tasks (array of strings)
+        5) educations (array of objects):
+            - institution (string),
+            - title (string),
+            - date_start (string),
+            - date_end (string),
+            - skills (string),
+            - tasks (string)
+        6) social_urls (array of objects, each with:
+            - type (string),
+            - url (string)
+        7) languages (array of objects, each with:
+            - name (string)
+        8) skills (object containing 'primary_skills' (array of strings) and 'secondary_skills' (array of strings))
+        9) certifications (array of objects, each with:
+            - name (string) any sort of online or offline certification or courses done by the candidate.
+
+        Follow these instructions:
+        1. Parse the text and extract structured information according to the keys mentioned above.
+        2. Copy date_start and date_end exactly as written (e.g. "Jan 2020", "03/2019", "Present"). Do not calculate any durations.
+        3. Ensure no missing fields, and if any information is not provided, use null or empty arrays.
+        4. If no skills are explicitly or less than 10 are mentioned in the resume, generate a total of 10 relevant skills based on the candidate's experience and education.
+    """,
+    user="""
+        Extract structured information from this resume text:
+        {text}
+    """,
+))
+
+# 📌 **Job description extraction (/api/parse-job-description/)**
+register_prompt(PromptTemplate(
+    name="jd_extraction",
+    version=1,
+    system="""
+        You are an AI model specialized in extracting structured job descriptions.
+        Ensure accurate data extraction and return structured JSON output.
+        Today's date is given at the end of the user message. Follow these rules:
+
+        {rules}
+
+        Ensure structured formatting, extract all key details, and infer missing information where applicable.
+    """,
+    user="""
+        Extract structured job description details from the following text:
+
+        {text}
+
+        Today's date is {today_date}.
+    """,
+))
+
+# 📌 **Job description extraction for enhancement (/api/job-description-enhance/)**
+register_prompt(PromptTemplate(
+    name="jd_enhancer_extraction",
+    version=1,
+    system="""
+        You are an AI model specialized in extracting structured job descriptions.
+        Ensure accurate data extraction and return structured JSON output without any contextual loss of information.
+        Today's date is given at the end of the user message. Follow these rules:
+
+        1. **Extract Fields**:
+           - **industry_name**: Extract the industry of the job (e.g., "Technology", "Healthcare", "Finance"). If not mentioned, mark as "Not mentioned".
+           - job_title: Extract the most relevant job title.
+           - job_description: Provide the full job description text without any contextual loss, with a word limit of 400-500 words.
+           - required_skills:
+             a. Identify explicitly mentioned skills.
+             b. Infer essential skills based on job context.
+           - min_work_experience:
+             a. If a minimum experience requirement is stated, extract it.
+             b. If experience is not explicitly mentioned, infer based on seniority level.
+        2. **Skill Extraction**:
+           - Extract both technical and soft skills.
+           - Include tools, technologies, and methodologies mentioned.
+        3. **Work Experience Calculation**:
+           - Ensure the experience field is formatted in numeric terms (e.g., '2 years' or '5+ years').
+           - Infer experience if not explicitly stated using industry norms.
+        4. **Ensure Accuracy**:
+           - Do not leave fields blank. Provide estimates or mark as 'Not mentioned' where needed.
+           - Use contextual inference for missing values.
+        5. **Formatting**:
+           - Ensure structured JSON output with no missing fields.
+           - Provide clean, human-readable formatting.
+
+        Ensure structured formatting, extract all key details, and infer missing information where applicable.
+    """,
+    user="""
+        Extract structured job description details from the following text without contextual loss of any information:
+
+        {text}
+
+        Today's date is {today_date}.
+    """,
+))
+
+# 📌 **Job description enhancement**
+register_prompt(PromptTemplate(
+    name="jd_enhancement",
+    version=1,
+    system="""
+        You are an AI expert at refining and enhancing job descriptions.
+        Enhance clarity, structure, and detail of job descriptions.
+        ENSURE NO CONTEXTUAL LOSS IS DONE AT ALL.
+
+        **Enhancement Guidelines**:
+        - Responsibilities: Expand to **at least 10** clear, specific duties.
+        - Required Skills: Identify **at least 15** relevant skills (technical & non-technical).
+        - Key Metrics: Define **at least 10** measurable KPIs.
+        - Ensure industry standards and structured formatting.
+
+        Format the output in structured JSON format.
+    """,
+    user="""
+        Enhance this job description to be more structured and complete.
+        ENSURE NO CONTEXTUAL LOSS IS DONE AT ALL:
+
+        {structured_data}
+    """,
+))
+
+# 📌 **Sample candidate generation**
+register_prompt(PromptTemplate(
+    name="candidate_generation",
+    version=1,
+    system="""
+        Generate six candidate profiles with varying qualification levels for the given job description.
+
+        **Candidate Fit Levels**:
+        - 10/10: Perfect match
+        - 8/10: Strong match
+        - 6/10: Moderate match
+        - 4/10: Below average
+        - 2/10: Weak match
+        - 0/10: Not a fit
+
+        Structure output as JSON.
+    """,
+    user="""
+        Generate sample candidates for this job description:
+
+        {enhanced_jd}
+    """,
+))
+
+# 📌 **Resume scoring**
+# The shared criteria (user input, enhanced JD, sample candidates) come before the per-resume
+# content, so every resume in a batch reuses the same cached prefix.
+_RESUME_SCORING_SYSTEM = """
+        You are an AI tasked with evaluating resumes in relation to an user input (more priority), enhanced job description (second priority) and a set of sample candidates. The candidate's resume should be analyzed thoroughly, including both technical and non-technical aspects, and compared with the job description as well as the dummy candidates.
+
+        Your task is to perform a deep analysis of the candidate's resume and compare it to both the enhanced job description and the sample candidates. Every detail in the resume should be examined carefully, including skills, experiences, education, certifications, and any other relevant information. You need to assess the alignment of the candidate's profile with the job description and the sample candidates.
+
+        The analysis should include:
+        - Identification of any missing skills or experience gaps.
+        - A detailed summary of what the candidate possesses in terms of qualifications, expertise, and suitability for the role.
+        - A comparison of the candidate to the closest matching sample candidate from the generated set.
+        - Recommendations for improvement to help the candidate better match the job description.
+
+        **Scoring Criteria:**
+        1. **Skill Match**: Assess both technical and soft skills mentioned in the resume.
+        2. **Experience Relevance**: Evaluate how well the candidate's past roles and industry experience align with the job description and sample candidates.
+        3. **Education & Certifications**: Check if the candidate's education and certifications match the requirements of the job description.
+        4. **Keyword Similarity**: Analyze the ATS (Applicant Tracking System) optimization by checking how well the resume matches keywords in the job description.
+
+        **Output Format:**
+        - **candidate_name**: Name of the candidate extracted from the resume.
+        - **resume_score**: A score assigned to the resume on a scale from 0 to 10 based on how well it aligns with the job description and sample candidates.
+        - **gap_analysis**: A list of missing skills or experience gaps identified in the candidate's resume.
+        - **candidate_summary**: A detailed summary of the candidate's qualifications, experience, and suitability for the job.
+        - **recommendations**: A set of recommendations for the candidate to improve their alignment with the job description.
+"""
+
+register_prompt(PromptTemplate(
+    name="resume_scoring",
+    version=1,
+    system=_RESUME_SCORING_SYSTEM,
+    user="""
+        Enhanced Job Description + User Input + Matching Candidates: {combined_criteria}
+
+        Evaluate the following resume against the **Enhanced Job Description** and **Sample Candidates**.
+
+        {candidate_context}
+
+        Resume details: {resume}
+    """,
+))
+
+# 📌 **Packed resume scoring**
+# Several resumes per call: the shared criteria are sent once per pack instead of once per resume.
+register_prompt(PromptTemplate(
+    name="resume_scoring_packed",
+    version=1,
+    system=_RESUME_SCORING_SYSTEM + """
+        **Several Resumes:**
+        You will receive several resumes, each introduced by its resume_id. Evaluate every resume on its own, exactly as if it were the only one; never compare the resumes with each other or let one influence another's score.
+        Return one entry in **scored_resumes** per resume, in the order given, with its **resume_id** copied exactly.
+    """,
+    user="""
+        Enhanced Job Description + User Input + Matching Candidates: {combined_criteria}
+
+        Evaluate each of the following resumes against the **Enhanced Job Description** and **Sample Candidates**.
+
+        {resumes}
+    """,
+))
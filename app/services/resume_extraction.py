@@ -1,120 +1,235 @@
-from app.utils.file_parser import parse_pdf_or_docx
+from app.utils.file_parser import extract_normalized_text_async
 from app.services.gpt_service import GPTService
-from app.services.config_service import ConfigService
+from app.services.config_service import STAGE_RESUME_EXTRACTION
 from io import BytesIO
 from app.utils.logger import Logger
-from app.models.schemas import ResumeSchema
-from datetime import datetime
-from typing import List, Dict
+from app.models.schemas import ResumeSchema, build_partial_schema
+from app.services.prompt_registry import get_prompt
+from app.services.chunked_extraction import plan_chunks, extract_chunks, merge_partials, merge_skill_sets
+from app.utils.section_chunker import RESUME_SECTION_HEADINGS
+from app.utils.date_parser import calculate_total_duration
+from typing import AsyncIterator, List, Dict, Optional, Tuple
 
 logger = Logger(__name__).get_logger()
 
+# Prompt line for each top-level ResumeSchema field; only the requested ones are sent to GPT.
+RESUME_FIELD_INSTRUCTIONS = {
+    "candidate_name": "candidate_name (string) — Full name, ensure spaces between first and last names if applicable.",
+    "email_address": "email_address (string) - The email should be a valid email address with a \"@\" symbol and a domain name (gmail, outlook, etc..).",
+    "phone_number": "phone_number (string) - should be a valid phone number with country codes (default is +91 if none given) first, followed by a space and then the number.",
+    "experiences": """experiences (array of objects):
+    Each experience must include:
+    - key (string),
+    - title (string),
+    - description (string),
+    - date_start (string),
+    - date_end (string),
+    - skills (array of strings),
+    - certifications (array of strings),
+    - courses (array of strings),
+    - tasks (array of strings),
+    - languages (array of strings),
+    - interests (array of strings),
+    - company (string)""",
+    "educations": """educations (array of objects, similar to experiences):
+    - key (string),
+    - title (string),
+    - description (string),
+    - date_start (string),
+    - date_end (string),
+    - school (string)""",
+    "social_urls": """social_urls (array of objects, each with:
+    - type (string),
+    - url (string)""",
+    "languages": """languages (array of objects, each with:
+    - name (string)""",
+    "skills": "skills (object containing 'primary_skills' (array of strings) and 'secondary_skills' (array of strings))",
+}
+
+# Fields each resume section provides when a long resume is extracted chunk by chunk;
+# the overview chunk (contact block and all links) provides the rest
+RESUME_SECTION_FIELDS = {
+    "experience": ("experiences",),
+    "education": ("educations",),
+    "skills": ("skills",),
+    "languages": ("languages",),
+    "certifications": ("certifications",),
+}
+RESUME_OVERVIEW_FIELDS = ("candidate_name", "email_address", "phone_number", "social_urls")
+
+# Entries from different chunks with the same values for these keys are duplicates
+RESUME_LIST_IDENTITIES = {
+    "experiences": ("company", "title", "date_start"),
+    "educations": ("Insitution", "title", "date_start"),
+    "social_urls": ("url",),
+    "languages": ("name",),
+    "certifications": ("name",),
+}
+
+# Duration fields are computed locally from the dates of the listed entries, never generated by GPT
+DURATION_FIELDS = {"work_experience": "experiences", "educations_duration": "educations"}
+
+
+def extraction_fields(selected: Tuple[str, ...]) -> Tuple[str, ...]:
+    """
+    ResumeSchema fields GPT has to generate for a selection: duration fields are replaced by
+    the entries their dates come from.
+    """
+    needed = {DURATION_FIELDS.get(name, name) for name in selected}
+    return tuple(name for name in ResumeSchema.model_fields if name in needed)
+
+
+def add_local_durations(structured_data: Dict, selected: Tuple[str, ...]) -> Dict:
+    """
+    Computes the selected duration fields from the extracted dates and returns the selected
+    fields in ResumeSchema order.
+    """
+    result = {}
+    for name in ResumeSchema.model_fields:
+        if name not in selected:
+            continue
+        if name in DURATION_FIELDS:
+            entries = structured_data.get(DURATION_FIELDS[name]) or []
+            result[name] = calculate_total_duration(
+                [{'date_start': entry.get('date_start'), 'date_end': entry.get('date_end')} for entry in entries]
+            )
+        else:
+            result[name] = structured_data.get(name)
+    return result
+
 class ResumeParser:
     """
     Service for extracting structured information from resumes.
     """
-    def __init__(self):
+    def __init__(self, gpt_service: Optional[GPTService] = None):
         """
         Initializes the Resume Parser with GPT integration.
+
+        Args:
+            gpt_service (GPTService, optional): Shared GPT client. A new one is created when omitted.
         """
         logger.info("ResumeParser initialized successfully.")
-        config = ConfigService()
-        self.gpt_service = GPTService()
+        self.gpt_service = gpt_service or GPTService()
 
-    async def parse_resume(self, file_buffer: BytesIO, filename: str):
+    async def parse_resume(self, file_buffer: BytesIO, filename: str, fields: Optional[Tuple[str, ...]] = None):
         """
         Parses a resume file and extracts structured information.
         Args:
             file_buffer (BytesIO): The resume file buffer.
             filename (str): Name of the uploaded resume file.
+            fields (Tuple[str, ...], optional): Top-level ResumeSchema fields to extract. All fields when omitted.
         
         Returns:
             Dict containing structured resume data.
         """
         try:
-            text = parse_pdf_or_docx(file_buffer, filename)
-            today_date = datetime.now().strftime("%Y-%m-%d")
-
-            
-            system_prompt = f"""
-            You are an AI model specializing in extracting structured information from resumes.
-            Parse the text and produce a JSON structure with these top-level fields, each of the following keys must be present:
-            1) candidate_name (string) — Full name, ensure spaces between first and last names if applicable.
-            2) email_address (string) - The email should be a valid email address with a "@" symbol and a domain name (gmail, outlook, etc..).
-            3) phone_number (string) - should be a valid phone number with country codes (default is +91 if none given) first, followed by a space and then the number.
-            4) work_experience (object containing 'years' (number) and 'months' (number)) - Ensure that overlapping work periods are handled correctly.
-            5) educations_duration (object containing 'years' (number) and 'months' (number)) — Calculate the correct total duration for education.
-            6) experiences (array of objects):
-                Each experience must include:
-                - key (string),
-                - title (string),
-                - description (string),
-                - date_start (string),
-                - date_end (string),
-                - skills (array of strings),
-                - certifications (array of strings),
-                - courses (array of strings),
-                - tasks (array of strings),
-                - languages (array of strings),
-                - interests (array of strings),
-                - company (string)
-            7) educations (array of objects, similar to experiences):
-                - key (string),
-                - title (string),
-                - description (string),
-                - date_start (string),
-                - date_end (string),
-                - school (string)
-            8) social_urls (array of objects, each with:
-                - type (string),
-                - url (string)
-            9) languages (array of objects, each with:
-                - name (string)
-            10) skills (object containing 'primary_skills' (array of strings) and 'secondary_skills' (array of strings))
-
-            Key instructions for duration calculations:
-            - Calculate work_experience and educations_duration based on the start and end dates. Ensure that consecutive periods (without gaps) are treated as distinct and add up the durations without including the gap between roles.
-            - If "present," "ongoing," or similar terms like these are mentioned, then use today's date {today_date} as the date_end and calculate the duration accordingly.
-            """
-
-            
-            user_prompt = f"""
-            Extract structured information from this resume text:
-            {text}
-            Follow these instructions:
-            1. Parse the text and extract structured information according to the keys mentioned above.
-            2. Ensure that the total work experience is calculated accurately by accounting for overlaps and distinct periods.
-            3. Handle ongoing periods by comparing "present" with today's date and calculating the accurate duration.
-            4. For overlapping roles, calculate the total unique time worked without double-counting.
-            5. For education durations, calculate accurately.
-            6. Ensure no missing fields, and if any information is not provided, use null or empty arrays.
-            7. Return a valid JSON output with accurate dates and durations.
-            8. If no skills are explicitly or less than 10 are mentioned in the resume, generate a total of 10 relevant skills based on the candidate's experience and education.
-            """
-
-            
-            structured_data = await self.gpt_service.extract_with_prompts(
-                system_prompt=system_prompt,
-                user_prompt=user_prompt,
-                response_schema=ResumeSchema
-            )
-
-            
-            if structured_data.get('experiences'):
-                experiences_array = structured_data['experiences']
-                if not isinstance(experiences_array, list):
-                    experiences_array = [experiences_array]
-                
-                structured_data['work_experience'] = self.calculate_total_work_experience(
-                    [{'date_start': exp['date_start'], 'date_end': exp['date_end']} for exp in experiences_array]
+            config = self.gpt_service.config
+            text = await extract_normalized_text_async(file_buffer, filename, config.max_document_chars)
+            selected = fields or tuple(ResumeSchema.model_fields)
+            gpt_fields = extraction_fields(selected)
+
+            plan = None
+            if len(text) >= config.chunking_min_chars:
+                plan = plan_chunks(
+                    text, RESUME_SECTION_HEADINGS, RESUME_SECTION_FIELDS, RESUME_OVERVIEW_FIELDS,
+                    gpt_fields, ResumeSchema, config.chunk_max_chars
                 )
+            if plan:
+                # Long resume: one call per section chunk, in parallel, then merged
+                partials = await extract_chunks(plan, self.extract_fields)
+                structured_data = merge_partials(partials, RESUME_LIST_IDENTITIES, {"skills": merge_skill_sets})
+            else:
+                structured_data = await self.extract_fields(text, gpt_fields)
 
-            return structured_data  
+            # Work and education durations are computed locally from the extracted dates
+            return add_local_durations(structured_data, selected)
 
         except Exception as e:
             logger.error(f"Error parsing resume file '{filename}': {str(e)}", exc_info=True)
             raise
 
+    async def extract_fields(self, text: str, gpt_fields: Tuple[str, ...]) -> Dict:
+        """
+        Extracts the given top-level ResumeSchema fields from resume text in one GPT call.
+        """
+        system_prompt, user_prompt = self.extraction_prompts(text, gpt_fields)
+        return await self.gpt_service.extract_with_prompts(
+            system_prompt=system_prompt,
+            user_prompt=user_prompt,
+            response_schema=build_partial_schema(ResumeSchema, gpt_fields),
+            stage=STAGE_RESUME_EXTRACTION
+        )
+
+    def extraction_prompts(self, text: str, gpt_fields: Tuple[str, ...]) -> Tuple[str, str]:
+        """
+        System and user prompt extracting the given top-level ResumeSchema fields from resume text.
+        """
+        field_lines = "\n".join(
+            f"{i}) {RESUME_FIELD_INSTRUCTIONS.get(name, self._describe_field(name))}"
+            for i, name in enumerate(gpt_fields, start=1)
+        )
+        instructions = ["Parse the text and extract structured information according to the keys mentioned above."]
+        if "experiences" in gpt_fields or "educations" in gpt_fields:
+            instructions.append(
+                "Copy date_start and date_end exactly as written (e.g. \"Jan 2020\", \"03/2019\", \"Present\"). Do not calculate any durations."
+            )
+        instructions.append("Ensure no missing fields, and if any information is not provided, use null or empty arrays.")
+        if "skills" in gpt_fields:
+            instructions.append(
+                "If no skills are explicitly or less than 10 are mentioned in the resume, generate a total of 10 relevant skills based on the candidate's experience and education."
+            )
+        instruction_lines = "\n".join(f"{i}. {line}" for i, line in enumerate(instructions, start=1))
+        return get_prompt("resume_extraction").render(
+            system_vars={"field_lines": field_lines, "instruction_lines": instruction_lines},
+            text=text
+        )
+
+    async def stream_resume(self, text: str, fields: Optional[Tuple[str, ...]] = None) -> AsyncIterator[Dict]:
+        """
+        Streamed variant of parse_resume for already extracted text. Yields {"field", "value"} for each
+        selected field as soon as GPT has generated it (a duration field as soon as its entries are complete),
+        then {"result"} with the same payload parse_resume returns.
+        Long resumes are extracted chunk by chunk, which can't stream; their fields all arrive with the result.
+        """
+        config = self.gpt_service.config
+        selected = fields or tuple(ResumeSchema.model_fields)
+        gpt_fields = extraction_fields(selected)
+
+        plan = None
+        if len(text) >= config.chunking_min_chars:
+            plan = plan_chunks(
+                text, RESUME_SECTION_HEADINGS, RESUME_SECTION_FIELDS, RESUME_OVERVIEW_FIELDS,
+                gpt_fields, ResumeSchema, config.chunk_max_chars
+            )
+        if plan:
+            partials = await extract_chunks(plan, self.extract_fields)
+            result = add_local_durations(merge_partials(partials, RESUME_LIST_IDENTITIES, {"skills": merge_skill_sets}), selected)
+            for name, value in result.items():
+                yield {"field": name, "value": value}
+            yield {"result": result}
+            return
+
+        system_prompt, user_prompt = self.extraction_prompts(text, gpt_fields)
+        async for event in self.gpt_service.stream_with_prompts(
+            system_prompt=system_prompt,
+            user_prompt=user_prompt,
+            response_schema=build_partial_schema(ResumeSchema, gpt_fields),
+            stage=STAGE_RESUME_EXTRACTION
+        ):
+            if "result" in event:
+                yield {"result": add_local_durations(event["result"], selected)}
+                continue
+            # A generated field is sent when selected, and so are the durations computed from it
+            for name in ResumeSchema.model_fields:
+                if name in selected and (name == event["field"] or DURATION_FIELDS.get(name) == event["field"]):
+                    yield {"field": name, "value": add_local_durations({event["field"]: event["value"]}, (name,))[name]}
+
+    def _describe_field(self, name: str) -> str:
+        """
+        Fallback prompt line for schema fields without a dedicated instruction.
+        """
+        return f"{name} — {ResumeSchema.model_fields[name].description}"
+
     def calculate_total_work_experience(self, experiences: List[Dict[str, str]]) -> Dict[str, int]:
         """
         Calculate the total work experience by handling overlapping periods and calculating the duration in years and months.
@@ -125,48 +240,4 @@ class ResumeParser:
         Returns:
         - A dictionary with the total years and months of work experience.
         """
-        if not experiences:
-            print("No experiences provided")
-            return {'years': 0, 'months': 0}
-
-        total_months = 0
-        parsed_experiences = [
-            {'start': self.parse_date(exp['date_start']), 'end': self.parse_date(exp['date_end'])} for exp in experiences
-        ]
-        parsed_experiences.sort(key=lambda x: x['start'])
-
-        
-        current_start = parsed_experiences[0]['start']
-        current_end = parsed_experiences[0]['end']
-
-        for i in range(1, len(parsed_experiences)):
-            start = parsed_experiences[i]['start']
-            end = parsed_experiences[i]['end']
-            
-            if start <= current_end:
-                
-                current_end = max(current_end, end)
-            else:
-                
-                total_months += (current_end.year - current_start.year) * 12 + current_end.month - current_start.month
-                current_start = start
-                current_end = end
-        
-        
-        total_months += (current_end.year - current_start.year) * 12 + current_end.month - current_start.month
-        
-        
-        years = total_months // 12
-        months = total_months % 12
-
-        return {'years': years, 'months': months}
-
-    def parse_date(self, date_string: str) -> datetime:
-        """
-        Parses a date string in the format 'YYYY-MM-DD' and returns a datetime object.
-        If the date string is empty or invalid, the current date is returned.
-        """
-        try:
-            return datetime.strptime(date_string, '%Y-%m-%d')
-        except ValueError:
-            return datetime.now()  # If the date is invalid, return the current date
+        return calculate_total_duration(experiences)
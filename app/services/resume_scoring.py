@@ -1,30 +1,83 @@
-from app.utils.file_parser import parse_pdf_or_docx
+from app.utils.file_parser import extract_normalized_text, extract_normalized_text_async
 from app.services.gpt_service import GPTService
-from app.services.config_service import ConfigService
+from app.services.embedding_backends import EmbeddingError
+from app.services.config_service import STAGE_RESUME_EXTRACTION, STAGE_RESUME_SCORING
+from app.services.scoring_cache import ScoringCache, content_hash
+from app.services.near_duplicate_index import NearDuplicateIndex
+from app.services.candidate_index import CandidateIndex
+from app.services.skill_taxonomy import get_skill_taxonomy
+from app.services.prompt_registry import get_prompt
 from io import BytesIO
+from app.utils.deadline import DeadlineExceeded
+from app.utils.parse_sandbox import DocumentLimitExceeded
 from app.utils.logger import Logger
-from app.models.schemas import ResumeSchema, ResumeScoringSchema
-from datetime import datetime
-from typing import List, Dict, Any
+from app.models.schemas import ResumeSchema, ResumeScoringSchema, PackedResumeScoringSchema, build_partial_schema
+from app.services.resume_extraction import extraction_fields, add_local_durations
+from app.utils.date_parser import DURATION_RULES_VERSION, calculate_total_duration
+from typing import List, Dict, Any, Optional, Set
+import json
 import numpy as np
 
 logger = Logger(__name__).get_logger()
 
+# Versioned prompt keys; bump the template version in prompt_registry whenever a prompt or
+# schema changes so cached results are not reused
+# Cached extractions also hold the locally computed durations
+RESUME_EXTRACTION_PROMPT_VERSION = f"{get_prompt('scoring_resume_extraction').key}:durations-v{DURATION_RULES_VERSION}"
+SCORING_PROMPT_VERSION = get_prompt("resume_scoring").key
+PACKED_SCORING_PROMPT_VERSION = get_prompt("resume_scoring_packed").key
+
+# Expected completion tokens per resume in a packed scoring call, bounds the pack size with SCORING_PACK_MAX_OUTPUT_TOKENS
+PACKED_OUTPUT_TOKENS_PER_RESUME = 800
+
 def cosine_similarity(vec1: np.ndarray, vec2: np.ndarray) -> float:
     if not np.any(vec1) or not np.any(vec2):
         return 0.0
     return float(np.dot(vec1, vec2) / (np.linalg.norm(vec1) * np.linalg.norm(vec2)))
 
+def cosine_similarity_matrix(rows: np.ndarray, columns: np.ndarray) -> np.ndarray:
+    """
+    Cosine similarity of every row vector against every column vector (len(rows) x len(columns)) in one
+    matrix product. Zero vectors score 0, like cosine_similarity.
+    """
+    def normalize(matrix: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+    return normalize(rows) @ normalize(columns).T
+
+def compact_resume(value: Any) -> Any:
+    """
+    Drops empty fields (None, "", [], {}) recursively, so a packed scoring prompt fits more resumes.
+    """
+    if isinstance(value, dict):
+        compacted = {key: compact_resume(item) for key, item in value.items()}
+        return {key: item for key, item in compacted.items() if item not in (None, "", [], {})}
+    if isinstance(value, list):
+        compacted = [compact_resume(item) for item in value]
+        return [item for item in compacted if item not in (None, "", [], {})]
+    return value
+
 class ResumeScoringService:
     """
     Service for extracting structured resume details, scoring resumes against the enhanced job description,
     and returning a structured comparison report.
     """
-    def __init__(self, job_description_enhancer):
+    def __init__(
+        self,
+        job_description_enhancer,
+        gpt_service: Optional[GPTService] = None,
+        scoring_cache: Optional[ScoringCache] = None,
+        near_duplicate_index: Optional[NearDuplicateIndex] = None,
+        candidate_index: Optional[CandidateIndex] = None
+    ):
         logger.info("ResumeScoringService initialized successfully.")
-        config = ConfigService()
-        self.gpt_service = GPTService()
+        self.gpt_service = gpt_service or GPTService()
+        self.scoring_cache = scoring_cache or ScoringCache()
         self.job_description_enhancer = job_description_enhancer
+        # Near-duplicate resumes share their representative's cache entries; None disables detection
+        self.near_duplicate_index = near_duplicate_index
+        # Previously scored candidates, looked up by experience bucket and skills for the scoring prompt
+        self.candidate_index = candidate_index
 
     def map_experience_to_bucket(self, years: int) -> str:
         if years < 1:
@@ -40,33 +93,317 @@ class ResumeScoringService:
         else:
             return "16+"
 
-    def map_skills_to_conditional(self, primary_skills: List[str], secondary_skills: List[str]) -> List[Dict[str, Any]]:
-        """
-        Creates a mapping list where each entry is a dictionary with:
-            'skill': a primary skill,
-            'subskills': a list of secondary skills (filtered so that none appear in primary).
-        """
-        primary_skills = primary_skills or []
-        secondary_skills = secondary_skills or []
-        unique_primary = []
-        for s in primary_skills:
-            if s not in unique_primary:
-                unique_primary.append(s)
-        unique_secondary = []
-        for s in secondary_skills:
-            if s not in unique_secondary:
-                unique_secondary.append(s)
-        filtered_secondary = [s for s in unique_secondary if s not in unique_primary]
-        # Remove conflicting entries as identified
-        conflicts = {"Problem Solving", "Communication", "Critical Thinking"}
-        filtered_secondary = [s for s in filtered_secondary if s not in conflicts]
-        mapping = []
-        for main_skill in unique_primary:
-            mapping.append({
-                'skill': main_skill,
-                'subskills': [{'subskill': s} for s in filtered_secondary]
-            })
-        return mapping
+    def resume_skill_set(self, resume: Dict[str, Any]) -> Set[str]:
+        """
+        Canonical skills of an extracted resume: the listed skills plus every taxonomy skill
+        mentioned in experience descriptions, tasks and skills.
+        """
+        taxonomy = get_skill_taxonomy()
+        skills = resume.get("skills") or {}
+        listed = (skills.get("primary_skills") or []) + (skills.get("secondary_skills") or [])
+        text_parts = []
+        for exp in resume.get("experiences") or []:
+            text_parts.append(exp.get("title") or "")
+            text_parts.append(exp.get("description") or "")
+            text_parts.extend(exp.get("tasks") or [])
+            text_parts.extend(exp.get("skills") or [])
+        return taxonomy.canonical_set(listed) | taxonomy.extract("\n".join(text_parts))
+
+    def jd_skill_set(self, enhanced_jd: Dict[str, Any]) -> Set[str]:
+        """
+        Canonical skills required by an enhanced job description.
+        """
+        taxonomy = get_skill_taxonomy()
+        text = "\n".join([enhanced_jd.get("role_summary", "")] + list(enhanced_jd.get("responsibilities", [])))
+        return taxonomy.canonical_set(enhanced_jd.get("required_skills", [])) | taxonomy.extract(text)
+
+    def skill_overlap(self, resume_skills: Set[str], jd_skills: Set[str]) -> Dict[str, Any]:
+        """
+        Compares canonical skill sets: matched and missing JD skills plus the share of JD skills covered.
+        """
+        matched = resume_skills & jd_skills
+        return {
+            "matched_skills": sorted(matched),
+            "missing_skills": sorted(jd_skills - resume_skills),
+            "skill_coverage": round(len(matched) / len(jd_skills), 3) if jd_skills else 0.0,
+        }
+
+    async def prepare_scoring_batch(self, user_input: str, enhancement: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Computes everything shared by the resumes of a batch for an enhancement record, by default the
+        current enhanced job description. Raises ValueError when no job description has been enhanced yet.
+        """
+        if enhancement is None:
+            enhancement = await self.job_description_enhancer.get_current_enhancement()
+        if enhancement is None:
+            raise ValueError("Enhanced Job Description not found. Run /api/job-description-enhance first.")
+
+        enhanced_jd = enhancement["enhanced_job_description"]
+        generated_candidates = enhancement["candidates"]
+        embedding_identity = self.gpt_service.embedding_backend().identity
+        jd_embedding = enhancement.get("vectorized_jd")
+        if not jd_embedding or enhancement.get("embedding_identity") != embedding_identity:
+            # Stored in another vector space (backend changed) or missing: embed the JD again for this batch
+            jd_embedding = await self.job_description_enhancer.vectorize_job_description(enhanced_jd)
+        return {
+            "generated_candidates": generated_candidates,
+            "jd_identity": enhancement["jd_identity"],
+            "jd_embedding": jd_embedding,
+            "embedding_identity": embedding_identity,
+            "user_input_hash": content_hash(user_input or ""),
+            "combined_criteria": f"{user_input}\n\n{enhanced_jd}\n\n{generated_candidates}",
+            "jd_skills": self.jd_skill_set(enhanced_jd),
+        }
+
+    async def load_resume(self, file_buffer: BytesIO, filename: str) -> Dict[str, Any]:
+        """
+        Extracts one resume file (from the cache when possible), independently of any JD.
+        Returns {"filename", "resume_hash", "extracted_resume", "duplicate"}.
+        """
+        resume_hash = content_hash(file_buffer.getvalue())
+
+        # A near-duplicate (other format or small revision of an indexed resume) is processed under its
+        # representative's hash, so extraction, scoring and embedding are all served from the cache
+        text = None
+        duplicate = None
+        if self.near_duplicate_index is not None:
+            # An indexed document is answered without its text; otherwise the text is parsed off the event loop first
+            if not await self.near_duplicate_index.contains_async(resume_hash):
+                text = await extract_normalized_text_async(file_buffer, filename, self.gpt_service.config.max_document_chars)
+            duplicate = await self.near_duplicate_index.find_or_add_async(
+                resume_hash, filename, lambda: text if text is not None else extract_normalized_text(
+                    file_buffer, filename, self.gpt_service.config.max_document_chars
+                )
+            )
+            if duplicate:
+                resume_hash = duplicate["document_id"]
+
+        extracted_resume = await self.scoring_cache.get_async("extraction", resume_hash, RESUME_EXTRACTION_PROMPT_VERSION)
+        if extracted_resume is None:
+            extracted_resume = await self.parse_resume(file_buffer, filename, text)
+            await self.scoring_cache.set_async("extraction", extracted_resume, resume_hash, RESUME_EXTRACTION_PROMPT_VERSION)
+        return {"filename": filename, "resume_hash": resume_hash, "extracted_resume": extracted_resume, "duplicate": duplicate}
+
+    async def score_resume_file(self, file_buffer: BytesIO, filename: str, batch: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Parses and scores one resume file against a batch prepared with prepare_scoring_batch.
+        """
+        return await self.score_loaded_resume(await self.load_resume(file_buffer, filename), batch)
+
+    async def score_loaded_resume(
+        self,
+        loaded: Dict[str, Any],
+        batch: Dict[str, Any],
+        similarity: Optional[float] = None,
+        resume_scoring: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Scores a resume returned by load_resume against a batch. A similarity computed by the caller
+        (e.g. from a similarity matrix) is used as is; otherwise it is computed or read from the cache.
+        Likewise a scoring the caller already has (e.g. from a packed call) replaces the scoring call.
+        """
+        resume_hash = loaded["resume_hash"]
+        extracted_resume = loaded["extracted_resume"]
+        duplicate = loaded["duplicate"]
+
+        candidate_name = extracted_resume.get("candidate_name", "Unknown")
+        experience_years = extracted_resume.get("work_experience", {}).get("years", 0)
+        experience_bucket = self.map_experience_to_bucket(experience_years)
+        primary_skills = extracted_resume.get("skills", {}).get("primary_skills", [])
+        secondary_skills = extracted_resume.get("skills", {}).get("secondary_skills", [])
+
+        if resume_scoring is None:
+            # The similar candidates are part of the prompt, so they are part of the cache key too
+            if self.candidate_index is not None:
+                await self.candidate_index.refresh_async()
+            candidate_context = self.resume_candidate_context(extracted_resume, resume_hash)
+            context_hash = content_hash(candidate_context)
+            resume_scoring = await self.cached_score(resume_hash, batch, context_hash)
+            if resume_scoring is None:
+                resume_scoring = await self.score_resume(extracted_resume, batch["combined_criteria"], batch["generated_candidates"], candidate_context)
+                await self.scoring_cache.set_async("score", resume_scoring, resume_hash, batch["jd_identity"], batch["user_input_hash"], context_hash, SCORING_PROMPT_VERSION)
+        overall_resume_score = resume_scoring.get("resume_score", 0)
+
+        # Replaces the Neo4j candidate node and its skill/subskill links
+        if self.candidate_index is not None:
+            unique = self.job_description_enhancer.map_unique_skills(primary_skills, secondary_skills)
+            await self.candidate_index.add_async(resume_hash, candidate_name, experience_bucket, unique["skills"], unique["subskills"])
+
+        # Similarity depends on the resume and JD only, so it survives user_input changes
+        if similarity is None:
+            similarity = await self.scoring_cache.get_async("similarity", resume_hash, batch["jd_identity"], batch["embedding_identity"])
+        if similarity is None:
+            similarity = await self.compute_similarity(extracted_resume, batch["jd_embedding"], resume_hash)
+            # None means an embedding was unavailable; retry on the next request instead of caching it
+            if similarity is not None:
+                await self.scoring_cache.set_async("similarity", similarity, resume_hash, batch["jd_identity"], batch["embedding_identity"])
+        resume_scoring["cosine_similarity"] = similarity
+        resume_scoring["skill_match"] = self.skill_overlap(self.resume_skill_set(extracted_resume), batch["jd_skills"])
+        if duplicate:
+            resume_scoring["duplicate_of"] = duplicate["label"]
+            resume_scoring["duplicate_similarity"] = duplicate["similarity"]
+
+        return resume_scoring
+
+    async def score_loaded_resumes(
+        self,
+        loaded_resumes: List[Dict[str, Any]],
+        batch: Dict[str, Any],
+        similarities: Optional[List[Optional[float]]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Scores several resumes returned by load_resume against a batch, in order. With SCORING_PACK_SIZE > 1
+        the resumes without a cached score are scored several per GPT call (see score_resume_packs).
+        """
+        similarities = similarities or [None] * len(loaded_resumes)
+        scorings = [None] * len(loaded_resumes)
+        if self.gpt_service.config.scoring_pack_size > 1 and len(loaded_resumes) > 1:
+            scorings = await self.score_resume_packs(loaded_resumes, batch)
+        results = []
+        for loaded, similarity, resume_scoring in zip(loaded_resumes, similarities, scorings):
+            results.append(await self.score_loaded_resume(loaded, batch, similarity, resume_scoring))
+        return results
+
+    async def cached_score(self, resume_hash: str, batch: Dict[str, Any], context_hash: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns the cached scoring of a resume for a batch and candidate context (content_hash of
+        resume_candidate_context), from a single or a packed scoring call.
+        """
+        for version in (SCORING_PROMPT_VERSION, PACKED_SCORING_PROMPT_VERSION):
+            resume_scoring = await self.scoring_cache.get_async("score", resume_hash, batch["jd_identity"], batch["user_input_hash"], context_hash, version)
+            if resume_scoring is not None:
+                return resume_scoring
+        return None
+
+    def resume_candidate_context(self, extracted_resume: Dict[str, Any], resume_hash: str) -> str:
+        experience_bucket = self.map_experience_to_bucket(extracted_resume.get("work_experience", {}).get("years", 0))
+        skills = extracted_resume.get("skills", {})
+        unique = self.job_description_enhancer.map_unique_skills(skills.get("primary_skills", []), skills.get("secondary_skills", []))
+        return self.candidate_context(experience_bucket, unique["skills"], unique["subskills"], resume_hash)
+
+    async def score_resume_packs(self, loaded_resumes: List[Dict[str, Any]], batch: Dict[str, Any]) -> List[Optional[Dict[str, Any]]]:
+        """
+        Scores the resumes without a cached score in packs (see plan_score_packs), one GPT call per pack.
+        Returns a scoring per resume, cached or packed; None where the resume is left to score_loaded_resume
+        (a pack of one, or a resume a failed pack did not return).
+        """
+        scorings: List[Optional[Dict[str, Any]]] = [None] * len(loaded_resumes)
+        pending: Dict[str, Dict[str, Any]] = {}
+        if self.candidate_index is not None:
+            await self.candidate_index.refresh_async()
+        for index, loaded in enumerate(loaded_resumes):
+            resume_hash = loaded["resume_hash"]
+            if resume_hash in pending:
+                pending[resume_hash]["indexes"].append(index)
+                continue
+            candidate_context = self.resume_candidate_context(loaded["extracted_resume"], resume_hash)
+            context_hash = content_hash(candidate_context)
+            scorings[index] = await self.cached_score(resume_hash, batch, context_hash)
+            if scorings[index] is None:
+                pending[resume_hash] = {
+                    "resume_hash": resume_hash,
+                    "indexes": [index],
+                    "candidate_context": candidate_context,
+                    "context_hash": context_hash,
+                    "resume": json.dumps(compact_resume(loaded["extracted_resume"]), ensure_ascii=False, separators=(",", ":")),
+                }
+
+        packs = self.plan_score_packs(list(pending.values()), batch["combined_criteria"])
+        packed_calls = 0
+        for pack in packs:
+            if len(pack) < 2:
+                continue
+            packed_calls += 1
+            for entry, resume_scoring in zip(pack, await self.score_resume_pack(pack, batch["combined_criteria"])):
+                if resume_scoring is None:
+                    continue
+                await self.scoring_cache.set_async("score", resume_scoring, entry["resume_hash"], batch["jd_identity"], batch["user_input_hash"], entry["context_hash"], PACKED_SCORING_PROMPT_VERSION)
+                for index in entry["indexes"]:
+                    scorings[index] = dict(resume_scoring)
+        if pending:
+            logger.info(f"Packed scoring: {len(pending)} resumes to score, {packed_calls} packed calls ({[len(pack) for pack in packs]}).")
+        return scorings
+
+    def plan_score_packs(self, entries: List[Dict[str, Any]], combined_criteria: str) -> List[List[Dict[str, Any]]]:
+        """
+        Splits resumes into packs in order, each within SCORING_PACK_SIZE resumes, SCORING_PACK_MAX_CHARS of
+        prompt and SCORING_PACK_MAX_OUTPUT_TOKENS of expected output. A resume too large to share a pack
+        ends up alone.
+        """
+        config = self.gpt_service.config
+        max_resumes = min(config.scoring_pack_size, max(1, config.scoring_pack_max_output_tokens // PACKED_OUTPUT_TOKENS_PER_RESUME))
+        shared_chars = len(get_prompt("resume_scoring_packed").system) + len(combined_criteria)
+        packs: List[List[Dict[str, Any]]] = []
+        current: List[Dict[str, Any]] = []
+        current_chars = shared_chars
+        for entry in entries:
+            entry_chars = len(entry["candidate_context"]) + len(entry["resume"])
+            if current and (len(current) >= max_resumes or current_chars + entry_chars > config.scoring_pack_max_chars):
+                packs.append(current)
+                current, current_chars = [], shared_chars
+            current.append(entry)
+            current_chars += entry_chars
+        if current:
+            packs.append(current)
+        return packs
+
+    async def score_resume_pack(self, pack: List[Dict[str, Any]], combined_criteria: str) -> List[Optional[Dict[str, Any]]]:
+        """
+        Scores a pack of resumes in one call and returns their scorings in order. A resume missing from the
+        response is None, and so is the whole pack when the call fails or the response doesn't validate;
+        those resumes fall back to individual scoring calls (which escalate on their own).
+        """
+        resume_ids = [f"R{position}" for position in range(1, len(pack) + 1)]
+        resumes = "\n\n".join(
+            f"resume_id: {resume_id}\n{entry['candidate_context']}Resume details: {entry['resume']}"
+            for resume_id, entry in zip(resume_ids, pack)
+        )
+        system_prompt, user_prompt = get_prompt("resume_scoring_packed").render(combined_criteria=combined_criteria, resumes=resumes)
+        try:
+            response = await self.gpt_service.extract_with_prompts(
+                system_prompt=system_prompt,
+                user_prompt=user_prompt,
+                response_schema=PackedResumeScoringSchema,
+                stage=STAGE_RESUME_SCORING,
+                escalate=False
+            )
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            logger.warning(f"Packed scoring of {len(pack)} resumes failed, scoring them one by one: {str(e)}")
+            return [None] * len(pack)
+
+        by_id = {}
+        for item in response.get("scored_resumes") or []:
+            resume_id = item.pop("resume_id", None)
+            if resume_id in resume_ids and resume_id not in by_id:
+                by_id[resume_id] = item
+        if len(by_id) < len(pack):
+            logger.warning(f"Packed scoring returned {len(by_id)} of {len(pack)} resumes, scoring the rest one by one.")
+        return [by_id.get(resume_id) for resume_id in resume_ids]
+
+    def candidate_context(self, experience_bucket: str, skills: List[str], subskills: List[str], resume_hash: str) -> str:
+        """
+        Describes previously scored candidates like this resume for the scoring prompt: candidates in the same
+        experience bucket sharing the most skills, and the matches for each skill and each subskill.
+        One line per skill and one per subskill, so the context grows with the number of skills, not their product.
+        Reads the index as is; callers refresh it first (CandidateIndex.refresh_async).
+        """
+        index = self.candidate_index
+        if index is not None:
+            stored_candidates = index.stored_candidates(experience_bucket, skills, resume_hash)
+        else:
+            stored_candidates = []
+
+        similar_candidates_info = ""
+        for skill_name in skills:
+            similar = index.similar_candidates(experience_bucket, skill_name, None, resume_hash) if index else []
+            similar_candidates_info += f"Skill: {skill_name}, Matches: {similar}\n"
+        for subskill_name in subskills:
+            similar = index.similar_candidates(experience_bucket, None, subskill_name, resume_hash) if index else []
+            similar_candidates_info += f"SubSkill: {subskill_name}, Matches: {similar}\n"
+
+        return f"Stored Candidates: {stored_candidates}\nSimilar Candidates Info:\n{similar_candidates_info}"
 
     async def process_bulk_resumes(self, resume_files: List[BytesIO], filenames: List[str], user_input: str) -> List[Dict[str, Any]]:
         """
@@ -76,134 +413,146 @@ class ResumeScoringService:
          - Returns a list of scoring results for each resume.
         """
         try:
-            if "enhanced_job_description" not in self.job_description_enhancer.temp_storage:
-                raise ValueError("Enhanced Job Description not found. Run /api/job-description-enhance first.")
-
-            enhanced_jd = self.job_description_enhancer.temp_storage["enhanced_job_description"]
-            generated_candidates = self.job_description_enhancer.temp_storage["candidates"]
-
-            results = []
+            batch = await self.prepare_scoring_batch(user_input)
+            loaded_resumes = []
 
             for file_buffer, filename in zip(resume_files, filenames):
-                extracted_resume = await self.parse_resume(file_buffer, filename)
-                candidate_name = extracted_resume.get("candidate_name", "Unknown")
-                experience_years = extracted_resume.get("work_experience", {}).get("years", 0)
-                experience_bucket = self.map_experience_to_bucket(experience_years)
-
-                # Removed Neo4j dependency: creation of experience node
-
-                # As Neo4j storage is removed, we use an empty list placeholder for stored candidates.
-                stored_candidates = []
-
-                primary_skills = extracted_resume.get("skills", {}).get("primary_skills", [])
-                secondary_skills = extracted_resume.get("skills", {}).get("secondary_skills", [])
-                combined_mapping = self.map_skills_to_conditional(primary_skills, secondary_skills)
-
-                similar_candidates_info = ""
-                # For each skill mapping entry, get detailed similar candidate info (placeholder since DB is removed).
-                for mapping_entry in combined_mapping:
-                    skill_name = mapping_entry['skill']
-                    if mapping_entry['subskills']:
-                        for subskill_entry in mapping_entry['subskills']:
-                            subskill_name = subskill_entry['subskill']
-                            similar = []  # placeholder for similar candidate info
-                            similar_candidates_info += f"Skill: {skill_name}, SubSkill: {subskill_name}, Matches: {similar}\n"
-                    else:
-                        similar = []  # placeholder
-                        similar_candidates_info += f"Skill: {skill_name}, Matches: {similar}\n"
-
-                combined_criteria = f"{user_input}\n\n{enhanced_jd}\n\n{generated_candidates}\n\nStored Candidates: {stored_candidates}\nSimilar Candidates Info:\n{similar_candidates_info}"
-                resume_scoring = await self.score_resume(extracted_resume, combined_criteria, generated_candidates)
-                overall_resume_score = resume_scoring.get("resume_score", 0)
-
-                # Removed Neo4j dependency: candidate creation and linking skills/subskills
-
-                similarity = await self.compute_similarity(extracted_resume, enhanced_jd)
-                resume_scoring["cosine_similarity"] = similarity
-
-                results.append(resume_scoring)
+                loaded_resumes.append(await self.load_resume(file_buffer, filename))
+            results = await self.score_loaded_resumes(loaded_resumes, batch)
 
+            logger.info(f"Scoring cache stats: {self.scoring_cache.stats()}")
             return results
 
         except Exception as e:
             logger.error(f"Error processing resumes: {str(e)}", exc_info=True)
             raise
 
-    async def parse_resume(self, file_buffer: BytesIO, filename: str) -> Dict[str, Any]:
+    def error_detail(self, error: Exception) -> Dict[str, Any]:
+        # Documents rejected by the parsing budgets keep their structured limit details
+        return error.to_dict() if isinstance(error, DocumentLimitExceeded) else {"detail": str(error)}
+
+    async def process_resume_matrix(
+        self,
+        jd_files: List[BytesIO],
+        jd_filenames: List[str],
+        resume_files: List[BytesIO],
+        resume_filenames: List[str],
+        user_input: str,
+        top_k: int
+    ) -> Dict[str, Any]:
+        """
+        Matches a pool of resumes against several job descriptions:
+         - Enhances and embeds each JD once and extracts and embeds each resume once.
+         - Computes the resumes x JDs cosine similarity matrix in one matrix product.
+         - GPT-scores only each JD's top_k resumes by similarity; the others are ranked by similarity only.
+        Returns the matrix, a ranked table per JD and the files that could not be processed.
+        """
+        errors = []
+
+        jds = []
+        for file_buffer, filename in zip(jd_files, jd_filenames):
+            try:
+                enhancement = await self.job_description_enhancer.build_enhancement(file_buffer, filename)
+                jds.append({"filename": filename, "enhancement": enhancement, "batch": await self.prepare_scoring_batch(user_input, enhancement)})
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                logger.error(f"Error enhancing job description '{filename}': {str(e)}", exc_info=True)
+                errors.append({"filename": filename, "type": "job_description", **self.error_detail(e)})
+
+        resumes = []
+        for file_buffer, filename in zip(resume_files, resume_filenames):
+            try:
+                loaded = await self.load_resume(file_buffer, filename)
+                loaded["embedding"] = await self.resume_embedding(loaded["extracted_resume"], loaded["resume_hash"])
+                loaded["skills"] = self.resume_skill_set(loaded["extracted_resume"])
+                resumes.append(loaded)
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                logger.error(f"Error extracting resume '{filename}': {str(e)}", exc_info=True)
+                errors.append({"filename": filename, "type": "resume", **self.error_detail(e)})
+
+        # NaN marks pairs where either embedding is unavailable; they rank last and are reported as null
+        similarities = np.full((len(resumes), len(jds)), np.nan)
+        resume_rows = [index for index, resume in enumerate(resumes) if resume["embedding"]]
+        jd_columns = [index for index, jd in enumerate(jds) if jd["batch"]["jd_embedding"]]
+        if resume_rows and jd_columns:
+            similarities[np.ix_(resume_rows, jd_columns)] = cosine_similarity_matrix(
+                np.array([resumes[index]["embedding"] for index in resume_rows], dtype=np.float32),
+                np.array([jds[index]["batch"]["jd_embedding"] for index in jd_columns], dtype=np.float32)
+            )
+
+        rankings = []
+        for column, jd in enumerate(jds):
+            order = np.argsort(-np.nan_to_num(similarities[:, column], nan=-np.inf), kind="stable")
+            rows = []
+            for position, row in enumerate(order):
+                resume = resumes[row]
+                similarity = None if np.isnan(similarities[row, column]) else round(float(similarities[row, column]), 4)
+                rows.append({
+                    "filename": resume["filename"],
+                    "candidate_name": resume["extracted_resume"].get("candidate_name", "Unknown"),
+                    "cosine_similarity": similarity,
+                    "skill_match": self.skill_overlap(resume["skills"], jd["batch"]["jd_skills"]),
+                    "resume_score": None,
+                    "scored": position < top_k,
+                })
+            # The top_k are scored together, so they can share packed scoring calls
+            scored_rows = order[:top_k]
+            scorings = await self.score_loaded_resumes(
+                [resumes[row] for row in scored_rows], jd["batch"], [entry["cosine_similarity"] for entry in rows[:top_k]]
+            )
+            for entry, scoring in zip(rows, scorings):
+                entry["resume_score"] = scoring.get("resume_score", 0)
+                entry["scoring"] = scoring
+            # GPT-scored resumes first by score, then the rest by similarity (the order they are already in)
+            rows.sort(key=lambda entry: (not entry["scored"], -(entry["resume_score"] or 0)))
+            for rank, entry in enumerate(rows, start=1):
+                entry["rank"] = rank
+            rankings.append({
+                "filename": jd["filename"],
+                "job_title": jd["enhancement"]["enhanced_job_description"].get("job_title"),
+                "jd_identity": jd["batch"]["jd_identity"],
+                "ranking": rows,
+            })
+
+        logger.info(f"Scored {len(resumes)} resumes x {len(jds)} JDs (top {top_k} per JD). Scoring cache stats: {self.scoring_cache.stats()}")
+        return {
+            "similarity_matrix": {
+                "resumes": [resume["filename"] for resume in resumes],
+                "job_descriptions": [jd["filename"] for jd in jds],
+                "values": [[None if np.isnan(value) else round(float(value), 4) for value in row] for row in similarities],
+            },
+            "rankings": rankings,
+            "errors": errors,
+        }
+
+    async def parse_resume(self, file_buffer: BytesIO, filename: str, text: Optional[str] = None) -> Dict[str, Any]:
         """
         Parses a resume file and extracts structured information.
 
         Args:
             file_buffer (BytesIO): The resume file buffer.
             filename (str): Name of the uploaded resume file.
+            text (str, optional): Already extracted normalized text, skips parsing the file again.
 
         Returns:
             Dict containing structured resume data.
         """
         try:
-            text = parse_pdf_or_docx(file_buffer, filename)
-            today_date = datetime.now().strftime("%Y-%m-%d")
-            system_prompt = f"""
-            You are an AI model specializing in extracting structured information from resumes.
-            Parse the text and produce a JSON structure with these top-level fields, each of the following keys must be present:
-            1) candidate_name (string) — Full name, ensure spaces between first and last names if applicable.
-            2) email_address (string) - The email should be a valid email address with a "@" symbol and a domain name (gmail, outlook, etc..).
-            3) phone_number (string) - should be a valid phone number with country codes (default is +91 if none given) first, followed by a space and then the number.
-            4) work_experience (object containing 'years' (number) and 'months' (number)) - Ensure that overlapping work periods are handled correctly.
-            5) educations_duration (object containing 'years' (number) and 'months' (number)) — Calculate the correct total duration for education.
-            6) experiences (array of objects):
-                Each experience must include:
-                - title (string),
-                - company (string),
-                - description (string),
-                - date_start (string),
-                - date_end (string),
-                - skills (array of strings),
-                - tasks (array of strings)
-            7) educations (array of objects):
-                - institution (string),
-                - title (string),
-                - date_start (string),
-                - date_end (string),
-                - skills (string),
-                - tasks (string)
-            8) social_urls (array of objects, each with:
-                - type (string),
-                - url (string)
-            9) languages (array of objects, each with:
-                - name (string)
-            10) skills (object containing 'primary_skills' (array of strings) and 'secondary_skills' (array of strings))
-
-            11) certifications (array of objects, each with:
-                - name (string) any sort of online or offline certification or courses done by the candidate.
-
-            Key instructions for duration calculations:
-            - Calculate work_experience and educations_duration based on the start and end dates. Ensure that consecutive periods (without gaps) are treated as distinct and add up the durations without including the gap between roles.
-            - If "present," "ongoing," "or similar terms" are mentioned, then use today's date {today_date} as the date_end and calculate the duration accordingly.
-            """
-            user_prompt = f"""
-            Extract structured information from this resume text:
-            {text}
-            Follow these instructions:
-            1. Parse the text and extract structured information according to the keys mentioned above.
-            2. Ensure that the total work experience is calculated accurately by accounting for overlaps and distinct periods.
-            3. Handle ongoing periods by comparing "present" with today's date and calculating the accurate duration.
-            4. For overlapping roles, calculate the total unique time worked without double-counting.
-            5. For education durations, calculate accurately.
-            6. Ensure no missing fields, and if any information is not provided, use null or empty arrays.
-            7. Return a valid JSON output with accurate dates and durations.
-            8. If no skills are explicitly or less than 10 are mentioned in the resume, generate a total of 10 relevant skills based on the candidate's experience and education.
-            """
+            if text is None:
+                text = await extract_normalized_text_async(file_buffer, filename, self.gpt_service.config.max_document_chars)
+            system_prompt, user_prompt = get_prompt("scoring_resume_extraction").render(text=text)
+            all_fields = tuple(ResumeSchema.model_fields)
             structured_data = await self.gpt_service.extract_with_prompts(
                 system_prompt=system_prompt,
                 user_prompt=user_prompt,
-                response_schema=ResumeSchema
+                response_schema=build_partial_schema(ResumeSchema, extraction_fields(all_fields)),
+                stage=STAGE_RESUME_EXTRACTION
             )
-            if structured_data.get('experiences'):
-                structured_data['work_experience'] = self.calculate_total_work_experience(
-                    [{'date_start': exp['date_start'], 'date_end': exp['date_end']} for exp in structured_data['experiences']]
-                )
-            return structured_data
+            # Work and education durations are computed locally from the extracted dates
+            return add_local_durations(structured_data, all_fields)
 
         except Exception as e:
             logger.error(f"Error extracting resume details: {str(e)}", exc_info=True)
@@ -220,104 +569,69 @@ class ResumeScoringService:
         )
         return await self.gpt_service.get_text_embedding(resume_text)
 
-    async def compute_similarity(self, resume: Dict[str, Any], enhanced_jd: Dict[str, Any]) -> float:
+    async def compute_similarity(self, resume: Dict[str, Any], jd_embedding: Optional[List[float]], resume_hash: Optional[str] = None) -> Optional[float]:
         """
-        Computes similarity between resume and enhanced job description using cosine similarity.
+        Computes similarity between resume and the enhanced job description's embedding using cosine similarity.
+        When resume_hash is given the resume embedding is cached and reused across JDs.
+        Returns None when either embedding is unavailable.
         """
-        resume_embedding = await self.vectorize_resume(resume)
-        jd_embedding = self.job_description_enhancer.temp_storage.get("vectorized_jd", [])
+        if not jd_embedding:
+            return None
+        resume_embedding = await self.resume_embedding(resume, resume_hash)
+        if resume_embedding is None:
+            return None
         return cosine_similarity(np.array(jd_embedding), np.array(resume_embedding))
 
-    async def score_resume(self, resume: Dict[str, Any], combined_criteria: str, generated_candidates: List[Dict[str, Any]]) -> Dict[str, Any]:
+    async def resume_embedding(self, resume: Dict[str, Any], resume_hash: Optional[str] = None) -> Optional[List[float]]:
+        """
+        Embeds an extracted resume, cached per resume_hash and vector space. Returns None when it can't be embedded.
+        """
+        embedding_identity = self.gpt_service.embedding_backend().identity
+        resume_embedding = None
+        if resume_hash:
+            resume_embedding = await self.scoring_cache.get_async("embedding", resume_hash, RESUME_EXTRACTION_PROMPT_VERSION, embedding_identity)
+        if resume_embedding is None:
+            try:
+                resume_embedding = await self.vectorize_resume(resume)
+            except EmbeddingError as e:
+                logger.warning(f"Resume embedding unavailable, similarity is null: {str(e)}")
+                return None
+            if resume_hash:
+                await self.scoring_cache.set_async("embedding", resume_embedding, resume_hash, RESUME_EXTRACTION_PROMPT_VERSION, embedding_identity)
+        return resume_embedding
+
+    async def score_resume(self, resume: Dict[str, Any], combined_criteria: str, generated_candidates: List[Dict[str, Any]], candidate_context: str = "") -> Dict[str, Any]:
         """
         Scores an extracted resume against user input, enhanced JD, and sample candidates.
 
         Args:
             resume (Dict[str, any]): Extracted resume details.
-            combined_criteria (str): The combined criteria for scoring.
+            combined_criteria (str): The combined criteria for scoring, shared by every resume in a batch.
             candidates (List[Dict[str, any]]): List of sample candidates.
+            candidate_context (str): Per-resume context (stored and similar candidates).
 
         Returns:
             Dict with resume score, analysis, and recommendations.
         """
-        system_prompt = f"""
-        You are an AI tasked with evaluating resumes in relation to an user input (more priority), enhanced job description (second priority) and a set of sample candidates. The candidate's resume should be analyzed thoroughly, including both technical and non-technical aspects, and compared with the job description as well as the dummy candidates.
-
-        Your task is to perform a deep analysis of the candidate's resume and compare it to both the enhanced job description and the sample candidates. Every detail in the resume should be examined carefully, including skills, experiences, education, certifications, and any other relevant information. You need to assess the alignment of the candidate's profile with the job description and the sample candidates.
-
-        The analysis should include:
-        - Identification of any missing skills or experience gaps.
-        - A detailed summary of what the candidate possesses in terms of qualifications, expertise, and suitability for the role.
-        - A comparison of the candidate to the closest matching sample candidate from the generated set.
-        - Recommendations for improvement to help the candidate better match the job description.
-
-        **Scoring Criteria:**
-        1. **Skill Match**: Assess both technical and soft skills mentioned in the resume.
-        2. **Experience Relevance**: Evaluate how well the candidate's past roles and industry experience align with the job description and sample candidates.
-        3. **Education & Certifications**: Check if the candidate's education and certifications match the requirements of the job description.
-        4. **Keyword Similarity**: Analyze the ATS (Applicant Tracking System) optimization by checking how well the resume matches keywords in the job description.
-
-        **Output Format:**
-        - **candidate_name**: Name of the candidate extracted from the resume.
-        - **resume_score**: A score assigned to the resume on a scale from 0 to 10 based on how well it aligns with the job description and sample candidates.
-        - **gap_analysis**: A list of missing skills or experience gaps identified in the candidate's resume.
-        - **candidate_summary**: A detailed summary of the candidate's qualifications, experience, and suitability for the job.
-        - **recommendations**: A set of recommendations for the candidate to improve their alignment with the job description.
-        """
-
-        user_prompt = f"""
-        Evaluate the following resume against the **Enhanced Job Description** and **Sample Candidates**.
-
-        You are an AI tasked with evaluating resumes in relation to an enhanced job description and a set of sample candidates. The candidate's resume should be analyzed thoroughly, including both technical and non-technical aspects, and compared with the job description as well as the dummy candidates.
-
-        Your task is to perform a deep analysis of the candidate's resume and compare it to both the enhanced job description and the sample candidates. Every detail in the resume should be examined carefully, including skills, experiences, education, certifications, and any other relevant information. You need to assess the alignment of the candidate's profile with the job description and the sample candidates.
-
-        The analysis should include:
-        - Identification of any missing skills or experience gaps.
-        - A detailed summary of what the candidate possesses in terms of qualifications, expertise, and suitability for the role.
-        - A comparison of the candidate to the closest matching sample candidate from the generated set.
-        - Recommendations for improvement to help the candidate better match the job description.
-
-        Resume details: {resume}
-
-        Enhanced Job Description + User Input + Matching Candidates: {combined_criteria}
-        """
+        # Shared criteria first and the per-resume content last, so the prefix is cached across a batch
+        system_prompt, user_prompt = get_prompt("resume_scoring").render(
+            combined_criteria=combined_criteria,
+            candidate_context=candidate_context,
+            resume=resume
+        )
         try:
             scoring_result = await self.gpt_service.extract_with_prompts(
                 system_prompt=system_prompt,
                 user_prompt=user_prompt,
-                response_schema=ResumeScoringSchema
+                response_schema=ResumeScoringSchema,
+                stage=STAGE_RESUME_SCORING
             )
             return scoring_result
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.error(f"Error in scoring resume: {str(e)}", exc_info=True)
             raise Exception(f"Error in scoring resume: {str(e)}")
 
     def calculate_total_work_experience(self, experiences: List[Dict[str, str]]) -> Dict[str, int]:
-        if not experiences:
-            print("No experiences provided")
-            return {'years': 0, 'months': 0}
-        total_months = 0
-        parsed_experiences = [{'start': self.parse_date(exp['date_start']), 'end': self.parse_date(exp['date_end'])} for exp in experiences]
-        parsed_experiences.sort(key=lambda x: x['start'])
-        current_start = parsed_experiences[0]['start']
-        current_end = parsed_experiences[0]['end']
-        for i in range(1, len(parsed_experiences)):
-            start = parsed_experiences[i]['start']
-            end = parsed_experiences[i]['end']
-            if start <= current_end:
-                current_end = max(current_end, end)
-            else:
-                total_months += (current_end.year - current_start.year) * 12 + current_end.month - current_start.month
-                current_start = start
-                current_end = end
-        total_months += (current_end.year - current_start.year) * 12 + current_end.month - current_start.month
-        years = total_months // 12
-        months = total_months % 12
-        return {'years': years, 'months': months}
-
-    def parse_date(self, date_string: str) -> datetime:
-        try:
-            return datetime.strptime(date_string, '%Y-%m-%d')
-        except ValueError:
-            return datetime.now()
+        return calculate_total_duration(experiences)
@@ -0,0 +1,83 @@
+import hashlib
+from typing import Any, Dict, List, Optional
+from app.services.state_backend import StateBackend, InMemoryStateBackend
+from app.utils.logger import Logger
+
+logger = Logger(__name__).get_logger()
+
+def content_hash(data: Any) -> str:
+    """
+    Returns a stable SHA-256 hex digest for bytes, strings or repr-able objects.
+    """
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    elif not isinstance(data, (bytes, bytearray)):
+        data = repr(data).encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+class ScoringCache:
+    """
+    Layered cache for the resume scoring pipeline.
+    Each layer is keyed only by the inputs it depends on, so a change invalidates as little as possible:
+      - extraction: (resume content hash, extraction prompt version)
+      - embedding:  (resume content hash, extraction prompt version, embedding backend identity)
+      - similarity: (resume content hash, JD identity, embedding backend identity)
+      - score:      (resume content hash, JD identity, user_input hash, scoring prompt version)
+    Editing user_input therefore only re-runs the final score_resume call.
+    Entries are kept in a StateBackend, so with the SQLite backend every worker shares them.
+    Hit and miss counters are per process.
+    """
+    LAYERS = ("extraction", "embedding", "similarity", "score")
+
+    def __init__(self, backend: Optional[StateBackend] = None, max_entries_per_layer: int = 2048):
+        self.backend = backend or InMemoryStateBackend(max_entries_per_layer)
+        self._hits = {layer: 0 for layer in self.LAYERS}
+        self._misses = {layer: 0 for layer in self.LAYERS}
+
+    def get(self, layer: str, *key_parts: str) -> Optional[Any]:
+        """
+        Returns a copy of the cached value, or None on a miss.
+        """
+        value = self.backend.get(f"scoring:{layer}", "|".join(key_parts))
+        if value is None:
+            self._misses[layer] += 1
+            return None
+        self._hits[layer] += 1
+        return value
+
+    def set(self, layer: str, value: Any, *key_parts: str) -> None:
+        """
+        Stores a copy of value, evicting the least recently used entry when the layer is full.
+        """
+        self.backend.set(f"scoring:{layer}", "|".join(key_parts), value)
+
+    async def get_async(self, layer: str, *key_parts: str) -> Optional[Any]:
+        """
+        get() for async code, off the event loop when the backend does I/O.
+        """
+        value = await self.backend.get_async(f"scoring:{layer}", "|".join(key_parts))
+        if value is None:
+            self._misses[layer] += 1
+            return None
+        self._hits[layer] += 1
+        return value
+
+    async def set_async(self, layer: str, value: Any, *key_parts: str) -> None:
+        await self.backend.set_async(f"scoring:{layer}", "|".join(key_parts), value)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Returns entries, hits and misses per layer.
+        """
+        return {
+            layer: {
+                "entries": self.backend.count(f"scoring:{layer}"),
+                "hits": self._hits[layer],
+                "misses": self._misses[layer],
+            }
+            for layer in self.LAYERS
+        }
+
+    def clear(self, layers: Optional[List[str]] = None) -> None:
+        for layer in layers or self.LAYERS:
+            self.backend.clear(f"scoring:{layer}")
@@ -0,0 +1,118 @@
+from typing import Optional
+from app.services.config_service import ConfigService
+from app.services.gpt_service import GPTService
+from app.services.resume_extraction import ResumeParser
+from app.services.jd_extraction_helper import JobDescriptionParser
+from app.services.job_description_enhance import JobDescriptionEnhancer
+from app.services.resume_scoring import ResumeScoringService
+from app.services.scoring_cache import ScoringCache
+from app.services.near_duplicate_index import NearDuplicateIndex
+from app.services.candidate_index import CandidateIndex
+from app.services.state_backend import StateBackend, create_state_backend
+from app.utils.parse_sandbox import ParseLimits, ParseSandbox
+from app.utils.logger import Logger
+
+logger = Logger(__name__).get_logger()
+
+class ServiceContainer:
+    """
+    Dependency container that owns the shared configuration and GPT client.
+    Every service is built on first access and reuses the same ConfigService and
+    GPTService, so the process holds a single OpenAI client and connection pool.
+    Shared state goes through one StateBackend (see STATE_BACKEND).
+    """
+    def __init__(self, config: Optional[ConfigService] = None):
+        self._config = config
+        self._gpt_service = None
+        self._state_backend = None
+        self._candidate_index = None
+        self._parse_sandbox = None
+        self._resume_parser = None
+        self._jd_parser = None
+        self._job_description_enhancer = None
+        self._resume_scoring_service = None
+
+    @property
+    def config(self) -> ConfigService:
+        if self._config is None:
+            self._config = ConfigService()
+        return self._config
+
+    @property
+    def gpt_service(self) -> GPTService:
+        if self._gpt_service is None:
+            self._gpt_service = GPTService(self.config)
+        return self._gpt_service
+
+    @property
+    def state_backend(self) -> StateBackend:
+        if self._state_backend is None:
+            self._state_backend = create_state_backend(
+                self.config.state_backend, self.config.state_sqlite_path, self.config.state_max_entries
+            )
+        return self._state_backend
+
+    @property
+    def parse_limits(self) -> ParseLimits:
+        config = self.config
+        return ParseLimits(
+            max_pages=config.parse_max_pages,
+            max_chars=config.parse_max_chars,
+            max_image_megapixels=config.parse_max_image_megapixels,
+            max_seconds=config.parse_max_seconds,
+            max_rss_mb=config.parse_max_rss_mb,
+        )
+
+    @property
+    def parse_sandbox(self) -> Optional[ParseSandbox]:
+        """
+        Isolated parser worker pool, or None when PARSE_WORKERS is 0.
+        """
+        if self._parse_sandbox is None and self.config.parse_workers > 0:
+            self._parse_sandbox = ParseSandbox(self.parse_limits, self.config.parse_workers)
+        return self._parse_sandbox
+
+    @property
+    def candidate_index(self) -> Optional[CandidateIndex]:
+        if self._candidate_index is None:
+            kind = self.config.candidate_index
+            if kind == "off":
+                return None
+            if kind not in ("memory", "sqlite"):
+                raise ValueError(f"Unknown candidate index '{kind}', expected 'memory', 'sqlite' or 'off'.")
+            self._candidate_index = CandidateIndex(
+                self.config.candidate_index_path if kind == "sqlite" else None,
+                self.config.candidate_index_max_matches
+            )
+        return self._candidate_index
+
+    @property
+    def resume_parser(self) -> ResumeParser:
+        if self._resume_parser is None:
+            self._resume_parser = ResumeParser(self.gpt_service)
+        return self._resume_parser
+
+    @property
+    def jd_parser(self) -> JobDescriptionParser:
+        if self._jd_parser is None:
+            self._jd_parser = JobDescriptionParser(self.gpt_service)
+        return self._jd_parser
+
+    @property
+    def job_description_enhancer(self) -> JobDescriptionEnhancer:
+        if self._job_description_enhancer is None:
+            self._job_description_enhancer = JobDescriptionEnhancer(self.gpt_service, self.state_backend)
+        return self._job_description_enhancer
+
+    @property
+    def resume_scoring_service(self) -> ResumeScoringService:
+        if self._resume_scoring_service is None:
+            threshold = self.config.near_duplicate_threshold
+            self._resume_scoring_service = ResumeScoringService(
+                self.job_description_enhancer,
+                self.gpt_service,
+                ScoringCache(self.state_backend),
+                NearDuplicateIndex(self.state_backend, threshold) if threshold > 0 else None,
+                self.candidate_index
+            )
+        return self._resume_scoring_service
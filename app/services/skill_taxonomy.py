@@ -0,0 +1,205 @@
+import json
+import os
+from collections import deque
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from app.utils.logger import Logger
+
+logger = Logger(__name__).get_logger()
+
+# Canonical skill name -> aliases (matched case-insensitively). Extend with SKILL_TAXONOMY_PATH.
+DEFAULT_SKILL_TAXONOMY: Dict[str, List[str]] = {
+    "JavaScript": ["js", "javascript", "ecmascript", "es6"],
+    "TypeScript": ["ts", "typescript"],
+    "Python": ["python", "python3", "py"],
+    "Java": ["java"],
+    "C++": ["c++", "cpp"],
+    "C#": ["c#", "csharp", "c sharp"],
+    "Go": ["golang"],
+    "Rust": ["rust"],
+    "Ruby": ["ruby"],
+    "PHP": ["php"],
+    "Kotlin": ["kotlin"],
+    "Swift": ["swift"],
+    "Scala": ["scala"],
+    "R": ["r programming", "rstats"],
+    "SQL": ["sql", "structured query language"],
+    "PostgreSQL": ["postgresql", "postgres", "psql"],
+    "MySQL": ["mysql"],
+    "MongoDB": ["mongodb", "mongo"],
+    "Redis": ["redis"],
+    "Elasticsearch": ["elasticsearch", "elastic search"],
+    "React": ["react", "reactjs", "react.js"],
+    "React Native": ["react native"],
+    "Angular": ["angular", "angularjs", "angular.js"],
+    "Vue.js": ["vue", "vuejs", "vue.js"],
+    "Node.js": ["node", "nodejs", "node.js"],
+    "Django": ["django"],
+    "Flask": ["flask"],
+    "FastAPI": ["fastapi"],
+    "Spring Boot": ["spring boot", "springboot"],
+    ".NET": [".net", "dotnet", "asp.net"],
+    "HTML": ["html", "html5"],
+    "CSS": ["css", "css3"],
+    "REST APIs": ["rest", "rest api", "rest apis", "restful", "restful apis"],
+    "GraphQL": ["graphql"],
+    "Amazon Web Services": ["aws", "amazon web services"],
+    "Microsoft Azure": ["azure", "microsoft azure"],
+    "Google Cloud Platform": ["gcp", "google cloud", "google cloud platform"],
+    "Docker": ["docker"],
+    "Kubernetes": ["kubernetes", "k8s"],
+    "Terraform": ["terraform"],
+    "CI/CD": ["ci/cd", "cicd", "continuous integration", "continuous delivery", "continuous deployment"],
+    "Jenkins": ["jenkins"],
+    "Git": ["git", "github", "gitlab", "version control"],
+    "Linux": ["linux", "unix"],
+    "Machine Learning": ["machine learning", "ml"],
+    "Deep Learning": ["deep learning", "dl"],
+    "Natural Language Processing": ["natural language processing", "nlp"],
+    "Computer Vision": ["computer vision"],
+    "Artificial Intelligence": ["artificial intelligence", "ai"],
+    "Data Analysis": ["data analysis", "data analytics"],
+    "Data Science": ["data science"],
+    "TensorFlow": ["tensorflow"],
+    "PyTorch": ["pytorch", "torch"],
+    "scikit-learn": ["scikit-learn", "sklearn", "scikit learn"],
+    "Pandas": ["pandas"],
+    "NumPy": ["numpy"],
+    "Apache Spark": ["spark", "apache spark", "pyspark"],
+    "Tableau": ["tableau"],
+    "Power BI": ["power bi", "powerbi"],
+    "Microsoft Excel": ["excel", "ms excel", "microsoft excel"],
+    "Agile": ["agile", "agile methodologies"],
+    "Scrum": ["scrum"],
+    "Project Management": ["project management"],
+    "Communication": ["communication", "communication skills"],
+    "Problem Solving": ["problem solving", "problem-solving"],
+    "Critical Thinking": ["critical thinking"],
+    "Leadership": ["leadership", "team leadership"],
+    "Teamwork": ["teamwork", "collaboration"],
+}
+
+# Aliases that are also ordinary English words: used to normalize skill lists but never
+# matched in free text ("go to market", "the rest of", "excel at").
+AMBIGUOUS_ALIASES = {"go", "r", "rest", "node", "excel", "swift", "rust", "ts", "py", "dl", "torch"}
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+class SkillTaxonomy:
+    """
+    Canonical skill dictionary with aliases, compiled into an Aho-Corasick automaton.
+    `extract` finds every known skill in a text in one linear pass, `normalize` maps any
+    skill string to its canonical name, so resume and JD skills can be compared as sets.
+    """
+    def __init__(self, taxonomy: Dict[str, List[str]]):
+        self._alias_to_canonical: Dict[str, str] = {}
+        for canonical, aliases in taxonomy.items():
+            for alias in [canonical, *aliases]:
+                self._alias_to_canonical[self._key(alias)] = canonical
+
+        # Trie with failure links; node 0 is the root
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[Tuple[int, str]]] = [[]]  # (pattern length, canonical name)
+        for alias, canonical in self._alias_to_canonical.items():
+            if alias not in AMBIGUOUS_ALIASES:
+                self._add_pattern(alias, canonical)
+        self._build_failure_links()
+        logger.info(f"Skill taxonomy compiled: {len(taxonomy)} skills, {len(self._alias_to_canonical)} aliases.")
+
+    @staticmethod
+    def _key(skill: str) -> str:
+        return " ".join(skill.lower().split())
+
+    def _add_pattern(self, pattern: str, canonical: str) -> None:
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            node = nxt
+        self._output[node].append((len(pattern), canonical))
+
+    def _build_failure_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(ch, 0)
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def normalize(self, skill: str) -> str:
+        """
+        Returns the canonical name for a skill, or the trimmed input when it is not in the taxonomy.
+        """
+        cleaned = " ".join((skill or "").split())
+        return self._alias_to_canonical.get(cleaned.lower(), cleaned)
+
+    def normalize_all(self, skills: Optional[Iterable[str]]) -> List[str]:
+        """
+        Normalizes and de-duplicates skills, keeping first-seen order.
+        """
+        seen: Dict[str, None] = {}
+        for skill in skills or []:
+            canonical = self.normalize(skill)
+            if canonical:
+                seen.setdefault(canonical, None)
+        return list(seen)
+
+    def canonical_set(self, skills: Optional[Iterable[str]]) -> Set[str]:
+        return set(self.normalize_all(skills))
+
+    def extract(self, text: str) -> Set[str]:
+        """
+        Finds all taxonomy skills mentioned in text (whole-word, case-insensitive, leftmost-longest).
+        """
+        haystack = " ".join((text or "").lower().split())
+        matches = []
+        node = 0
+        for end, ch in enumerate(haystack):
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            for length, canonical in self._output[node]:
+                start = end - length + 1
+                if start > 0 and _is_word_char(haystack[start - 1]) and _is_word_char(haystack[start]):
+                    continue
+                if end + 1 < len(haystack) and _is_word_char(haystack[end + 1]) and _is_word_char(haystack[end]):
+                    continue
+                matches.append((start, end, canonical))
+
+        # Leftmost-longest: "react native" wins over the "react" inside it
+        matches.sort(key=lambda m: (m[0], m[0] - m[1]))
+        found: Set[str] = set()
+        covered_until = -1
+        for start, end, canonical in matches:
+            if start > covered_until:
+                found.add(canonical)
+                covered_until = end
+        return found
+
+
+@lru_cache(maxsize=1)
+def get_skill_taxonomy() -> SkillTaxonomy:
+    """
+    Returns the process-wide taxonomy, merging SKILL_TAXONOMY_PATH (a JSON object of
+    canonical name -> aliases) over the built-in dictionary when it is set.
+    """
+    taxonomy = {name: list(aliases) for name, aliases in DEFAULT_SKILL_TAXONOMY.items()}
+    path = os.getenv("SKILL_TAXONOMY_PATH")
+    if path:
+        with open(path, encoding="utf-8") as taxonomy_file:
+            for name, aliases in json.load(taxonomy_file).items():
+                taxonomy.setdefault(name, []).extend(aliases)
+    return SkillTaxonomy(taxonomy)
@@ -0,0 +1,200 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from app.utils.logger import Logger
+
+logger = Logger(__name__).get_logger()
+
+class StateBackend(ABC):
+    """
+    Key-value store for state shared between requests: the enhanced JD and its candidate profiles,
+    embeddings and cached extractions/scores. Values must be JSON-serializable; every get returns
+    a fresh copy. Entries live in namespaces, each capped at max_entries_per_namespace (least
+    recently used entries are evicted first).
+    Async code uses get_async() and set_async(); backends that do I/O (does_io) run them in a worker
+    thread, so a store busy with another process never stalls the event loop.
+    """
+    does_io = False
+
+    def __init__(self, max_entries_per_namespace: int = 2048):
+        self.max_entries_per_namespace = max_entries_per_namespace
+
+    async def get_async(self, namespace: str, key: str) -> Optional[Any]:
+        if self.does_io:
+            return await asyncio.to_thread(self.get, namespace, key)
+        return self.get(namespace, key)
+
+    async def set_async(self, namespace: str, key: str, value: Any) -> None:
+        if self.does_io:
+            await asyncio.to_thread(self.set, namespace, key, value)
+        else:
+            self.set(namespace, key, value)
+
+    @abstractmethod
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        ...
+
+    @abstractmethod
+    def set(self, namespace: str, key: str, value: Any) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, namespace: str, key: str) -> None:
+        ...
+
+    @abstractmethod
+    def count(self, namespace: str) -> int:
+        ...
+
+    @abstractmethod
+    def clear(self, namespace: str) -> None:
+        ...
+
+
+class InMemoryStateBackend(StateBackend):
+    """
+    Process-local backend. Only correct with a single worker process.
+    """
+    def __init__(self, max_entries_per_namespace: int = 2048):
+        super().__init__(max_entries_per_namespace)
+        self._namespaces: Dict[str, OrderedDict] = {}
+        self._lock = threading.Lock()
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        with self._lock:
+            entries = self._namespaces.get(namespace)
+            if not entries or key not in entries:
+                return None
+            entries.move_to_end(key)
+            raw = entries[key]
+        return json.loads(raw)
+
+    def set(self, namespace: str, key: str, value: Any) -> None:
+        # Stored serialized, so callers can't mutate cached values and both backends behave alike
+        raw = json.dumps(value)
+        with self._lock:
+            entries = self._namespaces.setdefault(namespace, OrderedDict())
+            entries[key] = raw
+            entries.move_to_end(key)
+            while len(entries) > self.max_entries_per_namespace:
+                entries.popitem(last=False)
+
+    def delete(self, namespace: str, key: str) -> None:
+        with self._lock:
+            self._namespaces.get(namespace, {}).pop(key, None)
+
+    def count(self, namespace: str) -> int:
+        with self._lock:
+            return len(self._namespaces.get(namespace, {}))
+
+    def clear(self, namespace: str) -> None:
+        with self._lock:
+            self._namespaces.pop(namespace, None)
+
+
+class SQLiteStateBackend(StateBackend):
+    """
+    Backend on a local SQLite file shared by every worker process on the host.
+    The database runs in WAL mode so readers never block the writer, and each write (including
+    its LRU eviction) is one BEGIN IMMEDIATE transaction, which takes SQLite's cross-process
+    write lock, so concurrent workers never see a half-applied update.
+    Reads have their own connection and lock, so they never queue behind a write waiting for that
+    lock. The recency bump of a read is best effort on a connection that never waits for it.
+    """
+    does_io = True
+
+    def __init__(self, path: str, max_entries_per_namespace: int = 2048, busy_timeout: float = 10.0):
+        super().__init__(max_entries_per_namespace)
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        # Per process: a writer connection, a reader connection, and one with no busy timeout for recency bumps
+        self._connection = sqlite3.connect(path, timeout=busy_timeout, isolation_level=None, check_same_thread=False)
+        self._reader = sqlite3.connect(path, timeout=busy_timeout, isolation_level=None, check_same_thread=False)
+        self._toucher = sqlite3.connect(path, timeout=0, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._read_lock = threading.Lock()
+        with self._lock:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS state (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                )
+                """
+            )
+            self._connection.execute("CREATE INDEX IF NOT EXISTS state_lru ON state (namespace, accessed_at)")
+        logger.info(f"SQLite state backend ready at '{path}'.")
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        with self._read_lock:
+            row = self._reader.execute(
+                "SELECT value FROM state WHERE namespace = ? AND key = ?", (namespace, key)
+            ).fetchone()
+            if row is None:
+                return None
+            # Best-effort recency bump: with no busy timeout it fails at once (and is skipped) while
+            # any connection holds the write lock
+            try:
+                self._toucher.execute(
+                    "UPDATE state SET accessed_at = ? WHERE namespace = ? AND key = ?", (time.time(), namespace, key)
+                )
+            except sqlite3.OperationalError:
+                pass
+        return json.loads(row[0])
+
+    def set(self, namespace: str, key: str, value: Any) -> None:
+        raw = json.dumps(value)
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO state (namespace, key, value, accessed_at) VALUES (?, ?, ?, ?)",
+                    (namespace, key, raw, time.time())
+                )
+                self._connection.execute(
+                    """
+                    DELETE FROM state WHERE namespace = ? AND key IN (
+                        SELECT key FROM state WHERE namespace = ? ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                    )
+                    """,
+                    (namespace, namespace, self.max_entries_per_namespace)
+                )
+                self._connection.execute("COMMIT")
+            except Exception:
+                self._connection.execute("ROLLBACK")
+                raise
+
+    def delete(self, namespace: str, key: str) -> None:
+        with self._lock:
+            self._connection.execute("DELETE FROM state WHERE namespace = ? AND key = ?", (namespace, key))
+
+    def count(self, namespace: str) -> int:
+        with self._read_lock:
+            return self._reader.execute("SELECT COUNT(*) FROM state WHERE namespace = ?", (namespace,)).fetchone()[0]
+
+    def clear(self, namespace: str) -> None:
+        with self._lock:
+            self._connection.execute("DELETE FROM state WHERE namespace = ?", (namespace,))
+
+
+def create_state_backend(kind: str = "memory", path: Optional[str] = None, max_entries_per_namespace: int = 2048) -> StateBackend:
+    """
+    Builds the configured backend: "memory" (single worker) or "sqlite" (shared by all workers on a host).
+    """
+    if kind == "memory":
+        return InMemoryStateBackend(max_entries_per_namespace)
+    if kind == "sqlite":
+        return SQLiteStateBackend(path or os.path.join(".state", "state.db"), max_entries_per_namespace)
+    raise ValueError(f"Unknown state backend '{kind}', expected 'memory' or 'sqlite'.")
@@ -0,0 +1,284 @@
+# app/utils/admission.py
+
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, Optional
+import logging
+from starlette.responses import JSONResponse
+from app.utils.deadline import DeadlineExceeded, remaining_time
+
+logger = logging.getLogger(__name__)
+
+# Priority classes: single-document calls a recruiter is waiting on, and batch work
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_BULK = "bulk"
+PRIORITIES = (PRIORITY_INTERACTIVE, PRIORITY_BULK)
+
+# Priority of the request being served; GPT calls made while it is set compete for slots in that class.
+# Like the request deadline, tasks created from the request inherit it.
+_current_priority: ContextVar[str] = ContextVar("current_priority", default=PRIORITY_INTERACTIVE)
+
+# Recent wait times kept per class for the stats percentiles
+_WAIT_SAMPLES = 512
+
+
+class AdmissionRejected(Exception):
+    """
+    Raised when a request can't be queued (or waited too long in the queue). retry_after is the
+    suggested number of seconds before retrying, for the Retry-After header.
+    """
+    def __init__(self, priority: str, retry_after: int, detail: str):
+        super().__init__(detail)
+        self.priority = priority
+        self.retry_after = retry_after
+
+
+@contextmanager
+def priority_class(priority: str):
+    """
+    Sets the priority class for all work started inside the block.
+    """
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def current_priority() -> str:
+    return _current_priority.get()
+
+
+def _wait_summary(samples: Deque[float]) -> Dict[str, float]:
+    if not samples:
+        return {"p50_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+    ordered = sorted(samples)
+    def percentile(share: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(share * len(ordered)))] * 1000, 1)
+    return {"p50_ms": percentile(0.5), "p95_ms": percentile(0.95), "max_ms": round(ordered[-1] * 1000, 1)}
+
+
+class _ClassState:
+    def __init__(self, max_concurrent: int, max_queue: int):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.in_flight = 0
+        self.waiters: Deque[asyncio.Future] = deque()
+        self.admitted = 0
+        self.rejected = 0
+        self.waits: Deque[float] = deque(maxlen=_WAIT_SAMPLES)
+        # Smoothed request duration, used to estimate Retry-After
+        self.average_seconds = 1.0
+
+
+class AdmissionController:
+    """
+    Per-class request admission: at most max_concurrent requests of a class run at once, up to
+    max_queue more wait in FIFO order, and anything beyond is rejected immediately (HTTP 503).
+    A queued request gives up after max_wait seconds. Classes never wait on each other, so a full
+    bulk queue can't delay interactive requests.
+    """
+    def __init__(self, limits: Dict[str, Dict[str, int]], max_wait: float = 10.0):
+        self.max_wait = max_wait
+        self._classes = {priority: _ClassState(limit["max_concurrent"], limit["max_queue"]) for priority, limit in limits.items()}
+
+    def _retry_after(self, state: _ClassState) -> int:
+        # Time for the requests ahead to drain at the current concurrency
+        backlog = state.in_flight + len(state.waiters)
+        return max(1, min(60, math.ceil(backlog * state.average_seconds / max(1, state.max_concurrent))))
+
+    async def acquire(self, priority: str) -> float:
+        """
+        Waits for a slot in the class and returns the admission time to pass to release().
+        Raises AdmissionRejected when the queue is full or the wait runs past max_wait.
+        """
+        state = self._classes[priority]
+        started = time.monotonic()
+        if state.in_flight < state.max_concurrent:
+            state.in_flight += 1
+        else:
+            if len(state.waiters) >= state.max_queue:
+                state.rejected += 1
+                raise AdmissionRejected(priority, self._retry_after(state), f"Too many {priority} requests queued, retry later.")
+            waiter = asyncio.get_running_loop().create_future()
+            state.waiters.append(waiter)
+            try:
+                await asyncio.wait_for(waiter, self.max_wait)
+            except asyncio.TimeoutError:
+                state.rejected += 1
+                raise AdmissionRejected(priority, self._retry_after(state), f"Queued {priority} request waited over {self.max_wait}s, retry later.")
+            except BaseException:
+                # Cancelled (client gone) after the slot was handed over: pass it on
+                if waiter.done() and not waiter.cancelled():
+                    self._release(state)
+                raise
+            finally:
+                if waiter in state.waiters:
+                    state.waiters.remove(waiter)
+            # The slot was handed over by a finishing request, in_flight already counts it
+        state.admitted += 1
+        admitted_at = time.monotonic()
+        state.waits.append(admitted_at - started)
+        return admitted_at
+
+    def release(self, priority: str, admitted_at: float) -> None:
+        state = self._classes[priority]
+        state.average_seconds = 0.9 * state.average_seconds + 0.1 * (time.monotonic() - admitted_at)
+        self._release(state)
+
+    def _release(self, state: _ClassState) -> None:
+        # Hand the slot straight to the oldest waiter that is still waiting
+        while state.waiters:
+            waiter = state.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        state.in_flight -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            priority: {
+                "in_flight": state.in_flight,
+                "queued": len(state.waiters),
+                "max_concurrent": state.max_concurrent,
+                "max_queue": state.max_queue,
+                "admitted": state.admitted,
+                "rejected": state.rejected,
+                "queue_wait": _wait_summary(state.waits),
+            }
+            for priority, state in self._classes.items()
+        }
+
+
+class WeightedConcurrencyLimiter:
+    """
+    Shared pool of GPT call slots with weighted fair sharing between priority classes.
+    When calls have to wait, freed slots go to the waiting class with the lowest served/weight ratio
+    (stride scheduling), so with weights 4:1 interactive calls get four slots for every bulk one.
+    max_share caps the slots a class may hold at once, which keeps slots free for the other class
+    even when it arrives after a burst. Idle capacity is never withheld from a class under its cap.
+    """
+    def __init__(self, capacity: int, weights: Dict[str, float], max_share: Optional[Dict[str, float]] = None):
+        self.capacity = max(1, capacity)
+        self.weights = weights
+        max_share = max_share or {}
+        self.max_slots = {priority: max(1, int(self.capacity * max_share.get(priority, 1.0))) for priority in weights}
+        self.in_use = 0
+        self._held = {priority: 0 for priority in weights}
+        self._pass = {priority: 0.0 for priority in weights}
+        self._waiters: Dict[str, Deque[asyncio.Future]] = {priority: deque() for priority in weights}
+        self._granted = {priority: 0 for priority in weights}
+        self._waits: Dict[str, Deque[float]] = {priority: deque(maxlen=_WAIT_SAMPLES) for priority in weights}
+
+    def _can_take(self, priority: str) -> bool:
+        return self.in_use < self.capacity and self._held[priority] < self.max_slots[priority]
+
+    def _grant(self, priority: str) -> None:
+        self.in_use += 1
+        self._held[priority] += 1
+        self._granted[priority] += 1
+        self._pass[priority] += 1.0 / self.weights[priority]
+
+    def _dispatch(self) -> None:
+        # Fill free slots from the waiting classes, lowest pass first
+        while self.in_use < self.capacity:
+            ready = [priority for priority, waiters in self._waiters.items() if waiters and self._held[priority] < self.max_slots[priority]]
+            if not ready:
+                return
+            priority = min(ready, key=lambda name: self._pass[name])
+            waiter = self._waiters[priority].popleft()
+            if waiter.done():
+                continue
+            self._grant(priority)
+            waiter.set_result(None)
+
+    @asynccontextmanager
+    async def slot(self, priority: Optional[str] = None):
+        """
+        Holds one GPT slot for the block, for the current request's priority class by default.
+        Waiting is bounded by the request deadline (DeadlineExceeded).
+        """
+        priority = priority if priority in self.weights else current_priority()
+        started = time.monotonic()
+        if self._can_take(priority) and not any(self._waiters.values()):
+            self._grant(priority)
+        else:
+            # A class that was idle starts at the current minimum pass, so it can't claim a backlog of turns
+            active = [self._pass[name] for name, waiters in self._waiters.items() if waiters or self._held[name]]
+            if not self._waiters[priority] and not self._held[priority] and active:
+                self._pass[priority] = max(self._pass[priority], min(active))
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters[priority].append(waiter)
+            self._dispatch()
+            try:
+                await asyncio.wait_for(waiter, remaining_time())
+            except asyncio.TimeoutError:
+                raise DeadlineExceeded(f"Request deadline exceeded while waiting for a GPT slot ({priority}).")
+            except BaseException:
+                # Cancelled just after the slot was granted: pass it on
+                if waiter.done() and not waiter.cancelled():
+                    self._release(priority)
+                raise
+            finally:
+                if waiter in self._waiters[priority]:
+                    self._waiters[priority].remove(waiter)
+        self._waits[priority].append(time.monotonic() - started)
+        try:
+            yield
+        finally:
+            self._release(priority)
+
+    def _release(self, priority: str) -> None:
+        self.in_use -= 1
+        self._held[priority] -= 1
+        self._dispatch()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "capacity": self.capacity,
+            "in_use": self.in_use,
+            "classes": {
+                priority: {
+                    "weight": self.weights[priority],
+                    "max_slots": self.max_slots[priority],
+                    "in_use": self._held[priority],
+                    "waiting": len(self._waiters[priority]),
+                    "granted": self._granted[priority],
+                    "slot_wait": _wait_summary(self._waits[priority]),
+                }
+                for priority in self.weights
+            },
+        }
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware admitting requests to the routes in route_priorities through the controller.
+    Rejected requests get a 503 with Retry-After; admitted ones run with their priority class set
+    and keep their slot until the response (including a streamed body) is fully sent.
+    """
+    def __init__(self, app, controller: AdmissionController, route_priorities: Dict[str, str]):
+        self.app = app
+        self.controller = controller
+        self.route_priorities = route_priorities
+
+    async def __call__(self, scope, receive, send):
+        priority = self.route_priorities.get(scope.get("path")) if scope["type"] == "http" else None
+        if priority is None:
+            await self.app(scope, receive, send)
+            return
+        try:
+            admitted_at = await self.controller.acquire(priority)
+        except AdmissionRejected as e:
+            response = JSONResponse({"detail": str(e)}, status_code=503, headers={"Retry-After": str(e.retry_after)})
+            await response(scope, receive, send)
+            return
+        try:
+            with priority_class(priority):
+                await self.app(scope, receive, send)
+        finally:
+            self.controller.release(priority, admitted_at)
@@ -0,0 +1,125 @@
+# app/utils/archive.py
+
+import os
+from dataclasses import dataclass
+from io import BytesIO
+from typing import BinaryIO, Iterator, Optional, Tuple
+from zipfile import ZipFile, ZipInfo, BadZipFile
+import logging
+
+logger = logging.getLogger(__name__)
+
+_READ_CHUNK = 64 * 1024
+
+
+class ArchiveError(ValueError):
+    """
+    Raised when an upload is not a readable ZIP archive or exceeds the archive-wide limits.
+    """
+
+
+@dataclass
+class ArchiveLimits:
+    max_entries: int = 2000
+    max_entry_bytes: int = 10 * 1024 * 1024
+    max_total_bytes: int = 2 * 1024 * 1024 * 1024
+    # Uncompressed / compressed size above which an entry is treated as a zip bomb
+    max_compression_ratio: float = 100.0
+
+
+@dataclass
+class ArchiveEntry:
+    """
+    One member of an archive: either its content, or the reason it was skipped.
+    """
+    filename: str
+    content: Optional[BytesIO] = None
+    skipped_reason: Optional[str] = None
+
+
+def open_zip(fileobj: BinaryIO) -> ZipFile:
+    """
+    Opens an uploaded ZIP from a seekable file object without extracting it.
+    Only the central directory is read here, members are decompressed one at a time later.
+    """
+    try:
+        return ZipFile(fileobj)
+    except (BadZipFile, OSError) as e:
+        raise ArchiveError(f"Not a valid ZIP archive: {str(e)}")
+
+
+def _skip_reason(info: ZipInfo, supported_extensions: Tuple[str, ...], limits: ArchiveLimits) -> Optional[str]:
+    if info.flag_bits & 0x1:
+        return "encrypted entry"
+    if not info.filename.lower().endswith(supported_extensions):
+        return "unsupported file type"
+    if info.file_size > limits.max_entry_bytes:
+        return f"entry larger than {limits.max_entry_bytes} bytes"
+    if info.file_size and info.file_size / max(info.compress_size, 1) > limits.max_compression_ratio:
+        return f"compression ratio above {limits.max_compression_ratio:g}"
+    return None
+
+
+def _read_bounded(archive: ZipFile, info: ZipInfo, max_bytes: int) -> Optional[BytesIO]:
+    """
+    Decompresses one member in chunks, giving up as soon as it grows past max_bytes
+    (the sizes in the central directory are attacker-controlled and can't be trusted alone).
+    """
+    buffer = BytesIO()
+    with archive.open(info) as member:
+        while True:
+            chunk = member.read(_READ_CHUNK)
+            if not chunk:
+                break
+            if buffer.tell() + len(chunk) > max_bytes:
+                return None
+            buffer.write(chunk)
+    buffer.seek(0)
+    return buffer
+
+
+def iter_archive_documents(
+    archive: ZipFile,
+    supported_extensions: Tuple[str, ...],
+    limits: Optional[ArchiveLimits] = None
+) -> Iterator[ArchiveEntry]:
+    """
+    Yields the archive's documents one at a time, so only one decompressed member is held in memory.
+    Directories, macOS metadata and hidden files are ignored; unsupported, encrypted, oversized and
+    suspiciously compressed entries are yielded with a skipped_reason.
+    Raises ArchiveError once the entry count or total uncompressed size limit is exceeded.
+    """
+    limits = limits or ArchiveLimits()
+    total_bytes = 0
+    entries = 0
+    for info in archive.infolist():
+        basename = os.path.basename(info.filename)
+        if info.is_dir() or info.filename.startswith("__MACOSX/") or not basename or basename.startswith("."):
+            continue
+
+        entries += 1
+        if entries > limits.max_entries:
+            raise ArchiveError(f"Archive has more than {limits.max_entries} entries.")
+
+        reason = _skip_reason(info, supported_extensions, limits)
+        if reason:
+            logger.warning(f"Skipping archive entry '{info.filename}': {reason}")
+            yield ArchiveEntry(filename=info.filename, skipped_reason=reason)
+            continue
+
+        max_bytes = min(info.file_size, limits.max_entry_bytes)
+        try:
+            content = _read_bounded(archive, info, max_bytes)
+        except (BadZipFile, OSError, EOFError) as e:
+            logger.warning(f"Skipping unreadable archive entry '{info.filename}': {str(e)}")
+            yield ArchiveEntry(filename=info.filename, skipped_reason=f"unreadable entry: {str(e)}")
+            continue
+        if content is None:
+            logger.warning(f"Skipping archive entry '{info.filename}': decompressed past its declared size")
+            yield ArchiveEntry(filename=info.filename, skipped_reason="entry larger than declared")
+            continue
+
+        total_bytes += content.getbuffer().nbytes
+        if total_bytes > limits.max_total_bytes:
+            raise ArchiveError(f"Archive expands to more than {limits.max_total_bytes} bytes.")
+        yield ArchiveEntry(filename=info.filename, content=content)
@@ -0,0 +1,197 @@
+# app/utils/date_parser.py
+
+import re
+from datetime import date
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Bumped whenever parsing or duration rules change the computed durations, so cached extractions holding
+# durations are recomputed
+DURATION_RULES_VERSION = 2
+
+# Marker returned by the cached parser for "Present", "Current", ... (resolved to today by the caller,
+# so the cache never pins a stale date)
+PRESENT = "present"
+
+_PRESENT_WORDS = {
+    "present", "current", "currently", "now", "ongoing", "today", "till date", "to date",
+    "till now", "continuing", "pursuing",
+}
+
+_MONTHS = {
+    "jan": 1, "january": 1, "feb": 2, "february": 2, "mar": 3, "march": 3, "apr": 4, "april": 4,
+    "may": 5, "jun": 6, "june": 6, "jul": 7, "july": 7, "aug": 8, "august": 8,
+    "sep": 9, "sept": 9, "september": 9, "oct": 10, "october": 10, "nov": 11, "november": 11,
+    "dec": 12, "december": 12,
+}
+
+# Season -> month it starts in (winter counts as the start of the year it is named after)
+_SEASONS = {"spring": 3, "summer": 6, "fall": 9, "autumn": 9, "winter": 1}
+
+_QUARTERS = {"q1": 1, "q2": 4, "q3": 7, "q4": 10}
+
+_ISO_RE = re.compile(r"^(\d{4})[-/.](\d{1,2})(?:[-/.](\d{1,2}))?$")
+_NUMERIC_MONTH_YEAR_RE = re.compile(r"^(\d{1,2})[-/.](\d{4})$")
+_DAY_MONTH_YEAR_RE = re.compile(r"^(\d{1,2})[-/.](\d{1,2})[-/.](\d{4})$")
+# "Jan 2020", "Jan-2020", "January 15, 2020", "15th Jan '20", "Q3 2021", "Spring-2019"
+_NAMED_RE = re.compile(r"^(?:(\d{1,2})(?:st|nd|rd|th)?\s+)?(q[1-4]|[a-z]+)\.?,?(?:\s*-\s*|\s*)(\d{1,2}(?:st|nd|rd|th)?,?\s+)?'?(\d{4}|\d{2})$")
+_YEAR_RE = re.compile(r"^(\d{4})$")
+_OPEN_END_RE = re.compile(r"(?:\s*[-–—]\s*|\s+)(?:till|to|until)\s+(?:date|now)\b", re.IGNORECASE)
+# Hyphens only split a range when spaced ("2019 - 2020") or between a year and a word/year
+# ("2018-Present", "2018-2020"), so ISO dates like "2020-01" stay intact.
+_RANGE_SPLIT_RE = re.compile(
+    r"\s*[–—]\s*|\s+-{1,2}\s+|(?<=\d{4})-(?=[a-z]|\d{4}\b)|\s+(?:to|until|till)\s+",
+    re.IGNORECASE,
+)
+
+
+def _expand_year(year: str) -> int:
+    value = int(year)
+    if len(year) == 2:
+        # '19 -> 2019, '98 -> 1998
+        value += 2000 if value <= (date.today().year % 100) + 5 else 1900
+    return value
+
+
+@lru_cache(maxsize=4096)
+def _parse_cached(value: str, is_end: bool):
+    text = " ".join(value.lower().replace(",", " ").split())
+    if not text:
+        return None
+    if text in _PRESENT_WORDS:
+        return PRESENT
+
+    match = _ISO_RE.match(text)
+    if match:
+        year, month = int(match.group(1)), int(match.group(2))
+        return (year, month) if 1 <= month <= 12 else None
+
+    match = _DAY_MONTH_YEAR_RE.match(text)
+    if match:
+        # Ambiguous d/m vs m/d: when the first part cannot be a month it is the day
+        first, second, year = int(match.group(1)), int(match.group(2)), int(match.group(3))
+        month = second if first > 12 else first
+        return (year, month) if 1 <= month <= 12 else None
+
+    match = _NUMERIC_MONTH_YEAR_RE.match(text)
+    if match:
+        month, year = int(match.group(1)), int(match.group(2))
+        return (year, month) if 1 <= month <= 12 else None
+
+    match = _NAMED_RE.match(text)
+    if match:
+        word, year = match.group(2), _expand_year(match.group(4))
+        if word in _MONTHS:
+            return (year, _MONTHS[word])
+        if word in _SEASONS:
+            return (year, _SEASONS[word])
+        if word in _QUARTERS:
+            start_month = _QUARTERS[word]
+            return (year, start_month + 2 if is_end else start_month)
+        return None
+
+    match = _YEAR_RE.match(text)
+    if match:
+        # A bare year spans the whole year
+        return (int(match.group(1)), 12 if is_end else 1)
+
+    return None
+
+
+def parse_resume_date(value: Optional[str], is_end: bool = False, today: Optional[date] = None) -> Optional[date]:
+    """
+    Parses the date formats found on resumes into the first day of the month.
+    Handles "2020-01-15", "2020-01", "03/2019", "15/03/2019", "Jan 2020", "Jan-2020", "January '20",
+    "Spring 2019", "Q3 2021", bare years and "Present"/"Current"/"Ongoing".
+    Results are memoized per input string.
+    :param value: Date text as written on the resume.
+    :param is_end: Resolve bare years and quarters to their last month instead of the first.
+    :param today: Date used for "Present"; defaults to today.
+    :return: The parsed date, or None when the text is not a recognizable date.
+    """
+    if not value:
+        return None
+    parsed = _parse_cached(value.strip(), is_end)
+    if parsed is None:
+        return None
+    if parsed == PRESENT:
+        today = today or date.today()
+        return date(today.year, today.month, 1)
+    year, month = parsed
+    return date(year, month, 1)
+
+
+def parse_date_range(value: str, today: Optional[date] = None) -> Tuple[Optional[date], Optional[date]]:
+    """
+    Parses a range such as "2018 – Present", "Jan 2019 to Mar 2020" or "03/2019 - 05/2021".
+    A single date is returned as the start with no end.
+    """
+    value = _OPEN_END_RE.sub(" - present", (value or "").strip())
+    parts = [part for part in _RANGE_SPLIT_RE.split(value, maxsplit=1) if part]
+    if not parts:
+        return None, None
+    start = parse_resume_date(parts[0], today=today)
+    end = parse_resume_date(parts[1], is_end=True, today=today) if len(parts) > 1 else None
+    return start, end
+
+
+def _period(date_start: Optional[str], date_end: Optional[str], today: date) -> Optional[Tuple[date, date]]:
+    start = parse_resume_date(date_start, today=today)
+    end = None
+    if start is None and date_start:
+        # The whole range may have been written into one field ("2018 - Present")
+        start, end = parse_date_range(date_start, today=today)
+    if start is None:
+        if date_start:
+            logger.warning(f"Skipping period with unrecognized start date '{date_start}'")
+        return None
+    if date_end:
+        end = parse_resume_date(date_end, is_end=True, today=today)
+        if end is None:
+            logger.warning(f"Skipping period with unrecognized end date '{date_end}'")
+            return None
+    elif end is None:
+        # No end date means the period is still running
+        end = date(today.year, today.month, 1)
+    if end < start:
+        return None
+    return start, end
+
+
+def _month_index(value: date) -> int:
+    return value.year * 12 + value.month - 1
+
+
+def calculate_total_duration(periods: Iterable[Dict[str, Optional[str]]], today: Optional[date] = None) -> Dict[str, int]:
+    """
+    Sums the duration of date periods, merging overlaps so no month is counted twice.
+    Both the start and the end month count ("Jan 2019" - "Dec 2019" is 12 months, "2019" - "2020" two years),
+    and a period starting the month after another ends continues it.
+    :param periods: Dicts with 'date_start' and 'date_end' text as extracted from the resume.
+    :param today: Date used for open-ended periods; defaults to today.
+    :return: {'years': int, 'months': int}
+    """
+    today = today or date.today()
+    parsed: List[Tuple[date, date]] = []
+    for period in periods:
+        result = _period(period.get("date_start"), period.get("date_end"), today)
+        if result:
+            parsed.append(result)
+    if not parsed:
+        return {"years": 0, "months": 0}
+
+    spans = sorted((_month_index(start), _month_index(end)) for start, end in parsed)
+    total_months = 0
+    current_start, current_end = spans[0]
+    for start, end in spans[1:]:
+        if start <= current_end + 1:
+            current_end = max(current_end, end)
+        else:
+            total_months += current_end - current_start + 1
+            current_start, current_end = start, end
+    total_months += current_end - current_start + 1
+
+    return {"years": total_months // 12, "months": total_months % 12}
@@ -0,0 +1,106 @@
+# app/utils/deadline.py
+
+import asyncio
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Optional, TypeVar
+import logging
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Absolute deadline (time.monotonic()) of the request currently being served. Tasks created while
+# a deadline is set inherit it, so it flows from the endpoint down to GPTService without extra arguments.
+_request_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """
+    Raised when the request deadline or a stage timeout expires before the work finished.
+    """
+
+
+class ClientDisconnected(Exception):
+    """
+    Raised when the client went away and the request's remaining work was cancelled.
+    """
+
+
+@contextmanager
+def request_deadline(seconds: Optional[float]):
+    """
+    Sets the deadline for all work started inside the block (and tasks created from it).
+    :param seconds: Time budget from now; None means no deadline.
+    """
+    token = _request_deadline.set(time.monotonic() + seconds if seconds else None)
+    try:
+        yield
+    finally:
+        _request_deadline.reset(token)
+
+
+def remaining_time() -> Optional[float]:
+    """
+    Seconds left before the current request deadline, or None when there is no deadline.
+    """
+    deadline = _request_deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def stage_timeout(stage_seconds: Optional[float]) -> Optional[float]:
+    """
+    Effective timeout for a stage: the stage's own timeout capped by what is left of the request deadline.
+    Raises DeadlineExceeded when the request deadline has already passed, so queued work never starts.
+    """
+    remaining = remaining_time()
+    if remaining is not None and remaining <= 0:
+        raise DeadlineExceeded("Request deadline exceeded before the stage started.")
+    if remaining is None:
+        return stage_seconds
+    if stage_seconds is None:
+        return remaining
+    return min(stage_seconds, remaining)
+
+
+async def run_with_timeout(awaitable: Awaitable[T], stage: str, stage_seconds: Optional[float]) -> T:
+    """
+    Awaits a stage under its effective timeout, cancelling it (and its in-flight HTTP call) on expiry.
+    """
+    try:
+        timeout = stage_timeout(stage_seconds)
+    except DeadlineExceeded:
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        raise
+    try:
+        return await asyncio.wait_for(awaitable, timeout=timeout)
+    except asyncio.TimeoutError:
+        raise DeadlineExceeded(f"Stage '{stage}' did not finish within {timeout:.1f}s.")
+
+
+async def cancel_on_disconnect(request, awaitable: Awaitable[T], poll_interval: float = 0.5) -> T:
+    """
+    Runs the request's work as a task and cancels it as soon as the client disconnects.
+    :param request: The Starlette/FastAPI Request being served.
+    :param awaitable: The work to run.
+    :param poll_interval: Seconds between disconnect checks.
+    :return: The work's result.
+    """
+    task = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_interval)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                task.cancel()
+                logger.warning(f"Client disconnected from {request.url.path}, cancelled remaining work.")
+                raise ClientDisconnected(f"Client disconnected from {request.url.path}.")
+    finally:
+        if not task.done():
+            # The endpoint itself was cancelled (e.g. server shutdown); don't leave the work running
+            task.cancel()
@@ -1,57 +1,125 @@
 # app/utils/file_parser.py
 
+import asyncio
 from io import BytesIO
 import logging
-from PyPDF2 import PdfReader
-from docx import Document
-import pytesseract
-from PIL import Image
 import re
 from zipfile import ZipFile
-import xml.etree.ElementTree as ET
-import win32com.client
 import tempfile
+from typing import Optional
+from app.utils.text_normalizer import PAGE_BREAK, normalize_document_text
+from app.utils.profiling import profile_stage
+from app.utils.parse_sandbox import DocumentLimitExceeded, ParseLimits, ParseSandbox
+
+# Format-specific parsers (PyPDF2, python-docx, pytesseract, PIL, pywin32) are imported
+# inside the functions that need them so that startup only pays for the formats in use.
 
 logger = logging.getLogger(__name__)
 
-def parse_pdf_or_docx(file_buffer: BytesIO, filename: str) -> str:
+# File extensions parse_pdf_or_docx can read
+SUPPORTED_EXTENSIONS = (".pdf", ".docx", ".doc", ".png", ".jpg", ".jpeg", ".gif")
+
+# Budgets applied by extract_normalized_text, and the worker pool it parses in (None parses in-process,
+# where the time and memory budgets can't be enforced). Set at startup with configure_parsing.
+_parse_limits = ParseLimits()
+_parse_sandbox: Optional[ParseSandbox] = None
+
+def configure_parsing(limits: ParseLimits, sandbox: Optional[ParseSandbox] = None) -> None:
+    global _parse_limits, _parse_sandbox
+    _parse_limits = limits
+    _parse_sandbox = sandbox
+
+def check_chars(text: str, limits: Optional[ParseLimits], filename: str = "document") -> None:
+    if limits and limits.max_chars and len(text) > limits.max_chars:
+        raise DocumentLimitExceeded(
+            "max_chars", len(text), limits.max_chars,
+            f"'{filename}' has more than {limits.max_chars} characters of text."
+        )
+
+def parse_pdf_or_docx(file_buffer: BytesIO, filename: str, limits: Optional[ParseLimits] = None) -> str:
     """
     Determines the file type (PDF, DOC, DOCX, or image) and extracts text accordingly.
     :param file_buffer: File buffer of the uploaded file.
     :param filename: Name of the uploaded file.
+    :param limits: Optional page, character and image size budgets; DocumentLimitExceeded is raised over budget.
     :return: Extracted text content as a string.
     """
     try:
         if filename.lower().endswith(".pdf"):
-            return parse_pdf(file_buffer)
+            text = parse_pdf(file_buffer, limits)
         elif filename.lower().endswith(".docx"):
-            return parse_docx(file_buffer)
+            text = parse_docx(file_buffer)
         elif filename.lower().endswith(".doc"):
-            return parse_doc(file_buffer)
+            text = parse_doc(file_buffer)
         elif filename.lower().endswith(('.png', '.jpg', '.jpeg', '.gif')):
-            return image_to_text(file_buffer)  # Handle image to text conversion
+            text = image_to_text(file_buffer, limits)  # Handle image to text conversion
         else:
             raise ValueError("Unsupported file format. Only PDF, DOCX, DOC, and image formats are supported.")
+        check_chars(text, limits, filename)
+        return text
+    except DocumentLimitExceeded as e:
+        logger.warning(f"Rejected '{filename}': {str(e)}")
+        raise
     except Exception as e:
         logger.error(f"Error parsing file '{filename}': {str(e)}", exc_info=True)
         raise
 
-def parse_pdf(file_buffer: BytesIO) -> str:
+def extract_normalized_text(file_buffer: BytesIO, filename: str, max_chars: Optional[int] = None) -> str:
+    """
+    Extracts text with parse_pdf_or_docx and compacts it for prompting (see normalize_document_text).
+    Logs the characters and estimated tokens saved for the document.
+    :param file_buffer: File buffer of the uploaded file.
+    :param filename: Name of the uploaded file.
+    :param max_chars: Optional cap on the normalized text length.
+    :return: Normalized text content as a string.
+    """
+    with profile_stage("document_parsing"):
+        if _parse_sandbox is not None:
+            raw_text = _parse_sandbox.parse(file_buffer, filename)
+        else:
+            raw_text = parse_pdf_or_docx(file_buffer, filename, _parse_limits)
+    with profile_stage("text_normalization"):
+        text, report = normalize_document_text(raw_text, max_chars)
+    logger.info(
+        f"Normalized '{filename}': {report.original_chars} -> {report.normalized_chars} chars "
+        f"(saved {report.chars_saved} chars, ~{report.estimated_tokens_saved} tokens; "
+        f"{report.repeated_lines_removed} repeated lines, {report.duplicate_links_removed} duplicate links removed"
+        f"{', truncated' if report.truncated else ''})"
+    )
+    return text
+
+async def extract_normalized_text_async(file_buffer: BytesIO, filename: str, max_chars: Optional[int] = None) -> str:
+    """
+    extract_normalized_text in a worker thread, for async code: parsing (and waiting on a parser worker
+    process) never blocks the event loop. The request deadline is carried over to the thread.
+    """
+    return await asyncio.to_thread(extract_normalized_text, file_buffer, filename, max_chars)
+
+def parse_pdf(file_buffer: BytesIO, limits: Optional[ParseLimits] = None) -> str:
     """
     Extracts text from a PDF file, including hyperlinks.
     :param file_buffer: File buffer of the uploaded PDF file.
+    :param limits: Optional page and character budgets, checked before and during extraction.
     :return: Extracted text content as a string, including hyperlinks.
     """
     try:
         logger.info("Parsing PDF file")
+        from PyPDF2 import PdfReader
         reader = PdfReader(file_buffer)
+        page_count = len(reader.pages)
+        if limits and limits.max_pages and page_count > limits.max_pages:
+            raise DocumentLimitExceeded(
+                "max_pages", page_count, limits.max_pages, f"PDF has {page_count} pages, the limit is {limits.max_pages}."
+            )
         text = ""
         hyperlinks = []
 
         # Extract text from each page and gather hyperlinks from metadata if available
         for page in reader.pages:
             page_text = page.extract_text() or ""
-            text += page_text
+            text += page_text + PAGE_BREAK
+            # Stop as soon as the text is over budget instead of extracting the remaining pages
+            check_chars(text, limits, "PDF")
 
             # Extract hyperlinks from annotations (if available)
             if "/Annots" in page:
@@ -66,6 +134,8 @@ def parse_pdf(file_buffer: BytesIO) -> str:
         hyperlinks_text = '\n'.join(hyperlinks)
         return text.strip() + '\n' + hyperlinks_text
 
+    except DocumentLimitExceeded:
+        raise
     except Exception as e:
         logger.error(f"Error reading PDF file: {str(e)}", exc_info=True)
         raise
@@ -78,6 +148,7 @@ def parse_docx(file_buffer: BytesIO) -> str:
     """
     try:
         logger.info("Parsing DOCX file")
+        from docx import Document
         doc = Document(file_buffer)
         text = ""
 
@@ -91,7 +162,8 @@ def parse_docx(file_buffer: BytesIO) -> str:
         # Extract header and footer text
         header_footer_text = extract_header_footer(doc)
 
-        return text.strip() + '\n' + hyperlinks + '\n' + header_footer_text
+        # Header/footer text goes on its own "page" so normalization can drop lines it repeats
+        return text.strip() + '\n' + hyperlinks + PAGE_BREAK + header_footer_text
 
     except Exception as e:
         logger.error(f"Error reading DOCX file: {str(e)}", exc_info=True)
@@ -152,6 +224,7 @@ def parse_doc(file_buffer: BytesIO) -> str:
             temp_filename = temp_file.name
         
         # Initialize COM client for Word
+        import win32com.client
         word = win32com.client.Dispatch("Word.Application")
         doc = word.Documents.Open(temp_filename)
 
@@ -168,18 +241,30 @@ def parse_doc(file_buffer: BytesIO) -> str:
         logger.error(f"Error reading DOC file: {str(e)}", exc_info=True)
         raise
 
-def image_to_text(file_buffer: BytesIO) -> str:
+def image_to_text(file_buffer: BytesIO, limits: Optional[ParseLimits] = None) -> str:
     """
     Extract text from an image using Tesseract OCR.
     :param file_buffer: The image file buffer.
+    :param limits: Optional image size budget, checked from the header before the image is decoded.
     :return: Extracted text content as a string.
     """
     try:
         logger.info("Extracting text from image")
+        import pytesseract
+        from PIL import Image
+        # Image.open only reads the header; pixels are decoded by OCR
         image = Image.open(file_buffer)
+        megapixels = image.width * image.height / 1_000_000
+        if limits and limits.max_image_megapixels and megapixels > limits.max_image_megapixels:
+            raise DocumentLimitExceeded(
+                "max_image_megapixels", round(megapixels, 1), limits.max_image_megapixels,
+                f"Image is {image.width}x{image.height} ({megapixels:.1f} MP), the limit is {limits.max_image_megapixels} MP."
+            )
         text = pytesseract.image_to_string(image)
         return text.strip()
     
+    except DocumentLimitExceeded:
+        raise
     except Exception as e:
         logger.error(f"Error processing image file: {str(e)}", exc_info=True)
         raise
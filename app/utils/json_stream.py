@@ -0,0 +1,82 @@
+# app/utils/json_stream.py
+
+import json
+import re
+from typing import Any, List, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Characters that can change the parser state outside a string; inside a string only quotes and escapes matter
+_STRUCTURE = re.compile(r'["{}\[\],]')
+_STRING = re.compile(r'["\\]')
+
+
+class IncrementalJSONObjectParser:
+    """
+    Incremental parser for a JSON object that arrives in chunks (a streamed model response).
+    feed() returns the top-level (key, value) pairs completed by each chunk, in output order, so a
+    field can be used as soon as its value is closed, long before the whole object is.
+    Every character is scanned once and each field's text is decoded once, when it completes, however
+    finely the response is chunked; only the field being generated is kept buffered.
+    Malformed fields are skipped: the caller still validates the whole object at the end.
+    """
+    def __init__(self):
+        self._text = ""
+        self._pos = 0            # next character to scan in _text
+        self._field_start = 0    # start of the current top-level field in _text
+        self._depth = 0
+        self._in_string = False
+        self.done = False
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        if self.done or not chunk:
+            return []
+        self._text += chunk
+        text, pos, completed = self._text, self._pos, []
+        while not self.done:
+            match = (_STRING if self._in_string else _STRUCTURE).search(text, pos)
+            if match is None:
+                pos = len(text)
+                break
+            index, char = match.start(), match.group()
+            pos = index + 1
+            if self._in_string:
+                if char == "\\":
+                    if pos >= len(text):
+                        # The escaped character is in the next chunk; rescan the backslash then
+                        pos = index
+                        break
+                    pos += 1
+                else:
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+                if self._depth == 1:
+                    self._field_start = pos
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._complete(text[self._field_start:index], completed)
+                    self.done = True
+            elif self._depth == 1:  # a comma between top-level fields
+                self._complete(text[self._field_start:index], completed)
+                self._field_start = pos
+        # Keep only the field in progress
+        if self._field_start:
+            text = text[self._field_start:]
+            pos -= self._field_start
+            self._field_start = 0
+        self._text, self._pos = text, pos
+        return completed
+
+    @staticmethod
+    def _complete(field_text: str, completed: List[Tuple[str, Any]]) -> None:
+        if not field_text.strip():
+            return
+        try:
+            completed.extend(json.loads("{" + field_text + "}").items())
+        except ValueError:
+            logger.debug(f"Skipping malformed streamed field: {field_text[:80]!r}")
@@ -0,0 +1,90 @@
+# app/utils/loop_monitor.py
+
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from typing import Any, Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class EventLoopLagMonitor:
+    """
+    Detects callbacks that block the event loop (sync PDF parsing, OCR, large validations, ...).
+    A coroutine on the loop stamps a heartbeat every interval; a watchdog thread checks the stamp
+    and, when it is older than the threshold, logs the loop thread's current stack, i.e. the code
+    that is blocking it. Each stall is logged once, with its total duration when it ends.
+    """
+    def __init__(self, threshold: float = 0.2, interval: float = 0.05):
+        self.threshold = threshold
+        self.interval = interval
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._heartbeat = time.monotonic()
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.stalls = 0
+        self.max_lag = 0.0
+        self.last_stall: Optional[Dict[str, Any]] = None
+
+    def start(self) -> None:
+        """
+        Starts monitoring the running loop; call from a coroutine (e.g. the startup event).
+        """
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stop.clear()
+        self._task = self._loop.create_task(self._beat())
+        self._watchdog = threading.Thread(target=self._watch, name="event-loop-lag-monitor", daemon=True)
+        self._watchdog.start()
+        logger.info(f"Event loop lag monitor started (threshold {self.threshold * 1000:.0f} ms).")
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _beat(self) -> None:
+        while True:
+            self._heartbeat = time.monotonic()
+            await asyncio.sleep(self.interval)
+
+    def _watch(self) -> None:
+        stalled_since = None
+        while not self._stop.wait(self.interval):
+            lag = time.monotonic() - self._heartbeat - self.interval
+            if lag > self.threshold:
+                if stalled_since is None:
+                    stalled_since = self._heartbeat
+                    self._report_stall(lag)
+                self.max_lag = max(self.max_lag, lag)
+            elif stalled_since is not None:
+                duration = time.monotonic() - stalled_since
+                if self.last_stall is not None:
+                    self.last_stall["duration_ms"] = round(duration * 1000, 1)
+                logger.warning(f"Event loop unblocked after {duration * 1000:.0f} ms.")
+                stalled_since = None
+
+    def _report_stall(self, lag: float) -> None:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = "".join(traceback.format_stack(frame)) if frame is not None else "<unavailable>"
+        self.stalls += 1
+        self.last_stall = {"detected_after_ms": round(lag * 1000, 1), "duration_ms": None, "stack": stack}
+        logger.warning(f"Event loop blocked for more than {lag * 1000:.0f} ms, loop thread stack:\n{stack}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "threshold_ms": self.threshold * 1000,
+            "stalls": self.stalls,
+            "max_lag_ms": round(self.max_lag * 1000, 1),
+            "last_stall": self.last_stall,
+        }
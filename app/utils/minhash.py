@@ -0,0 +1,49 @@
+# app/utils/minhash.py
+
+import re
+import zlib
+from typing import List, Optional, Set
+import numpy as np
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_MERSENNE_PRIME = np.uint64((1 << 31) - 1)
+_MAX_HASH = (1 << 31) - 1
+
+DEFAULT_NUM_PERM = 100
+DEFAULT_SHINGLE_SIZE = 3
+
+# Fixed seed: signatures must be comparable across processes and restarts
+_rng = np.random.RandomState(1)
+_PERM_A = _rng.randint(1, _MAX_HASH, size=DEFAULT_NUM_PERM).astype(np.uint64)
+_PERM_B = _rng.randint(0, _MAX_HASH, size=DEFAULT_NUM_PERM).astype(np.uint64)
+
+
+def shingles(text: str, size: int = DEFAULT_SHINGLE_SIZE) -> Set[int]:
+    """
+    Hashed word n-grams of the lowercased text, ignoring punctuation and layout, so the PDF and
+    DOCX exports of the same document produce nearly the same set.
+    """
+    tokens = _TOKEN_RE.findall(text.lower())
+    if len(tokens) < size:
+        grams = [" ".join(tokens)] if tokens else []
+    else:
+        grams = (" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1))
+    return {zlib.crc32(gram.encode("utf-8")) & _MAX_HASH for gram in grams}
+
+
+def minhash_signature(text: str) -> Optional[List[int]]:
+    """
+    MinHash signature (DEFAULT_NUM_PERM values) of the text's shingles; None for text without words.
+    The share of equal positions between two signatures estimates the shingles' Jaccard similarity.
+    """
+    values = shingles(text)
+    if not values:
+        return None
+    hashes = np.fromiter(values, dtype=np.uint64, count=len(values))
+    # (a * x + b) mod p for every permutation and shingle at once; a, x < 2^31 so the product fits in 64 bits
+    permuted = (np.outer(_PERM_A, hashes) + _PERM_B[:, None]) % _MERSENNE_PRIME
+    return permuted.min(axis=1).astype(np.int64).tolist()
+
+
+def estimate_similarity(signature_a: List[int], signature_b: List[int]) -> float:
+    return float(np.mean(np.asarray(signature_a) == np.asarray(signature_b)))
@@ -0,0 +1,202 @@
+# app/utils/parse_sandbox.py
+
+import multiprocessing
+import os
+import threading
+import time
+from dataclasses import dataclass
+from io import BytesIO
+from typing import Any, Dict, List, Optional
+import logging
+from app.utils.deadline import DeadlineExceeded, remaining_time
+
+logger = logging.getLogger(__name__)
+
+# How often the parent checks a busy worker's wall time and memory
+_POLL_INTERVAL = 0.05
+
+
+@dataclass(frozen=True)
+class ParseLimits:
+    """
+    Per-document parsing budgets; 0 disables a limit. Pages, characters and image pixels are checked by the
+    parsers themselves; seconds and RSS are enforced by killing the isolated worker (see ParseSandbox).
+    """
+    max_pages: int = 200
+    max_chars: int = 2_000_000
+    max_image_megapixels: float = 50.0
+    max_seconds: float = 30.0
+    max_rss_mb: int = 1024
+
+
+class DocumentLimitExceeded(ValueError):
+    """
+    Raised when a document goes over one of its ParseLimits. Carries which limit, the observed value
+    (when known) and the maximum, so endpoints can return it as a structured error.
+    """
+    def __init__(self, limit: str, value: Optional[float], maximum: float, detail: str):
+        super().__init__(detail)
+        self.limit = limit
+        self.value = value
+        self.maximum = maximum
+        self.detail = detail
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "error": "document_limit_exceeded",
+            "limit": self.limit,
+            "value": self.value,
+            "maximum": self.maximum,
+            "detail": self.detail,
+        }
+
+
+def _rss_mb(pid: int) -> Optional[float]:
+    # Linux only; the RSS limit is not enforced where /proc is unavailable
+    try:
+        with open(f"/proc/{pid}/statm") as handle:
+            return int(handle.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _worker_main(connection) -> None:
+    """
+    Worker process loop: receives (content, filename, limits), answers ("ok", text), ("limit", args)
+    or ("error", message). Runs until the parent closes the pipe or kills it.
+    """
+    from app.utils.file_parser import parse_pdf_or_docx
+    while True:
+        try:
+            content, filename, limits = connection.recv()
+        except (EOFError, OSError):
+            return
+        try:
+            connection.send(("ok", parse_pdf_or_docx(BytesIO(content), filename, limits)))
+        except DocumentLimitExceeded as e:
+            connection.send(("limit", (e.limit, e.value, e.maximum, e.detail)))
+        except MemoryError:
+            connection.send(("limit", ("max_rss_mb", None, limits.max_rss_mb, f"Parsing '{filename}' ran out of memory.")))
+        except Exception as e:
+            connection.send(("error", str(e)))
+
+
+class _Worker:
+    def __init__(self, context):
+        self.connection, child_connection = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_connection,), daemon=True)
+        self.process.start()
+        child_connection.close()
+
+    def kill(self) -> None:
+        self.process.kill()
+        self.process.join(timeout=5)
+        self.connection.close()
+
+
+class ParseSandbox:
+    """
+    Pool of isolated parser processes. Each document is parsed in a worker while the calling thread
+    watches it; a worker that runs past max_seconds (or the request deadline) or grows past max_rss_mb
+    is killed and replaced, and the caller gets a DocumentLimitExceeded instead of a stuck worker.
+    Workers are spawned (not forked) on demand, so they never inherit the server's threads or sockets; a killed
+    worker is replaced by the next document that needs one.
+    """
+    def __init__(self, limits: ParseLimits, workers: int = 2):
+        self.limits = limits
+        self.size = max(1, workers)
+        self._context = multiprocessing.get_context("spawn")
+        self._idle: List[_Worker] = []
+        self._started = 0
+        # Signalled whenever a worker goes back idle or a killed one frees its place in the pool
+        self._available = threading.Condition()
+
+    def _acquire(self, timeout: Optional[float]) -> _Worker:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._available:
+            while not self._idle and self._started >= self.size:
+                # Every job ends within its time budget, so a worker (or a free place) always comes back
+                wait = None if deadline is None else deadline - time.monotonic()
+                if wait is not None and wait <= 0:
+                    raise DeadlineExceeded("Request deadline exceeded while waiting for a parser worker.")
+                self._available.wait(wait)
+            if self._idle:
+                return self._idle.pop()
+            self._started += 1
+        # Spawned outside the lock; a failed spawn gives its place back, so it never shrinks the pool for good
+        try:
+            return _Worker(self._context)
+        except BaseException:
+            self._free_place()
+            raise
+
+    def _release(self, worker: _Worker) -> None:
+        with self._available:
+            self._idle.append(worker)
+            self._available.notify()
+
+    def _free_place(self) -> None:
+        with self._available:
+            self._started -= 1
+            self._available.notify()
+
+    def _replace(self, worker: _Worker) -> None:
+        # The next caller (possibly one already waiting) spawns the replacement
+        worker.kill()
+        self._free_place()
+
+    def parse(self, file_buffer: BytesIO, filename: str) -> str:
+        """
+        Parses a document in a worker process within the configured limits and returns its raw text.
+        Raises DocumentLimitExceeded over budget, DeadlineExceeded when the request deadline ends first,
+        and ValueError when the parser failed or crashed.
+        """
+        timeout, deadline_bound = self.limits.max_seconds or None, False
+        remaining = remaining_time()
+        if remaining is not None:
+            if remaining <= 0:
+                raise DeadlineExceeded("Request deadline exceeded before parsing started.")
+            if timeout is None or remaining < timeout:
+                timeout, deadline_bound = remaining, True
+
+        worker = self._acquire(remaining)
+        started = time.monotonic()
+        try:
+            worker.connection.send((file_buffer.getvalue(), filename, self.limits))
+            while not worker.connection.poll(_POLL_INTERVAL):
+                elapsed = time.monotonic() - started
+                if timeout is not None and elapsed > timeout:
+                    self._replace(worker)
+                    if deadline_bound:
+                        raise DeadlineExceeded(f"Request deadline exceeded while parsing '{filename}'.")
+                    raise DocumentLimitExceeded(
+                        "max_seconds", round(elapsed, 2), self.limits.max_seconds,
+                        f"Parsing '{filename}' took longer than {self.limits.max_seconds} seconds."
+                    )
+                rss = _rss_mb(worker.process.pid) if self.limits.max_rss_mb else None
+                if rss is not None and rss > self.limits.max_rss_mb:
+                    self._replace(worker)
+                    raise DocumentLimitExceeded(
+                        "max_rss_mb", round(rss), self.limits.max_rss_mb,
+                        f"Parsing '{filename}' used more than {self.limits.max_rss_mb} MB of memory."
+                    )
+                if not worker.process.is_alive():
+                    self._replace(worker)
+                    raise ValueError(f"Parser worker crashed while parsing '{filename}'.")
+            status, payload = worker.connection.recv()
+        except (EOFError, OSError):
+            self._replace(worker)
+            raise ValueError(f"Parser worker crashed while parsing '{filename}'.")
+        self._release(worker)
+
+        if status == "limit":
+            raise DocumentLimitExceeded(*payload)
+        if status == "error":
+            raise ValueError(payload)
+        return payload
+
+    def close(self) -> None:
+        with self._available:
+            idle, self._idle = self._idle, []
+        for worker in idle:
+            worker.kill()
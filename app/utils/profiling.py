@@ -0,0 +1,170 @@
+# app/utils/profiling.py
+
+import cProfile
+import io
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Only one deterministic profiler can be active per interpreter
+_cprofile_lock = threading.Lock()
+
+
+class RequestProfiler:
+    """
+    cProfile around a single request. Profiling is per thread, so other requests served by the
+    event loop at the same time show up in the profile too; use it on a quiet worker.
+    """
+    def __init__(self):
+        self._profile: Optional[cProfile.Profile] = None
+
+    def start(self) -> bool:
+        """
+        Starts profiling; returns False when another request is already being profiled.
+        """
+        if not _cprofile_lock.acquire(blocking=False):
+            return False
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+        return True
+
+    def stop(self, top: int = 40, sort_by: str = "cumulative") -> str:
+        """
+        Stops profiling and returns the pstats report of the top functions.
+        """
+        try:
+            self._profile.disable()
+            output = io.StringIO()
+            pstats.Stats(self._profile, stream=output).sort_stats(sort_by).print_stats(top)
+            return output.getvalue()
+        finally:
+            self._profile = None
+            _cprofile_lock.release()
+
+
+def _frame_stack(frame) -> str:
+    parts = []
+    while frame is not None:
+        code = frame.f_code
+        parts.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ";".join(reversed(parts))
+
+
+def sample_thread(thread_id: int, seconds: float, interval: float = 0.005, top: int = 50) -> Dict[str, Any]:
+    """
+    Statistical profile of one thread: records its stack every interval for the given window.
+    Runs in the calling thread, so call it off the thread being sampled (e.g. via run_in_threadpool).
+    Stacks are returned collapsed ("outer;inner" -> samples), ready for flamegraph tools.
+    """
+    samples: Counter = Counter()
+    own: Counter = Counter()
+    taken = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        frame = sys._current_frames().get(thread_id)
+        if frame is not None:
+            stack = _frame_stack(frame)
+            samples[stack] += 1
+            own[stack.rsplit(";", 1)[-1]] += 1
+            taken += 1
+        time.sleep(interval)
+    return {
+        "seconds": seconds,
+        "interval_ms": interval * 1000,
+        "samples": taken,
+        "top_functions": [{"function": name, "samples": count} for name, count in own.most_common(top)],
+        "stacks": dict(samples.most_common(top)),
+    }
+
+
+class StageMemoryTracker:
+    """
+    tracemalloc snapshots around pipeline stages. While tracing is on, every profile_stage block
+    records its net allocation by source line; results accumulate per stage until reset.
+    Concurrent requests allocate into the same snapshots, so numbers are approximate under load.
+    """
+    def __init__(self, top: int = 15):
+        self.top = top
+        self._stages: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def active(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self, frames: int = 10) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+
+    def stop(self) -> None:
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stages.clear()
+
+    def record(self, stage: str, before, after) -> None:
+        diff = after.compare_to(before, "lineno")
+        with self._lock:
+            entry = self._stages.setdefault(stage, {"calls": 0, "net_bytes": 0, "lines": Counter()})
+            entry["calls"] += 1
+            entry["net_bytes"] += sum(stat.size_diff for stat in diff)
+            for stat in diff[:self.top]:
+                entry["lines"][str(stat.traceback[0])] += stat.size_diff
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "tracing": self.active,
+                "traced_memory_bytes": tracemalloc.get_traced_memory()[0] if self.active else 0,
+                "stages": {
+                    stage: {
+                        "calls": entry["calls"],
+                        "net_bytes": entry["net_bytes"],
+                        "top_lines": [
+                            {"line": line, "size_diff_bytes": size}
+                            for line, size in entry["lines"].most_common(self.top)
+                        ],
+                    }
+                    for stage, entry in self._stages.items()
+                },
+            }
+
+
+stage_memory = StageMemoryTracker()
+
+
+@contextmanager
+def profile_stage(stage: str):
+    """
+    Records the block's allocations under stage when tracemalloc tracing is on; free otherwise.
+    """
+    if not stage_memory.active:
+        yield
+        return
+    before = tracemalloc.take_snapshot()
+    try:
+        yield
+    finally:
+        if stage_memory.active:
+            stage_memory.record(stage, before, tracemalloc.take_snapshot())
+
+
+def top_allocations(limit: int = 25) -> List[Dict[str, Any]]:
+    """
+    Current largest allocation sites, for a one-off snapshot.
+    """
+    if not tracemalloc.is_tracing():
+        return []
+    stats = tracemalloc.take_snapshot().statistics("lineno")[:limit]
+    return [{"line": str(stat.traceback[0]), "size_bytes": stat.size, "count": stat.count} for stat in stats]
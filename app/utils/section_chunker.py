@@ -0,0 +1,137 @@
+# app/utils/section_chunker.py
+
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+# Section kind -> heading texts that start it (compared lowercased, without punctuation)
+RESUME_SECTION_HEADINGS = {
+    "experience": [
+        "experience", "work experience", "professional experience", "employment", "employment history",
+        "work history", "career history", "relevant experience", "industry experience", "internships",
+        "projects", "academic projects", "research experience", "teaching experience",
+    ],
+    "education": [
+        "education", "academic background", "academic qualifications", "educational qualifications",
+        "qualifications", "academics", "education and training",
+    ],
+    "skills": [
+        "skills", "technical skills", "key skills", "core skills", "core competencies", "competencies",
+        "technologies", "tools and technologies", "areas of expertise", "skills and expertise",
+    ],
+    "languages": ["languages", "language skills", "languages known"],
+    "certifications": [
+        "certifications", "certificates", "certifications and courses", "courses", "licenses and certifications",
+        "trainings", "training",
+    ],
+}
+
+JD_SECTION_HEADINGS = {
+    "company": [
+        "about us", "about the company", "about the team", "about", "who we are", "our company", "company overview",
+        "our mission", "the company",
+    ],
+    "responsibilities": [
+        "responsibilities", "key responsibilities", "job responsibilities", "roles and responsibilities",
+        "role and responsibilities", "duties", "job duties", "your responsibilities", "what you will do",
+        "what you'll do", "what you'll be doing", "the role", "your role", "about the role", "day to day",
+        "your impact",
+    ],
+    "benefits": [
+        "benefits", "perks", "perks and benefits", "what we offer", "compensation", "compensation and benefits",
+        "why join us", "salary", "salary and benefits",
+    ],
+    "requirements": [
+        "requirements", "job requirements", "qualifications", "minimum qualifications", "preferred qualifications",
+        "basic qualifications", "skills", "required skills", "skills and experience", "what you bring",
+        "what we are looking for", "what we're looking for", "who you are", "must have", "nice to have",
+        "experience", "requirements and skills",
+    ],
+}
+
+# The text before the first recognized heading
+OVERVIEW = "overview"
+
+_HEADING_CLEAN_RE = re.compile(r"[^a-z&' ]+")
+_MAX_HEADING_CHARS = 50
+
+
+@dataclass
+class Section:
+    kind: str
+    text: str
+
+
+def _heading_kind(line: str, lookup: Dict[str, str]) -> Optional[str]:
+    if not line or len(line) > _MAX_HEADING_CHARS:
+        return None
+    key = " ".join(_HEADING_CLEAN_RE.sub(" ", line.lower().replace("&", " and ")).split())
+    return lookup.get(key)
+
+
+def split_sections(text: str, headings: Dict[str, Iterable[str]]) -> List[Section]:
+    """
+    Splits text at lines that are a known section heading ("EXPERIENCE", "Technical Skills:", ...).
+    Consecutive sections of the same kind are merged; text before the first heading is OVERVIEW.
+    """
+    lookup = {alias: kind for kind, aliases in headings.items() for alias in aliases}
+    sections: List[Section] = []
+    kind, lines = OVERVIEW, []
+    for line in text.split("\n"):
+        heading = _heading_kind(line.strip(), lookup)
+        if heading is None:
+            lines.append(line)
+            continue
+        if lines and any(part.strip() for part in lines):
+            sections.append(Section(kind, "\n".join(lines).strip()))
+        kind, lines = heading, [line]
+    if lines and any(part.strip() for part in lines):
+        sections.append(Section(kind, "\n".join(lines).strip()))
+
+    merged: List[Section] = []
+    for section in sections:
+        if merged and merged[-1].kind == section.kind:
+            merged[-1] = Section(section.kind, f"{merged[-1].text}\n\n{section.text}")
+        else:
+            merged.append(section)
+    return merged
+
+
+def split_text(text: str, max_chars: int) -> List[str]:
+    """
+    Splits text into pieces of at most max_chars, preferring blank lines (entry boundaries),
+    then line breaks. Single lines longer than max_chars are cut hard.
+    """
+    if len(text) <= max_chars:
+        return [text]
+    pieces, current = [], ""
+    for block in re.split(r"\n\s*\n", text):
+        # Blocks that fit are kept whole; longer ones are packed line by line
+        parts, joiner = ([block], "\n\n") if len(block) <= max_chars else (block.split("\n"), "\n")
+        for index, part in enumerate(parts):
+            if len(part) > max_chars:
+                if current:
+                    pieces.append(current)
+                    current = ""
+                while len(part) > max_chars:
+                    pieces.append(part[:max_chars])
+                    part = part[max_chars:]
+            separator = (joiner if index else "\n\n") if current else ""
+            if len(current) + len(separator) + len(part) > max_chars:
+                pieces.append(current)
+                current = part
+            else:
+                current = f"{current}{separator}{part}"
+    if current:
+        pieces.append(current)
+    return [piece for piece in pieces if piece.strip()]
+
+
+def chunk_sections(sections: List[Section], max_chars: int) -> List[Section]:
+    """
+    Breaks sections longer than max_chars into several chunks of the same kind.
+    """
+    chunks = []
+    for section in sections:
+        chunks.extend(Section(section.kind, piece) for piece in split_text(section.text, max_chars))
+    return chunks
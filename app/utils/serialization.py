@@ -0,0 +1,53 @@
+# app/utils/serialization.py
+
+import base64
+from typing import Any, Dict, List, Optional
+import numpy as np
+import orjson
+
+# How embeddings are returned in API responses
+EMBEDDING_FORMAT_LIST = "list"      # JSON array of floats (default, backwards compatible)
+EMBEDDING_FORMAT_BASE64 = "base64"  # base64 of little-endian float32 bytes, ~4x smaller than the JSON list
+EMBEDDING_FORMAT_OMIT = "omit"      # left out entirely
+EMBEDDING_FORMATS = (EMBEDDING_FORMAT_LIST, EMBEDDING_FORMAT_BASE64, EMBEDDING_FORMAT_OMIT)
+
+
+def validate_embedding_format(value: Optional[str]) -> str:
+    """
+    Returns the normalized embedding format; raises ValueError for unknown formats.
+    """
+    value = (value or EMBEDDING_FORMAT_LIST).strip().lower()
+    if value not in EMBEDDING_FORMATS:
+        raise ValueError(f"Unknown embedding_format '{value}', expected one of: {', '.join(EMBEDDING_FORMATS)}.")
+    return value
+
+
+def encode_embedding(vector: List[float], embedding_format: str) -> Any:
+    """
+    Encodes an embedding for a response. Decode base64 with
+    np.frombuffer(base64.b64decode(value), dtype="<f4").
+    """
+    if embedding_format == EMBEDDING_FORMAT_BASE64:
+        return base64.b64encode(np.asarray(vector, dtype="<f4").tobytes()).decode("ascii")
+    return vector
+
+
+def apply_embedding_format(payload: Dict[str, Any], key: str, embedding_format: str) -> Dict[str, Any]:
+    """
+    Returns a copy of payload with the embedding under key encoded or removed.
+    """
+    payload = dict(payload)
+    if embedding_format == EMBEDDING_FORMAT_OMIT:
+        payload.pop(key, None)
+    elif payload.get(key) is not None:
+        payload[key] = encode_embedding(payload[key], embedding_format)
+        if embedding_format == EMBEDDING_FORMAT_BASE64:
+            payload[f"{key}_encoding"] = "float32-le-base64"
+    return payload
+
+
+def ndjson_line(payload: Any) -> bytes:
+    """
+    Serializes one record of a newline-delimited JSON stream.
+    """
+    return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_APPEND_NEWLINE)
@@ -0,0 +1,126 @@
+# app/utils/text_normalizer.py
+
+import re
+import unicodedata
+from dataclasses import dataclass
+from typing import List, Optional, Set, Tuple
+
+# Separator the file parsers put between pages (and between the body and appended header/footer text)
+PAGE_BREAK = "\f"
+
+# Rough OpenAI tokenizer ratio for English prose, good enough for reporting savings
+CHARS_PER_TOKEN = 4
+
+_HYPHENATION_RE = re.compile(r"([a-z])-\n\s*([a-z])")
+_WHITESPACE_RE = re.compile(r"[ \t\u00a0\u200b]+")
+_PAGE_NUMBER_RE = re.compile(r"^(page\s+)?\d{1,3}(\s*(of|/)\s*\d{1,3})?$", re.IGNORECASE)
+_URL_RE = re.compile(r"^(https?://|mailto:|www\.)\S+$", re.IGNORECASE)
+
+# Running headers and footers (and page numbers) are looked for in this many non-blank lines at
+# the top and bottom of each page only; the same text in the body of a page is content
+EDGE_LINES = 2
+
+
+@dataclass
+class NormalizationReport:
+    """
+    Summary of what normalization removed from one document.
+    """
+    original_chars: int
+    normalized_chars: int
+    repeated_lines_removed: int
+    duplicate_links_removed: int
+    truncated: bool
+
+    @property
+    def chars_saved(self) -> int:
+        return self.original_chars - self.normalized_chars
+
+    @property
+    def estimated_tokens_saved(self) -> int:
+        return self.chars_saved // CHARS_PER_TOKEN
+
+
+def normalize_document_text(text: str, max_chars: Optional[int] = None) -> Tuple[str, NormalizationReport]:
+    """
+    Compacts parsed document text before it is sent to GPT.
+    - Normalizes unicode (ligatures, full-width characters) and joins hyphenated line breaks.
+    - Collapses whitespace runs and consecutive blank lines.
+    - Drops page numbers and keeps only the first occurrence of running headers/footers (DOCX
+      header/footer text appended after the body included): lines at the top or bottom of most pages.
+      Both are only looked for within EDGE_LINES of a page edge, so a repeated role title or skill
+      in the body is kept.
+    - Drops links that were already listed.
+    - Caps the result at max_chars, cutting at a line boundary.
+    :param text: Raw text from parse_pdf_or_docx, pages separated by PAGE_BREAK.
+    :param max_chars: Optional maximum length of the normalized text.
+    :return: The normalized text and a NormalizationReport.
+    """
+    original_chars = len(text)
+    text = unicodedata.normalize("NFKC", text.replace("\r\n", "\n").replace("\r", "\n"))
+    text = _HYPHENATION_RE.sub(r"\1\2", text)
+
+    pages = [
+        [_WHITESPACE_RE.sub(" ", line).strip() for line in page.split("\n")]
+        for page in text.split(PAGE_BREAK)
+    ]
+
+    # Positions of the first and last non-blank lines of each page
+    edges: List[Set[int]] = []
+    for lines in pages:
+        filled = [index for index, line in enumerate(lines) if line]
+        edges.append(set(filled[:EDGE_LINES] + filled[-EDGE_LINES:]))
+
+    # Lines at a page edge on most pages (at least two) are running headers, footers or re-appended text
+    pages_per_line = {}
+    for page_index, lines in enumerate(pages):
+        for index in edges[page_index]:
+            pages_per_line.setdefault(lines[index], set()).add(page_index)
+    repeated = {
+        line for line, page_indexes in pages_per_line.items()
+        if len(page_indexes) > 1 and 2 * len(page_indexes) > len(pages)
+    }
+
+    kept: List[str] = []
+    seen_repeated: Set[str] = set()
+    seen_links: Set[str] = set()
+    repeated_lines_removed = 0
+    duplicate_links_removed = 0
+    for page_index, lines in enumerate(pages):
+        for index, line in enumerate(lines):
+            if not line:
+                if kept and kept[-1]:
+                    kept.append("")
+                continue
+            at_edge = index in edges[page_index]
+            if at_edge and _PAGE_NUMBER_RE.match(line):
+                repeated_lines_removed += 1
+                continue
+            if _URL_RE.match(line):
+                link = line.lower().rstrip("/")
+                if link in seen_links:
+                    duplicate_links_removed += 1
+                    continue
+                seen_links.add(link)
+            elif at_edge and line in repeated:
+                if line in seen_repeated:
+                    repeated_lines_removed += 1
+                    continue
+                seen_repeated.add(line)
+            kept.append(line)
+
+    normalized = "\n".join(kept).strip()
+    truncated = False
+    if max_chars and len(normalized) > max_chars:
+        cut = normalized.rfind("\n", 0, max_chars)
+        normalized = normalized[:cut if cut > 0 else max_chars].rstrip()
+        truncated = True
+
+    report = NormalizationReport(
+        original_chars=original_chars,
+        normalized_chars=len(normalized),
+        repeated_lines_removed=repeated_lines_removed,
+        duplicate_links_removed=duplicate_links_removed,
+        truncated=truncated,
+    )
+    return normalized, report
@@ -0,0 +1,68 @@
+"""
+Measures cold-start time and resident memory of the API process.
+
+Each run imports `app.main` in a fresh interpreter, so the numbers reflect what a
+single uvicorn worker pays before serving its first request.
+
+Usage:
+    python benchmarks/startup_benchmark.py --runs 5
+    python benchmarks/startup_benchmark.py --root /path/to/other/checkout   # compare against another tree
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Executed inside the child interpreter
+_PROBE = r"""
+import json, resource, sys, time
+start = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - start
+heavy = ["PyPDF2", "docx", "pytesseract", "PIL", "win32com", "tensorflow"]
+print(json.dumps({
+    "import_seconds": elapsed,
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "modules_loaded": len(sys.modules),
+    "heavy_modules_loaded": [m for m in heavy if m in sys.modules],
+}))
+"""
+
+def run_once(root: str) -> dict:
+    env = dict(os.environ)
+    env.setdefault("OPENAI_API_KEY", "sk-benchmark")
+    env["PYTHONDONTWRITEBYTECODE"] = "1"
+    completed = subprocess.run(
+        [sys.executable, "-c", _PROBE],
+        cwd=root,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    # The app logs to stdout as well, the probe result is the last line
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup time and memory benchmark")
+    parser.add_argument("--runs", type=int, default=5, help="Number of cold starts to measure")
+    parser.add_argument("--root", default=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        help="Repository root to benchmark")
+    args = parser.parse_args()
+
+    samples = [run_once(args.root) for _ in range(args.runs)]
+    seconds = [s["import_seconds"] for s in samples]
+    rss = [s["max_rss_mb"] for s in samples]
+
+    print(f"root:                {args.root}")
+    print(f"runs:                {args.runs}")
+    print(f"cold start (median): {statistics.median(seconds) * 1000:.1f} ms")
+    print(f"cold start (min):    {min(seconds) * 1000:.1f} ms")
+    print(f"max RSS (median):    {statistics.median(rss):.1f} MB")
+    print(f"modules loaded:      {samples[-1]['modules_loaded']}")
+    print(f"heavy modules:       {', '.join(samples[-1]['heavy_modules_loaded']) or 'none'}")
+
+if __name__ == "__main__":
+    main()
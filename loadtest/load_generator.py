@@ -0,0 +1,159 @@
+"""
+Drives the API with concurrent requests and reports throughput, latency percentiles and errors.
+
+Run the API against the OpenAI stub (see openai_stub.py), then e.g.:
+    python loadtest/load_generator.py --scenario parse-resume --resume samples/cv.pdf --concurrency 16 --duration 60
+    python loadtest/load_generator.py --scenario score-resumes --resume a.pdf --resume b.pdf --jd jd.pdf --requests 200
+
+Scenarios:
+    parse-resume    POST /api/parse-resume/ with one resume per request (cycling through --resume)
+    enhance         POST /api/job-description-enhance/ with --jd
+    score-resumes   POST /api/score-resumes/ with all --resume files per request (runs one enhance first)
+
+Score caching (--score-cache, score-resumes only):
+    miss    every request sends its own user_input ("Load test #<n>"), so each one runs the scoring calls
+    hit     every request sends the same user_input, so after the first one scores come from the score cache
+Parsed resumes and the enhanced JD are reused in both modes, as with real traffic for the same files.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import os
+import statistics
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+import httpx
+
+
+def _files(paths: List[str]) -> List[tuple]:
+    files = []
+    for path in paths:
+        with open(path, "rb") as handle:
+            files.append((os.path.basename(path), handle.read()))
+    return files
+
+
+def build_request(scenario: str, resumes: List[tuple], jd: Optional[tuple], counter, score_cache: str = "miss") -> Dict:
+    number = next(counter)
+    if scenario == "parse-resume":
+        name, content = resumes[number % len(resumes)]
+        return {"url": "/api/parse-resume/", "files": [("file", (name, content))]}
+    if scenario == "enhance":
+        return {"url": "/api/job-description-enhance/", "files": [("file", jd)], "params": {"embedding_format": "omit"}}
+    return {
+        "url": "/api/score-resumes/",
+        "files": [("files", resume) for resume in resumes],
+        # The score cache is keyed by user_input, a distinct one per request makes every request score
+        "data": {"user_input": f"Load test #{number}" if score_cache == "miss" else "Load test"},
+    }
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    # Nearest-rank percentile
+    index = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+async def worker(client, scenario, resumes, jd, counter, stop_at, remaining, latencies, statuses, score_cache):
+    while time.monotonic() < stop_at:
+        if remaining is not None:
+            if remaining[0] <= 0:
+                return
+            remaining[0] -= 1
+        spec = build_request(scenario, resumes, jd, counter, score_cache)
+        started = time.perf_counter()
+        try:
+            response = await client.post(spec["url"], files=spec["files"], data=spec.get("data"), params=spec.get("params"))
+            statuses[response.status_code] += 1
+            if response.status_code < 400:
+                latencies.append(time.perf_counter() - started)
+        except httpx.HTTPError as e:
+            statuses[type(e).__name__] += 1
+
+
+async def run(args) -> Dict:
+    resumes = _files(args.resume)
+    jd = _files([args.jd])[0] if args.jd else None
+    if args.scenario in ("parse-resume", "score-resumes") and not resumes:
+        raise SystemExit("--resume is required for this scenario")
+    if args.scenario in ("enhance", "score-resumes") and not jd:
+        raise SystemExit("--jd is required for this scenario")
+
+    timeout = httpx.Timeout(args.timeout)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.target, timeout=timeout, limits=limits) as client:
+        if args.scenario == "score-resumes":
+            setup = await client.post("/api/job-description-enhance/", files=[("file", jd)], params={"embedding_format": "omit"})
+            setup.raise_for_status()
+
+        latencies: List[float] = []
+        statuses: Counter = Counter()
+        counter = itertools.count()
+        remaining = [args.requests] if args.requests else None
+        stop_at = time.monotonic() + (args.duration if not args.requests else float("inf"))
+        started = time.perf_counter()
+        await asyncio.gather(*[
+            worker(client, args.scenario, resumes, jd, counter, stop_at, remaining, latencies, statuses, args.score_cache)
+            for _ in range(args.concurrency)
+        ])
+        elapsed = time.perf_counter() - started
+
+    total = sum(statuses.values())
+    errors = total - len(latencies)
+    return {
+        "scenario": args.scenario,
+        "concurrency": args.concurrency,
+        "score_cache": args.score_cache if args.scenario == "score-resumes" else None,
+        "requests": total,
+        "elapsed_seconds": round(elapsed, 3),
+        "rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50) * 1000, 1),
+            "p95": round(percentile(latencies, 95) * 1000, 1),
+            "p99": round(percentile(latencies, 99) * 1000, 1),
+            "mean": round(statistics.mean(latencies) * 1000, 1) if latencies else 0.0,
+        },
+        "error_rate": round(errors / total, 4) if total else 0.0,
+        "statuses": {str(key): value for key, value in sorted(statuses.items(), key=lambda item: str(item[0]))},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API load generator")
+    parser.add_argument("--target", default="http://localhost:8000", help="Base URL of the API")
+    parser.add_argument("--scenario", choices=["parse-resume", "enhance", "score-resumes"], default="parse-resume")
+    parser.add_argument("--resume", action="append", default=[], help="Resume file (repeatable)")
+    parser.add_argument("--jd", help="Job description file")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent in-flight requests")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to run (ignored with --requests)")
+    parser.add_argument("--requests", type=int, help="Total requests to send instead of a fixed duration")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Per-request timeout in seconds")
+    parser.add_argument("--score-cache", choices=["miss", "hit"], default="miss",
+                        help="score-resumes: a distinct user_input per request (miss) or the same one (hit)")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"scenario:     {report['scenario']} (concurrency {report['concurrency']})")
+    if report["score_cache"]:
+        print(f"score cache:  {report['score_cache']}")
+    print(f"requests:     {report['requests']} in {report['elapsed_seconds']} s")
+    print(f"throughput:   {report['rps']} req/s")
+    print(f"latency (ms): p50 {report['latency_ms']['p50']}  p95 {report['latency_ms']['p95']}  "
+          f"p99 {report['latency_ms']['p99']}  mean {report['latency_ms']['mean']}")
+    print(f"error rate:   {report['error_rate'] * 100:.2f}%")
+    print(f"statuses:     {report['statuses']}")
+
+
+if __name__ == "__main__":
+    main()
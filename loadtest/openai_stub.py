@@ -0,0 +1,263 @@
+"""
+Local stand-in for the OpenAI endpoints used by GPTService, for load tests without API costs.
+
+Implements:
+  POST /v1/chat/completions   structured output (response_format json_schema): returns a payload
+                              generated from the request's own JSON schema, so it validates against
+                              ResumeSchema, ResumeScoringSchema, partial schemas, etc.
+                              With "stream": true the payload is sent as SSE chunks, the latency spread
+                              evenly over them like token generation.
+  POST /v1/embeddings         deterministic 1,536-dim vectors (float list or base64, as requested)
+
+Latency, 429 rate and token usage are configurable.
+
+Usage:
+    python loadtest/openai_stub.py --port 9000 --latency lognormal --latency-ms 800 --rate-429 0.02
+    OPENAI_BASE_URL=http://localhost:9000/v1 OPENAI_API_KEY=sk-stub uvicorn app.main:app --workers 4
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import math
+import random
+import struct
+import time
+import uuid
+from typing import Any, Dict
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+EMBEDDING_DIMENSIONS = 1536
+
+# Overridden from the command line in main()
+settings = {
+    "latency": "fixed",         # fixed | uniform | lognormal
+    "latency_ms": 0.0,          # fixed value, uniform upper bound, or lognormal median
+    "latency_sigma": 0.5,       # lognormal shape
+    "embedding_latency_ms": 0.0,
+    "rate_429": 0.0,            # share of requests answered with 429
+    "cached_ratio": 0.0,        # share of prompt tokens reported as cached
+    "chars_per_token": 4.0,
+    "stream_chunk_chars": 8,    # content characters per streamed chunk
+}
+
+app = FastAPI(title="OpenAI stub")
+
+# Plausible values for well-known fields; anything else is generated from the schema type
+_FIELD_VALUES = {
+    "candidate_name": "Jane Doe",
+    "email_address": "jane.doe@example.com",
+    "phone_number": "+91 9876543210",
+    "date_start": "Jan 2019",
+    "date_end": "Present",
+    "resume_score": 7,
+    "job_title": "Software Engineer",
+    "company": "Example Corp",
+    "institution": "Example University",
+    "url": "https://example.com/jane",
+}
+
+
+def _latency_seconds(median_ms: float) -> float:
+    if median_ms <= 0:
+        return 0.0
+    if settings["latency"] == "uniform":
+        return random.uniform(0, median_ms) / 1000
+    if settings["latency"] == "lognormal":
+        return random.lognormvariate(math.log(median_ms), settings["latency_sigma"]) / 1000
+    return median_ms / 1000
+
+
+def _resolve(schema: Dict[str, Any], root: Dict[str, Any]) -> Dict[str, Any]:
+    while "$ref" in schema:
+        path = schema["$ref"].lstrip("#/").split("/")
+        schema = root
+        for part in path:
+            schema = schema[part]
+    return schema
+
+
+def generate_instance(schema: Dict[str, Any], root: Dict[str, Any], name: str = "", depth: int = 0) -> Any:
+    """
+    Builds a value that validates against a (strict-mode) JSON schema.
+    """
+    schema = _resolve(schema, root)
+    if "anyOf" in schema:
+        options = [option for option in schema["anyOf"] if _resolve(option, root).get("type") != "null"]
+        return generate_instance(options[0], root, name, depth) if options else None
+    if "enum" in schema:
+        return schema["enum"][0]
+    if "const" in schema:
+        return schema["const"]
+
+    kind = schema.get("type")
+    if isinstance(kind, list):
+        kind = next((k for k in kind if k != "null"), "null")
+    if kind == "object":
+        return {
+            key: generate_instance(value, root, key, depth + 1)
+            for key, value in schema.get("properties", {}).items()
+        }
+    if kind == "array":
+        count = 0 if depth > 6 else 2
+        return [generate_instance(schema.get("items", {}), root, name, depth + 1) for _ in range(count)]
+    if kind == "integer":
+        value = _FIELD_VALUES.get(name, 3)
+        return value if isinstance(value, int) else 3
+    if kind == "number":
+        value = _FIELD_VALUES.get(name, 0.5)
+        return float(value) if isinstance(value, (int, float)) else 0.5
+    if kind == "boolean":
+        return True
+    if kind == "null":
+        return None
+    value = _FIELD_VALUES.get(name)
+    return value if isinstance(value, str) else f"sample {name or 'value'}"
+
+
+def _usage(prompt_chars: int, completion_chars: int) -> Dict[str, Any]:
+    prompt_tokens = max(1, int(prompt_chars / settings["chars_per_token"]))
+    completion_tokens = max(1, int(completion_chars / settings["chars_per_token"]))
+    # The real API reports cached tokens in 128-token increments once the prefix is >= 1,024 tokens
+    cached = int(prompt_tokens * settings["cached_ratio"]) // 128 * 128 if prompt_tokens >= 1024 else 0
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+        "prompt_tokens_details": {"cached_tokens": cached},
+    }
+
+
+def _rate_limited() -> JSONResponse:
+    return JSONResponse(
+        status_code=429,
+        headers={"retry-after": "1"},
+        content={"error": {"message": "Rate limit reached (stub).", "type": "rate_limit_error", "code": "rate_limit_exceeded"}},
+    )
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    if random.random() < settings["rate_429"]:
+        return _rate_limited()
+    latency = _latency_seconds(settings["latency_ms"])
+
+    response_format = body.get("response_format") or {}
+    schema = response_format.get("json_schema", {}).get("schema")
+    payload = generate_instance(schema, schema) if schema else {"message": "stub"}
+    content = json.dumps(payload)
+    prompt_chars = sum(len(message.get("content") or "") for message in body.get("messages", []))
+    if body.get("stream"):
+        include_usage = (body.get("stream_options") or {}).get("include_usage", False)
+        return StreamingResponse(_stream_completion(body, content, prompt_chars, latency, include_usage), media_type="text/event-stream")
+    await asyncio.sleep(latency)
+
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "stub"),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content, "refusal": None},
+            "finish_reason": "stop",
+            "logprobs": None,
+        }],
+        "usage": _usage(prompt_chars, len(content)),
+    }
+
+
+async def _stream_completion(body: Dict[str, Any], content: str, prompt_chars: int, latency: float, include_usage: bool):
+    completion_id, created, model = f"chatcmpl-{uuid.uuid4().hex}", int(time.time()), body.get("model", "stub")
+
+    def chunk(choices: list, usage: Any = None) -> str:
+        payload = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model, "choices": choices}
+        if usage is not None:
+            payload["usage"] = usage
+        return f"data: {json.dumps(payload)}\n\n"
+
+    size = max(1, settings["stream_chunk_chars"])
+    pieces = [content[start:start + size] for start in range(0, len(content), size)]
+    for index, piece in enumerate(pieces):
+        await asyncio.sleep(latency / len(pieces))
+        delta = {"content": piece, "refusal": None}
+        if index == 0:
+            delta["role"] = "assistant"
+        yield chunk([{"index": 0, "delta": delta, "finish_reason": None, "logprobs": None}])
+    yield chunk([{"index": 0, "delta": {}, "finish_reason": "stop", "logprobs": None}])
+    if include_usage:
+        yield chunk([], _usage(prompt_chars, len(content)))
+    yield "data: [DONE]\n\n"
+
+
+def _embedding(text: str) -> list:
+    # Deterministic per input so repeated texts give identical vectors
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+    rng = random.Random(seed)
+    vector = [rng.gauss(0, 1) for _ in range(EMBEDDING_DIMENSIONS)]
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+@app.post("/v1/embeddings")
+async def embeddings(request: Request):
+    body = await request.json()
+    if random.random() < settings["rate_429"]:
+        return _rate_limited()
+    await asyncio.sleep(_latency_seconds(settings["embedding_latency_ms"]))
+
+    inputs = body.get("input")
+    inputs = inputs if isinstance(inputs, list) else [inputs]
+    data = []
+    for index, text in enumerate(inputs):
+        vector = _embedding(str(text))
+        if body.get("encoding_format") == "base64":
+            # The openai client asks for base64 by default and decodes it itself
+            vector = base64.b64encode(struct.pack(f"<{len(vector)}f", *vector)).decode("ascii")
+        data.append({"object": "embedding", "index": index, "embedding": vector})
+    prompt_tokens = sum(max(1, int(len(str(text)) / settings["chars_per_token"])) for text in inputs)
+    return {
+        "object": "list",
+        "data": data,
+        "model": body.get("model", "stub"),
+        "usage": {"prompt_tokens": prompt_tokens, "total_tokens": prompt_tokens},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local OpenAI stub for load tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency", choices=["fixed", "uniform", "lognormal"], default="fixed",
+                        help="Latency distribution of chat completions")
+    parser.add_argument("--latency-ms", type=float, default=0.0,
+                        help="Fixed latency, uniform upper bound or lognormal median (ms)")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="Lognormal shape parameter")
+    parser.add_argument("--embedding-latency-ms", type=float, default=0.0, help="Latency of embedding calls (ms)")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Share of requests answered with 429 (0-1)")
+    parser.add_argument("--cached-ratio", type=float, default=0.0, help="Share of prompt tokens reported as cached (0-1)")
+    parser.add_argument("--chars-per-token", type=float, default=4.0, help="Characters per token for usage numbers")
+    parser.add_argument("--stream-chunk-chars", type=int, default=8, help="Content characters per streamed chunk")
+    args = parser.parse_args()
+
+    settings.update(
+        latency=args.latency,
+        latency_ms=args.latency_ms,
+        latency_sigma=args.latency_sigma,
+        embedding_latency_ms=args.embedding_latency_ms,
+        rate_429=args.rate_429,
+        cached_ratio=args.cached_ratio,
+        chars_per_token=args.chars_per_token,
+        stream_chunk_chars=args.stream_chunk_chars,
+    )
+
+    import uvicorn
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,18 @@
+import sqlite3
+from app.services.call_recorder import CallRecorder, RECORD_MODE_RECORD, RECORD_MODE_REPLAY
+
+
+def test_replay_uses_the_recorded_date(tmp_path):
+    path = str(tmp_path / "recordings.db")
+    CallRecorder(path, RECORD_MODE_RECORD)
+    connection = sqlite3.connect(path, isolation_level=None)
+    connection.execute("UPDATE meta SET value = '2024-01-02' WHERE key = 'today'")
+    connection.close()
+    assert CallRecorder(path, RECORD_MODE_REPLAY).today == "2024-01-02"
+
+
+def test_today_override_wins(tmp_path):
+    path = str(tmp_path / "recordings.db")
+    CallRecorder(path, RECORD_MODE_RECORD, today="2024-01-02")
+    assert CallRecorder(path, RECORD_MODE_REPLAY).today == "2024-01-02"
+    assert CallRecorder(path, RECORD_MODE_REPLAY, today="2025-06-30").today == "2025-06-30"
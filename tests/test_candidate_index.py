@@ -0,0 +1,25 @@
+from app.services.candidate_index import CandidateIndex
+
+
+def test_lookups_see_candidates_added_after_a_lookup():
+    index = CandidateIndex()
+    index.add("a", "Ann", "3-5", ["Python"], ["Django"])
+    assert index.similar_candidates("3-5", "python", "django") == ["Ann"]
+    index.add("b", "Bob", "3-5", ["Python", "Go"], ["Django"])
+    assert index.similar_candidates("3-5", "python", "django") == ["Bob", "Ann"]
+    assert index.similar_candidates("3-5", "python", "django", exclude_hash="b") == ["Ann"]
+    assert index.stored_candidates("3-5", ["python", "go"]) == [
+        {"candidate_name": "Bob", "shared_skills": 2},
+        {"candidate_name": "Ann", "shared_skills": 1},
+    ]
+    assert index.similar_candidates("3-5", None, "django") == ["Bob", "Ann"]
+    assert index.similar_candidates("0-2", "python") == []
+
+
+def test_sqlite_index_is_rebuilt_on_startup(tmp_path):
+    path = str(tmp_path / "candidates.db")
+    CandidateIndex(path).add("a", "Ann", "3-5", ["Python"], [])
+    reloaded = CandidateIndex(path)
+    assert reloaded.similar_candidates("3-5", "python") == ["Ann"]
+    reloaded.add("b", "Bob", "3-5", ["Python"], [])
+    assert reloaded.similar_candidates("3-5", "python") == ["Bob", "Ann"]
@@ -0,0 +1,95 @@
+from app.models.schemas import JobDescriptionSchema, ResumeSchema
+from app.services.chunked_extraction import plan_chunks
+from app.services.job_description_enhance import JD_OVERVIEW_FIELDS, JD_SECTION_FIELDS, merge_jd_partials
+from app.services.resume_extraction import RESUME_OVERVIEW_FIELDS, RESUME_SECTION_FIELDS
+from app.utils.section_chunker import JD_SECTION_HEADINGS, RESUME_SECTION_HEADINGS, split_sections
+
+MAX_CHUNK_CHARS = 6000
+
+
+def _paragraphs(prefix: str, count: int) -> str:
+    return "\n\n".join(f"{prefix} {index}: " + "detail " * 60 for index in range(count))
+
+
+def _long_jd() -> str:
+    return "\n".join([
+        "Senior Data Engineer",
+        "Remote, full time",
+        _paragraphs("Intro", 3),
+        "About Us",
+        _paragraphs("Company", 6),
+        "Key Responsibilities",
+        _paragraphs("Duty", 20),
+        "Requirements",
+        "- 5+ years of Python",
+        _paragraphs("Requirement", 12),
+        "What We Offer",
+        _paragraphs("Benefit", 6),
+    ])
+
+
+def test_long_jd_produces_a_chunk_plan():
+    text = _long_jd()
+    assert len(text) > 20000
+    assert [section.kind for section in split_sections(text, JD_SECTION_HEADINGS)] == [
+        "overview", "company", "responsibilities", "requirements", "benefits"
+    ]
+
+    plan = plan_chunks(
+        text, JD_SECTION_HEADINGS, JD_SECTION_FIELDS, JD_OVERVIEW_FIELDS,
+        tuple(JobDescriptionSchema.model_fields), JobDescriptionSchema, MAX_CHUNK_CHARS
+    )
+
+    assert plan is not None and len(plan) > 3
+    assert all(len(chunk) <= MAX_CHUNK_CHARS for chunk, _ in plan)
+    overview_text, overview_fields = plan[0]
+    assert overview_fields == ("job_title", "job_description", "industry_name")
+    assert "Senior Data Engineer" in overview_text
+    fields_by_text = {chunk: fields for chunk, fields in plan}
+    assert any("Duty" in chunk and fields == ("job_description", "required_skills") for chunk, fields in fields_by_text.items())
+    assert any("Requirement" in chunk and fields == ("required_skills", "min_work_experience") for chunk, fields in fields_by_text.items())
+    assert any("Company" in chunk and fields == ("industry_name",) for chunk, fields in fields_by_text.items())
+    # Benefits provide no field, and responsibilities are no longer folded into the requirements
+    assert not any("Benefit" in chunk for chunk in fields_by_text)
+    assert not any("Duty" in chunk and "Requirement" in chunk for chunk in fields_by_text)
+
+
+def test_jd_with_only_requirements_is_not_chunked():
+    text = "Data Engineer\n" + _paragraphs("Intro", 10) + "\nRequirements\n" + _paragraphs("Requirement", 30)
+    plan = plan_chunks(
+        text, JD_SECTION_HEADINGS, JD_SECTION_FIELDS, JD_OVERVIEW_FIELDS,
+        tuple(JobDescriptionSchema.model_fields), JobDescriptionSchema, MAX_CHUNK_CHARS
+    )
+    assert plan is None
+
+
+def test_merge_jd_partials():
+    merged = merge_jd_partials([
+        {"job_title": "Senior Data Engineer", "job_description": "Builds pipelines.", "industry_name": ""},
+        {"industry_name": "Fintech"},
+        {"job_description": "Owns the warehouse.", "required_skills": ["Python", "SQL"]},
+        {"required_skills": ["python", "Airflow"], "min_work_experience": 5},
+        {"required_skills": ["Spark"], "min_work_experience": 3},
+    ])
+    assert merged == {
+        "job_title": "Senior Data Engineer",
+        "job_description": "Builds pipelines.\n\nOwns the warehouse.",
+        "industry_name": "Fintech",
+        "required_skills": ["Python", "SQL", "Airflow", "Spark"],
+        "min_work_experience": 5,
+    }
+
+
+def test_long_resume_produces_a_chunk_plan():
+    text = "\n".join([
+        "Jane Doe", "jane@example.com",
+        "Experience", _paragraphs("Role", 20),
+        "Education", _paragraphs("Degree", 3),
+        "Skills", "Python, SQL",
+    ])
+    plan = plan_chunks(
+        text, RESUME_SECTION_HEADINGS, RESUME_SECTION_FIELDS, RESUME_OVERVIEW_FIELDS,
+        tuple(ResumeSchema.model_fields), ResumeSchema, MAX_CHUNK_CHARS
+    )
+    assert plan is not None
+    assert {fields for _, fields in plan} >= {("experiences",), ("educations",), ("skills",)}
@@ -0,0 +1,49 @@
+from datetime import date
+import pytest
+from app.utils.date_parser import calculate_total_duration, parse_date_range, parse_resume_date
+
+TODAY = date(2024, 6, 15)
+
+
+def _duration(*periods):
+    return calculate_total_duration([{"date_start": start, "date_end": end} for start, end in periods], today=TODAY)
+
+
+@pytest.mark.parametrize("periods, expected", [
+    ([("Jan 2019", "Dec 2019")], {"years": 1, "months": 0}),
+    ([("2019", "2020")], {"years": 2, "months": 0}),
+    ([("Jan 2020", "Jan 2020")], {"years": 0, "months": 1}),
+    ([("Mar 2021", "Feb 2022")], {"years": 1, "months": 0}),
+    # Back-to-back roles continue each other
+    ([("Jan 2019", "Dec 2019"), ("Jan 2020", "Jun 2020")], {"years": 1, "months": 6}),
+    # Overlaps are counted once
+    ([("Jan 2019", "Dec 2019"), ("Jun 2019", "Mar 2020")], {"years": 1, "months": 3}),
+    # A gap is not counted
+    ([("Jan 2019", "Mar 2019"), ("Jun 2019", "Aug 2019")], {"years": 0, "months": 6}),
+    # Open-ended periods run through the current month
+    ([("Jan 2024", None)], {"years": 0, "months": 6}),
+    ([("Jan 2024", "Present")], {"years": 0, "months": 6}),
+    ([], {"years": 0, "months": 0}),
+])
+def test_durations_count_start_and_end_month(periods, expected):
+    assert _duration(*periods) == expected
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("Jan-2020", date(2020, 1, 1)),
+    ("May-2020", date(2020, 5, 1)),
+    ("Sept - 2021", date(2021, 9, 1)),
+    ("Jan-20", date(2020, 1, 1)),
+    ("Jan 2020", date(2020, 1, 1)),
+    ("2020-01", date(2020, 1, 1)),
+    ("03/2019", date(2019, 3, 1)),
+])
+def test_parse_resume_date(value, expected):
+    assert parse_resume_date(value) == expected
+
+
+def test_hyphenated_month_year_ranges():
+    assert parse_date_range("Jan-2020 - May-2020") == (date(2020, 1, 1), date(2020, 5, 1))
+    assert parse_date_range("Jan-2020 to Present", today=TODAY) == (date(2020, 1, 1), date(2024, 6, 1))
+    assert _duration(("Jan-2020", "May-2020")) == {"years": 0, "months": 5}
+    assert _duration(("Jan-2020 - May-2020", None)) == {"years": 0, "months": 5}
@@ -0,0 +1,47 @@
+import threading
+import time
+import pytest
+from app.utils.deadline import DeadlineExceeded
+from app.utils.parse_sandbox import ParseLimits, ParseSandbox
+
+
+@pytest.fixture
+def sandbox():
+    sandbox = ParseSandbox(ParseLimits(), workers=1)
+    yield sandbox
+    sandbox.close()
+
+
+def test_waiter_spawns_replacement_when_busy_worker_is_killed(sandbox):
+    busy = sandbox._acquire(None)
+    acquired = {}
+    # No deadline: before the fix this waiter blocked forever
+    waiter = threading.Thread(target=lambda: acquired.setdefault("worker", sandbox._acquire(None)), daemon=True)
+    waiter.start()
+    time.sleep(0.2)
+    assert waiter.is_alive()
+
+    sandbox._replace(busy)
+    waiter.join(timeout=30)
+
+    assert not waiter.is_alive()
+    assert acquired["worker"] is not busy
+    assert acquired["worker"].process.is_alive()
+    assert sandbox._started == 1
+    sandbox._release(acquired["worker"])
+
+
+def test_waiter_gets_released_worker(sandbox):
+    busy = sandbox._acquire(None)
+    threading.Timer(0.2, sandbox._release, args=(busy,)).start()
+    assert sandbox._acquire(5) is busy
+    sandbox._release(busy)
+
+
+def test_waiter_gives_up_at_deadline(sandbox):
+    busy = sandbox._acquire(None)
+    started = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        sandbox._acquire(0.3)
+    assert time.monotonic() - started < 5
+    sandbox._release(busy)
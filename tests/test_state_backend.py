@@ -0,0 +1,72 @@
+import asyncio
+import sqlite3
+import time
+import pytest
+from app.services.state_backend import InMemoryStateBackend, SQLiteStateBackend, StateBackend
+
+
+@pytest.fixture
+def sqlite_backend(tmp_path):
+    return SQLiteStateBackend(str(tmp_path / "state.db"), max_entries_per_namespace=2, busy_timeout=2.0)
+
+
+def test_sqlite_lru_eviction(sqlite_backend):
+    sqlite_backend.set("ns", "a", {"value": 1})
+    sqlite_backend.set("ns", "b", {"value": 2})
+    time.sleep(0.01)
+    assert sqlite_backend.get("ns", "a") == {"value": 1}
+    sqlite_backend.set("ns", "c", {"value": 3})
+    assert sqlite_backend.get("ns", "b") is None
+    assert sqlite_backend.get("ns", "a") == {"value": 1}
+    assert sqlite_backend.count("ns") == 2
+
+
+def test_sqlite_reads_do_not_wait_for_another_writer(sqlite_backend):
+    sqlite_backend.set("ns", "a", {"value": 1})
+    other = sqlite3.connect(sqlite_backend.path, isolation_level=None)
+    other.execute("BEGIN IMMEDIATE")
+    try:
+        started = time.monotonic()
+        assert sqlite_backend.get("ns", "a") == {"value": 1}
+        assert sqlite_backend.count("ns") == 1
+        assert time.monotonic() - started < 0.5
+    finally:
+        other.execute("ROLLBACK")
+        other.close()
+
+
+def test_sqlite_async_write_waits_off_the_event_loop(sqlite_backend):
+    async def scenario():
+        other = sqlite3.connect(sqlite_backend.path, isolation_level=None)
+        other.execute("BEGIN IMMEDIATE")
+        write = asyncio.create_task(sqlite_backend.set_async("ns", "a", {"value": 1}))
+        started = time.monotonic()
+        await asyncio.sleep(0.05)
+        loop_delay = time.monotonic() - started
+        other.execute("ROLLBACK")
+        other.close()
+        await write
+        return loop_delay, await sqlite_backend.get_async("ns", "a")
+
+    loop_delay, value = asyncio.run(scenario())
+    assert loop_delay < 0.5
+    assert value == {"value": 1}
+
+
+def test_memory_backend_async_methods():
+    backend = InMemoryStateBackend()
+
+    async def scenario():
+        await backend.set_async("ns", "a", [1, 2])
+        return await backend.get_async("ns", "a")
+
+    assert asyncio.run(scenario()) == [1, 2]
+
+
+def test_backend_missing_a_method_fails_at_instantiation():
+    class Incomplete(StateBackend):
+        def get(self, namespace, key):
+            return None
+
+    with pytest.raises(TypeError):
+        Incomplete()
@@ -0,0 +1,51 @@
+from app.utils.text_normalizer import PAGE_BREAK, normalize_document_text
+
+
+def _pages(*pages):
+    return PAGE_BREAK.join("\n".join(lines) for lines in pages)
+
+
+BODY_1 = ["Experience", "Software Engineer", "Acme Corp", "Built the billing service", "Led a team of", "12",
+          "engineers", "Skills", "Python", "Go"]
+BODY_2 = ["Software Engineer", "Globex", "Python", "Maintained the data pipeline", "Mentored interns",
+          "Education", "BSc Computer Science", "State University"]
+
+
+def test_running_header_and_footer_are_kept_once():
+    text = _pages(
+        ["Jane Doe - Resume", "jane@example.com"] + BODY_1 + ["Confidential", "Page 1 of 2"],
+        ["Jane Doe - Resume", "jane@example.com"] + BODY_2 + ["Confidential", "Page 2 of 2"],
+    )
+    normalized, report = normalize_document_text(text)
+    lines = normalized.split("\n")
+
+    assert lines.count("Jane Doe - Resume") == 1
+    assert lines.count("jane@example.com") == 1
+    assert lines.count("Confidential") == 1
+    assert "Page 1 of 2" not in lines and "Page 2 of 2" not in lines
+    assert report.repeated_lines_removed == 5
+
+
+def test_repeated_body_lines_are_content():
+    text = _pages(["Header"] + BODY_1 + ["Footer"], ["Header"] + BODY_2 + ["Footer"])
+    lines = normalize_document_text(text)[0].split("\n")
+
+    # A second role with the same title and a skill listed twice survive
+    assert lines.count("Software Engineer") == 2
+    assert lines.count("Python") == 2
+    assert lines.count("Header") == 1
+
+
+def test_number_lines_are_only_page_numbers_at_a_page_edge():
+    text = _pages(["Header"] + BODY_1 + ["1"], ["Header"] + BODY_2 + ["2"])
+    lines = normalize_document_text(text)[0].split("\n")
+
+    assert "12" in lines
+    assert "1" not in lines and "2" not in lines
+
+
+def test_line_on_a_minority_of_page_edges_is_kept():
+    text = _pages(["Acme Corp"] + BODY_1, ["Globex"] + BODY_2, ["Acme Corp", "References on request"], ["Notes", "Available immediately"])
+    lines = normalize_document_text(text)[0].split("\n")
+
+    assert lines.count("Acme Corp") == 3